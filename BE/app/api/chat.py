@@ -1,4 +1,6 @@
+import json
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from app.model.schemas import ChatRequest, ChatResponse
 from app.service.rag_service import rag_service
 
@@ -7,10 +9,55 @@ router = APIRouter()
 @router.post("/ask", response_model=ChatResponse)
 async def ask_bot(request: ChatRequest):
     try:
-        result = rag_service.ask_question(request.question)
+        # Đường bất đồng bộ: không chặn event loop trong lúc chờ Chroma/Gemini
+        result = await rag_service.aask_question(request.question)
         return ChatResponse(
             answer=result["answer"],
             sources=result["sources"]
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data) -> str:
+    """Một sự kiện Server-Sent Events (data mã hóa JSON để giữ nguyên xuống dòng)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/ask/stream")
+async def ask_bot_stream(request: ChatRequest):
+    """
+    Trả lời dạng luồng (text/event-stream):
+    - event "sources": danh sách nguồn, gửi ngay sau bước truy xuất
+    - event "token": từng đoạn câu trả lời do LLM sinh ra
+    - event "done" khi kết thúc, hoặc "error" nếu có lỗi giữa chừng
+    """
+    async def event_stream():
+        try:
+            async for event, data in rag_service.astream_question(request.question):
+                yield _sse(event, data)
+            yield _sse("done", {})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        # Tắt cache/buffer của proxy để token tới trình duyệt ngay lập tức
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/ask/cache/stats")
+def answer_cache_stats():
+    """
+    Thống kê cache câu trả lời theo ngữ nghĩa (hit rate, số mục, số lần làm mới...)
+    và cache vector câu hỏi (hit rate, số lô / số câu đã gửi tới API embedding)
+    """
+    query_embeddings = rag_service.embeddings.get_query_statistics()
+    if rag_service.answer_cache is None:
+        return {"enabled": False, "query_embeddings": query_embeddings}
+    return {"enabled": True, **rag_service.answer_cache.get_statistics(), "query_embeddings": query_embeddings}
+
+
+@router.get("/ask/retrieval/stats")
+def retrieval_stats():
+    """Thống kê truy xuất: số lần tìm vector / lai (vector + BM25) / chỉ từ khóa, kích thước chỉ mục từ khóa"""
+    return rag_service.retriever.get_statistics()
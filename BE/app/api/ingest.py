@@ -1,6 +1,8 @@
-from fastapi import APIRouter, HTTPException, BackgroundTasks
-from app.service.rag_service import rag_service
+import os
+from fastapi import APIRouter, HTTPException
+from app.service.job_queue import job_queue
 from pydantic import BaseModel
+from typing import Literal
 
 router = APIRouter()
 
@@ -8,27 +10,65 @@ class IngestRequest(BaseModel):
     directory_path: str = "./data"
 
 @router.post("/ingest")
-async def ingest_data(request: IngestRequest, background_tasks: BackgroundTasks):
+async def ingest_data(request: IngestRequest):
     """
-    Trigger data ingestion in the background.
+    Đưa job nạp dữ liệu PDF vào hàng đợi (Worker riêng sẽ xử lý).
     """
     try:
-        # Run ingestion in background to avoid blocking the API
-        background_tasks.add_task(rag_service.ingest_documents, request.directory_path)
-        return {"message": "Ingestion process started in background.", "target_directory": request.directory_path}
+        directory_path = os.path.normpath(request.directory_path)
+        job, created = job_queue.enqueue("ingest_pdf", {"directory_path": directory_path})
+        return {
+            "message": "Ingestion job queued." if created else "An identical ingestion job is already pending.",
+            "job_id": job["id"],
+            "status": job["status"],
+            "deduplicated": not created,
+            "target_directory": directory_path
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 class WebIngestRequest(BaseModel):
     start_url: str = "https://hau.edu.vn/"
+    mode: Literal["full", "incremental", "due"] = "full"
 
 @router.post("/ingest/web")
-async def ingest_web_data(request: WebIngestRequest, background_tasks: BackgroundTasks):
+async def ingest_web_data(request: WebIngestRequest):
     """
-    Trigger web data ingestion from start url using recursive crawler in the background.
+    Đưa job đồng bộ dữ liệu Website vào hàng đợi (Worker riêng sẽ xử lý).
     """
     try:
-        background_tasks.add_task(rag_service.sync_website_data, request.start_url)
-        return {"message": "Tiến trình đồng bộ Website đã được kích hoạt chạy ngầm...", "start_url": request.start_url}
+        job, created = job_queue.enqueue("sync_web", {"start_url": request.start_url, "mode": request.mode})
+        return {
+            "message": "Tiến trình đồng bộ Website đã được đưa vào hàng đợi..." if created
+                       else "Tiến trình đồng bộ Website này đang chờ hoặc đang chạy.",
+            "job_id": job["id"],
+            "status": job["status"],
+            "deduplicated": not created,
+            "start_url": request.start_url,
+            "mode": request.mode
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/ingest/jobs/{job_id}")
+async def get_ingest_job(job_id: str):
+    """
+    Trạng thái job nạp dữ liệu: giai đoạn, số liệu tiến độ và tốc độ nạp.
+    """
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "job_id": job["id"],
+        "kind": job["kind"],
+        "payload": job["payload"],
+        "status": job["status"],
+        "stage": job["stage"],
+        "progress": job["progress"] or {},
+        "result": job["result"],
+        "error": job["error"],
+        "attempts": job["attempts"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"]
+    }
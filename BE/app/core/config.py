@@ -6,5 +6,81 @@ load_dotenv()
 class Settings:
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     DATABASE_DIR = "./database/chroma_db"
+    EMBEDDING_MODEL = "models/gemini-embedding-001"
+
+    # Cache embedding bền vững (tránh embed lại chunk đã trả phí)
+    EMBEDDING_CACHE_PATH = "./database/embedding_cache.sqlite3"
+    EMBEDDING_CACHE_MAX_MB = float(os.getenv("EMBEDDING_CACHE_MAX_MB", "512"))
+
+    # Danh mục tài liệu/URL đã nạp (thay cho ingestion_log.json, web_ingestion_log.json)
+    CATALOG_PATH = "./database/ingestion_catalog.sqlite3"
+
+    # Hàng đợi job nạp dữ liệu (API ghi job, ingest_worker.py xử lý)
+    JOB_QUEUE_PATH = "./database/jobs.sqlite3"
+    INGEST_MAX_CONCURRENT_JOBS = int(os.getenv("INGEST_MAX_CONCURRENT_JOBS", "1"))
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))
+    # Số lần chạy tối đa của job bị gián đoạn (worker crash) trước khi đánh dấu failed
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+    # Nhện web bất đồng bộ (đồng bộ dữ liệu website)
+    CRAWL_MAX_CONCURRENCY = int(os.getenv("CRAWL_MAX_CONCURRENCY", "8"))
+    CRAWL_PER_HOST_CONCURRENCY = int(os.getenv("CRAWL_PER_HOST_CONCURRENCY", "4"))
+    CRAWL_POLITENESS_DELAY = float(os.getenv("CRAWL_POLITENESS_DELAY", "0.25"))
+    # Ngân sách mỗi lần đồng bộ web (0 = không giới hạn); phần còn lại được quét tiếp ở lần sau
+    CRAWL_MAX_PAGES = int(os.getenv("CRAWL_MAX_PAGES", "0"))
+    CRAWL_MAX_SECONDS = float(os.getenv("CRAWL_MAX_SECONDS", "3600"))
+
+    # Dọn URL đã bị gỡ khỏi website (404/410) sau mỗi lần quét toàn bộ; không xóa nếu số trang
+    # bị gỡ vượt quá tỷ lệ này (website lỗi tạm thời, cấu hình sai...)
+    WEB_GC_ENABLED = os.getenv("WEB_GC_ENABLED", "true").lower() == "true"
+    WEB_GC_MAX_DELETE_RATIO = float(os.getenv("WEB_GC_MAX_DELETE_RATIO", "0.3"))
+
+    # Lịch tải lại thích nghi theo từng URL (job "due" chỉ tải các URL đã tới hạn)
+    RECRAWL_MIN_HOURS = float(os.getenv("RECRAWL_MIN_HOURS", "1"))
+    RECRAWL_DEFAULT_HOURS = float(os.getenv("RECRAWL_DEFAULT_HOURS", "24"))
+    RECRAWL_MAX_DAYS = float(os.getenv("RECRAWL_MAX_DAYS", "30"))
+    RECRAWL_BATCH_SIZE = int(os.getenv("RECRAWL_BATCH_SIZE", "500"))
+    RECRAWL_CHECK_MINUTES = int(os.getenv("RECRAWL_CHECK_MINUTES", "60"))
+
+    # Trích xuất nội dung HTML: "lxml" (nhanh, lọc khối giao diện) hoặc "bs4" (cách cũ)
+    HTML_EXTRACTOR = os.getenv("HTML_EXTRACTOR", "lxml")
+    HTML_MAIN_CONTENT = os.getenv("HTML_MAIN_CONTENT", "true").lower() == "true"
+
+    # Lọc chunk trùng/gần trùng trước khi embed (SimHash, khoảng cách Hamming tối đa 0-3)
+    DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "true").lower() == "true"
+    DEDUP_MAX_DISTANCE = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))
+
+    # Cấu hình nạp embedding theo lô (EmbeddingWriter)
+    EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "100"))
+    EMBED_REQUESTS_PER_MINUTE = float(os.getenv("EMBED_REQUESTS_PER_MINUTE", "60"))
+    EMBED_MAX_RETRIES = int(os.getenv("EMBED_MAX_RETRIES", "5"))
+
+    # Số tiến trình đọc PDF song song (mặc định: số nhân CPU)
+    PDF_PARSE_WORKERS = int(os.getenv("PDF_PARSE_WORKERS", str(os.cpu_count() or 1)))
+
+    # Số tiến trình cắt chunk song song trong ChunkingService.split_documents (1 = tuần tự)
+    CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "1"))
+
+    # Số luồng tìm kiếm Chroma cho đường hỏi đáp bất đồng bộ (/ask)
+    CHROMA_QUERY_WORKERS = int(os.getenv("CHROMA_QUERY_WORKERS", "8"))
+
+    # Cache câu trả lời theo ngữ nghĩa (câu hỏi lặp lại với cách diễn đạt khác)
+    ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+    ANSWER_CACHE_THRESHOLD = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95"))
+    ANSWER_CACHE_TTL_HOURS = float(os.getenv("ANSWER_CACHE_TTL_HOURS", "24"))
+    ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+
+    # Vector câu hỏi: cache LRU trong bộ nhớ + gom các câu hỏi đến cùng lúc thành một lần gọi API
+    QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "2048"))
+    QUERY_BATCH_WINDOW_MS = float(os.getenv("QUERY_BATCH_WINDOW_MS", "5"))
+    QUERY_BATCH_MAX_SIZE = int(os.getenv("QUERY_BATCH_MAX_SIZE", "32"))
+
+    # Tìm kiếm lai: BM25 (chỉ mục từ khóa SQLite FTS5 cạnh Chroma) + vector, trộn bằng Reciprocal Rank Fusion
+    LEXICAL_INDEX_PATH = "./database/lexical_index.sqlite3"
+    HYBRID_SEARCH_ENABLED = os.getenv("HYBRID_SEARCH_ENABLED", "true").lower() == "true"
+    HYBRID_CANDIDATES = int(os.getenv("HYBRID_CANDIDATES", "20"))
+    HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+    # Câu hỏi dạng mã/số hiệu tối đa bao nhiêu âm tiết thì chỉ tìm theo từ khóa (không embed)
+    LEXICAL_FAST_PATH_MAX_TOKENS = int(os.getenv("LEXICAL_FAST_PATH_MAX_TOKENS", "4"))
 
 settings = Settings()
\ No newline at end of file
@@ -3,27 +3,52 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from app.api import chat, ingest
-from app.service.rag_service import rag_service
+from app.service.job_queue import job_queue
+from app.core.config import settings
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Khởi tạo Scheduler
     scheduler = AsyncIOScheduler()
     
-    # Cấu hình cronjob chạy lúc 02:00 sáng mỗi ngày
+    # Cấu hình cronjob lúc 02:00 sáng mỗi ngày: đưa job đồng bộ vào hàng đợi cho Worker xử lý
+    # (incremental: chỉ tải trang mới/thay đổi theo sitemap/RSS)
     scheduler.add_job(
-        rag_service.sync_website_data,
+        job_queue.enqueue,
         trigger='cron',
         hour=2,
         minute=0,
-        args=["https://hau.edu.vn/"],
+        args=["sync_web", {"start_url": "https://hau.edu.vn/", "mode": "incremental"}],
         id='sync_website_job',
         replace_existing=True
     )
     
+    # Quét đệ quy toàn bộ mỗi Chủ nhật lúc 03:00 (bắt các trang thay đổi mà sitemap không báo lastmod)
+    scheduler.add_job(
+        job_queue.enqueue,
+        trigger='cron',
+        day_of_week='sun',
+        hour=3,
+        minute=0,
+        args=["sync_web", {"start_url": "https://hau.edu.vn/", "mode": "full"}],
+        id='full_sync_website_job',
+        replace_existing=True
+    )
+    
+    # Tải lại các URL đã tới hạn theo lịch thích nghi của từng URL (trang hay đổi được tải thường xuyên hơn)
+    scheduler.add_job(
+        job_queue.enqueue,
+        trigger='interval',
+        minutes=settings.RECRAWL_CHECK_MINUTES,
+        args=["sync_web", {"start_url": "https://hau.edu.vn/", "mode": "due"}],
+        id='due_recrawl_job',
+        replace_existing=True
+    )
+    
     # Khởi động scheduler
     scheduler.start()
-    print("⏰ Đã khởi động Cronjob thu thập dữ liệu web lúc 02:00 sáng hàng ngày.")
+    print("⏰ Đã khởi động Cronjob thu thập dữ liệu web lúc 02:00 sáng hàng ngày (quét toàn bộ vào 03:00 Chủ nhật, "
+          f"tải lại URL tới hạn mỗi {settings.RECRAWL_CHECK_MINUTES} phút).")
     
     yield
     
@@ -0,0 +1,145 @@
+"""
+💡 ANSWER_CACHE.PY
+Chuyên trách: Cache câu trả lời theo ngữ nghĩa cho các câu hỏi lặp lại (học phí, điểm chuẩn, hồ sơ...)
+
+- Tra cứu theo vector câu hỏi: câu hỏi diễn đạt khác nhưng cosine >= threshold dùng lại câu trả lời cũ
+  (kèm nguồn), không tốn lần gọi LLM nào
+- Giới hạn số mục (xóa mục lâu không dùng nhất - LRU) và thời hạn sống (TTL)
+- Tự xóa toàn bộ khi Vector Store thay đổi: so "thế hệ" collection lưu trong IngestionCatalog
+  (meta collection_generation, tăng ngay khi một lô chunk được ghi hoặc chunk cũ bị xóa).
+  Đọc từ SQLite nên đúng cả khi Worker nạp dữ liệu chạy ở tiến trình khác
+- Đếm hit/miss để theo dõi hiệu quả
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Example:
+        >>> cache = SemanticAnswerCache(catalog, threshold=0.95, ttl_seconds=86400, max_entries=1000)
+        >>> generation = cache.generation()
+        >>> cached = cache.get(question_vector)
+        >>> if cached is None:
+        ...     result = run_rag(question)
+        ...     cache.put(question, question_vector, result, generation)
+    """
+
+    def __init__(self,
+                 catalog,
+                 threshold: float = 0.95,
+                 ttl_seconds: float = 86400,
+                 max_entries: int = 1000):
+        """
+        Args:
+            catalog: IngestionCatalog (đọc thế hệ collection)
+            threshold: Độ tương đồng cosine tối thiểu để coi là cùng câu hỏi
+            ttl_seconds: Thời hạn sống của một câu trả lời (giây)
+            max_entries: Số câu trả lời tối đa giữ trong bộ nhớ
+        """
+        self.catalog = catalog
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # key -> (câu hỏi, vector đã chuẩn hóa, kết quả, thời điểm tạo)
+        self._entries: "OrderedDict[int, Tuple[str, np.ndarray, Dict, float]]" = OrderedDict()
+        self._next_key = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: List[int] = []
+        self._generation = self.generation()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def generation(self) -> str:
+        return self.catalog.get_meta("collection_generation", "0")
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _check_generation(self) -> None:
+        """Vector Store đã thay đổi kể từ lần trước -> bỏ mọi câu trả lời cũ"""
+        current = self.generation()
+        if current != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+            self._generation = current
+
+    def _remove(self, key: int) -> None:
+        self._entries.pop(key, None)
+        self._matrix = None
+
+    def get(self, vector) -> Optional[Dict]:
+        """Câu trả lời đã lưu của câu hỏi gần nhất (cosine >= threshold), hoặc None"""
+        query = self._normalize(vector)
+        with self._lock:
+            self._check_generation()
+            if self._entries:
+                if self._matrix is None:
+                    self._matrix_keys = list(self._entries.keys())
+                    self._matrix = np.stack([self._entries[key][1] for key in self._matrix_keys])
+                scores = self._matrix @ query
+                best = int(np.argmax(scores))
+                key = self._matrix_keys[best]
+                if scores[best] >= self.threshold:
+                    _, _, result, created_at = self._entries[key]
+                    if time.time() - created_at <= self.ttl_seconds:
+                        self._entries.move_to_end(key)
+                        self.hits += 1
+                        return result
+                    self._remove(key)
+                    self.expirations += 1
+            self.misses += 1
+            return None
+
+    def put(self, question: str, vector, result: Dict, generation: str) -> None:
+        """
+        Lưu câu trả lời. generation là thế hệ collection lúc bắt đầu trả lời: nếu dữ liệu đã
+        thay đổi trong lúc LLM đang sinh câu trả lời thì không lưu (câu trả lời có thể đã cũ)
+        """
+        with self._lock:
+            self._check_generation()
+            if generation != self._generation:
+                return
+            self._entries[self._next_key] = (question, self._normalize(vector), result, time.time())
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            self._matrix = None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def get_statistics(self) -> Dict:
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = len(self._entries)
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "generation": self._generation,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds
+        }
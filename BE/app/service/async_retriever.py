@@ -0,0 +1,122 @@
+"""
+🔍 ASYNC_RETRIEVER.PY
+Chuyên trách: Truy xuất tài liệu không chặn event loop cho đường hỏi đáp bất đồng bộ (/ask)
+
+- Embedding câu hỏi: gọi aembed_query (client bất đồng bộ), không chiếm luồng nào khi chờ mạng
+- Tìm kiếm Chroma (đồng bộ, chạy trong tiến trình): đẩy sang thread pool riêng có giới hạn,
+  không dùng chung executor mặc định của event loop
+- Đường đồng bộ (invoke) giữ nguyên hành vi như as_retriever(search_kwargs={"k": k})
+- Tìm kiếm lai (khi có lexical_index): lấy ứng viên từ cả vector lẫn BM25 (LexicalIndex) rồi trộn
+  bằng Reciprocal Rank Fusion; tìm BM25 chạy song song với lúc chờ embed câu hỏi
+- Câu hỏi chỉ gồm mã/số hiệu ("Điều 12", "KT101") khớp được đủ k đoạn theo cụm từ chính xác
+  -> trả luôn kết quả BM25, không gọi API embedding
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict, Field
+
+from app.service.lexical_index import looks_like_identifier
+
+
+def reciprocal_rank_fusion(rankings: List[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    """
+    Trộn nhiều danh sách kết quả theo thứ hạng: score = Σ 1 / (rrf_k + hạng).
+    Không cần chuẩn hóa điểm (cosine và BM25 khác thang đo); tài liệu có mặt ở cả hai danh sách lên đầu
+    """
+    scores: Dict[object, float] = {}
+    documents: Dict[object, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, start=1):
+            key = doc.id or (doc.metadata.get("source"), doc.page_content)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, doc)
+    best = sorted(scores, key=scores.get, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+class AsyncVectorStoreRetriever(BaseRetriever):
+    """
+    Retriever dùng chung cho invoke và ainvoke của rag_chain
+
+    Example:
+        >>> retriever = AsyncVectorStoreRetriever(vector_store=store, embeddings=emb, executor=pool, k=5)
+        >>> docs = await retriever.ainvoke("Học phí năm 2024?")
+        >>> hybrid = AsyncVectorStoreRetriever(..., lexical_index=LexicalIndex(path), candidates=20)
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vector_store: object
+    embeddings: object
+    executor: ThreadPoolExecutor
+    k: int = 5
+    lexical_index: Optional[object] = None
+    candidates: int = 20
+    rrf_k: int = 60
+    identifier_max_tokens: int = 4
+    stats: Dict[str, int] = Field(default_factory=lambda: {"dense": 0, "hybrid": 0, "lexical_only": 0})
+
+    def is_identifier_query(self, query: str) -> bool:
+        return self.lexical_index is not None and looks_like_identifier(query, self.identifier_max_tokens)
+
+    def _lexical_only(self, query: str) -> List[Document]:
+        """Đường tắt cho câu hỏi dạng mã/số hiệu: khớp nguyên cụm; ít hơn k kết quả -> dùng tìm kiếm lai như thường"""
+        if not self.is_identifier_query(query):
+            return []
+        docs = self.lexical_index.search(query, k=self.k, phrase=True)
+        if len(docs) < self.k:
+            return []
+        self.stats["lexical_only"] += 1
+        return docs
+
+    def _fuse(self, dense: List[Document], lexical: List[Document]) -> List[Document]:
+        self.stats["hybrid"] += 1
+        return reciprocal_rank_fusion([dense, lexical], k=self.k, rrf_k=self.rrf_k)
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if self.lexical_index is None:
+            self.stats["dense"] += 1
+            embedding = self.embeddings.embed_query(query)
+            return self.vector_store.similarity_search_by_vector(embedding, k=self.k)
+
+        docs = self._lexical_only(query)
+        if docs:
+            return docs
+        embedding = self.embeddings.embed_query(query)
+        dense = self.vector_store.similarity_search_by_vector(embedding, k=self.candidates)
+        return self._fuse(dense, self.lexical_index.search(query, k=self.candidates))
+
+    async def _aget_relevant_documents(self, query: str, *,
+                                       run_manager: AsyncCallbackManagerForRetrieverRun) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        if self.lexical_index is None:
+            self.stats["dense"] += 1
+            embedding = await self.embeddings.aembed_query(query)
+            return await loop.run_in_executor(
+                self.executor,
+                lambda: self.vector_store.similarity_search_by_vector(embedding, k=self.k)
+            )
+
+        docs = await loop.run_in_executor(self.executor, self._lexical_only, query)
+        if docs:
+            return docs
+        # BM25 chạy trong lúc chờ API embedding
+        lexical = loop.run_in_executor(self.executor, lambda: self.lexical_index.search(query, k=self.candidates))
+        embedding = await self.embeddings.aembed_query(query)
+        dense = await loop.run_in_executor(
+            self.executor,
+            lambda: self.vector_store.similarity_search_by_vector(embedding, k=self.candidates)
+        )
+        return self._fuse(dense, await lexical)
+
+    def get_statistics(self) -> Dict:
+        stats = {"mode": "hybrid" if self.lexical_index is not None else "dense", **self.stats}
+        if self.lexical_index is not None:
+            stats["lexical_index"] = self.lexical_index.get_statistics()
+        return stats
@@ -0,0 +1,171 @@
+"""
+🧹 CHUNK_DEDUP.PY
+Chuyên trách: Loại bỏ chunk trùng lặp / gần trùng lặp trước khi embed
+
+- Trùng tuyệt đối: hash nội dung đã chuẩn hóa (chữ thường, gộp khoảng trắng)
+- Gần trùng: SimHash 64-bit trên cụm 3 từ, khoảng cách Hamming <= max_distance
+- Chỉ mục chữ ký bền vững (bảng chunk_signatures trong IngestionCatalog), tra cứu theo
+  4 dải 16-bit (LSH): hai chữ ký lệch <= 3 bit chắc chắn trùng nhau ở ít nhất một dải
+- Chữ ký chỉ được lưu khi chunk đã ghi thành công vào Vector Store, và chỉ bỏ chunk trùng với
+  chunk ĐÃ GHI (không bỏ theo chunk cùng lần chạy chưa ghi xong)
+- Chunk bị bỏ được ghi nhật ký kèm chunk gốc (duplicate_of). Khi chunk gốc bị xóa (nguồn gốc sửa/gỡ),
+  IngestionCatalog bỏ các chunk phụ thuộc khỏi nhật ký và đánh dấu nguồn của chúng cần nạp lại
+"""
+
+import hashlib
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+from langchain_core.documents import Document
+
+SIMHASH_BITS = 64
+BAND_BITS = 16
+BAND_COUNT = SIMHASH_BITS // BAND_BITS
+SHINGLE_SIZE = 3
+
+
+def normalize_text(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    """Hash nội dung đã chuẩn hóa (khác biệt khoảng trắng/hoa thường vẫn coi là trùng)"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def simhash(text: str) -> int:
+    """SimHash 64-bit của text, đặc trưng là các cụm SHINGLE_SIZE từ liên tiếp"""
+    words = normalize_text(text).split()
+    if len(words) > SHINGLE_SIZE:
+        shingles = [" ".join(words[i:i + SHINGLE_SIZE]) for i in range(len(words) - SHINGLE_SIZE + 1)]
+    else:
+        shingles = [" ".join(words)]
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "little")
+        for s in shingles
+    ]
+    threshold = len(hashes) / 2
+    fingerprint = 0
+    for bit in range(SIMHASH_BITS):
+        if sum((h >> bit) & 1 for h in hashes) > threshold:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def simhash_bands(fingerprint: int) -> List[int]:
+    mask = (1 << BAND_BITS) - 1
+    return [(fingerprint >> (i * BAND_BITS)) & mask for i in range(BAND_COUNT)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class ChunkDeduplicator:
+    """
+    Lọc chunk trùng/gần trùng trên toàn bộ collection (giữa pipeline chunking và embedding)
+
+    Example:
+        >>> dedup = ChunkDeduplicator(catalog, max_distance=3)
+        >>> kept, dropped = dedup.filter(chunks)          # chunks đã có chunk ID; dropped: [(chunk, id gốc)]
+        >>> dedup.record_batch(written_chunks, ids)        # sau khi ghi thành công
+        >>> dedup.get_statistics()["saved_embed_calls"]
+    """
+
+    def __init__(self,
+                 catalog,
+                 max_distance: int = 3,
+                 min_words: int = 8,
+                 vector_dim: int = 3072):
+        """
+        Args:
+            catalog: IngestionCatalog chứa chỉ mục chữ ký (chunk_signatures)
+            max_distance: Khoảng cách Hamming tối đa để coi là gần trùng (<= 3 với 4 dải LSH)
+            min_words: Chunk ít từ hơn ngưỡng này chỉ được kiểm tra trùng tuyệt đối
+            vector_dim: Số chiều vector embedding (để ước tính dung lượng chỉ mục tiết kiệm được)
+        """
+        if max_distance >= BAND_COUNT:
+            raise ValueError(f"max_distance phải nhỏ hơn {BAND_COUNT} (số dải LSH)")
+        self.catalog = catalog
+        self.max_distance = max_distance
+        self.min_words = min_words
+        self.vector_dim = vector_dim
+        self._lock = threading.Lock()
+        # Chữ ký của chunks đã nhận trong lần chạy này nhưng chưa ghi xong
+        self._pending: Dict[str, Tuple[str, int, str]] = {}
+        self.checked = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self.saved_chars = 0
+
+    def _find_duplicate(self, digest: str, fingerprint: Optional[int],
+                        ignore_ids: set) -> Optional[Tuple[str, str]]:
+        """
+        Tìm chunk đã ghi trùng/gần trùng trong chỉ mục chữ ký -> (loại trùng "exact"/"near", chunk ID gốc).
+        Chunk cùng lần chạy chưa ghi xong không được dùng làm bản gốc: lô của nó có thể ghi thất bại
+        """
+        bands = simhash_bands(fingerprint) if fingerprint is not None else None
+        for chunk_id, stored_hash, stored_fingerprint in self.catalog.find_signatures(digest, bands):
+            if chunk_id in ignore_ids:
+                continue
+            if stored_hash == digest:
+                return "exact", chunk_id
+            if bands is not None and hamming_distance(stored_fingerprint, fingerprint) <= self.max_distance:
+                return "near", chunk_id
+        return None
+
+    def filter(self, chunks: List[Document],
+               ignore_ids: Iterable[str] = ()) -> Tuple[List[Document], List[Tuple[Document, str]]]:
+        """
+        Tách chunks thành (giữ lại, bị loại vì trùng - kèm chunk ID gốc đang giữ nội dung)
+
+        Args:
+            chunks: Chunks đã được gán ID (doc.id)
+            ignore_ids: Chunk ID không được dùng làm bản gốc (vd: chunk sắp bị xóa của bản cũ)
+        """
+        ignore_ids = set(ignore_ids)
+        kept, dropped = [], []
+        with self._lock:
+            for chunk in chunks:
+                text = chunk.page_content
+                digest = content_hash(text)
+                fingerprint = simhash(text) if len(text.split()) >= self.min_words else None
+                self.checked += 1
+
+                duplicate = self._find_duplicate(digest, fingerprint, ignore_ids)
+                if duplicate is not None:
+                    kind, original_id = duplicate
+                    if kind == "exact":
+                        self.exact_duplicates += 1
+                    else:
+                        self.near_duplicates += 1
+                    self.saved_chars += len(text)
+                    dropped.append((chunk, original_id))
+                    continue
+
+                self._pending[chunk.id] = (digest, fingerprint, chunk.metadata.get("source", ""))
+                kept.append(chunk)
+        return kept, dropped
+
+    def record_batch(self, batch: List[Document], ids: List[str]) -> None:
+        """Lưu chữ ký của các chunks vừa ghi thành công vào chỉ mục bền vững"""
+        entries = []
+        with self._lock:
+            for chunk_id in ids:
+                signature = self._pending.get(chunk_id)
+                if signature is not None:
+                    digest, fingerprint, source = signature
+                    entries.append((chunk_id, source, digest, fingerprint))
+        if entries:
+            self.catalog.add_signatures(entries)
+
+    def get_statistics(self) -> Dict:
+        dropped = self.exact_duplicates + self.near_duplicates
+        saved_bytes = dropped * self.vector_dim * 4 + self.saved_chars
+        return {
+            "checked": self.checked,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "dropped": dropped,
+            "saved_embed_calls": dropped,
+            "saved_index_mb": round(saved_bytes / (1024 * 1024), 2)
+        }
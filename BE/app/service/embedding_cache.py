@@ -0,0 +1,270 @@
+"""
+🗄️ EMBEDDING_CACHE.PY
+Chuyên trách: Cache embedding bền vững trên đĩa (SQLite), đánh địa chỉ theo nội dung
+
+- Khóa = sha256(tên model + nội dung chunk) -> chunk không đổi thì không tốn lần gọi API nào
+- Giới hạn dung lượng: vượt ngưỡng thì xóa các bản ghi lâu không dùng nhất
+- Đếm số lần hit/miss để theo dõi hiệu quả
+- Vector câu hỏi: cache LRU trong bộ nhớ theo câu hỏi đã chuẩn hóa, câu hỏi chưa có được gom
+  thành lô (QueryEmbeddingBatcher) khi nhiều request tới cùng lúc
+"""
+
+import os
+import time
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional
+from langchain_core.embeddings import Embeddings
+from app.service.query_batcher import QueryEmbeddingBatcher
+
+
+def normalize_query(text: str) -> str:
+    """
+    Chuẩn hóa câu hỏi làm khóa cache: Unicode NFC, chữ thường, gộp khoảng trắng.
+    Chỉ dùng làm khóa: API vẫn nhận nguyên văn câu hỏi (chữ hoa của mã, tên riêng có ý nghĩa)
+    """
+    return " ".join(unicodedata.normalize("NFC", text).lower().split())
+
+
+class EmbeddingCache:
+    """
+    Kho lưu vector embedding trong SQLite
+
+    Example:
+        >>> cache = EmbeddingCache("./database/embedding_cache.sqlite3", max_size_mb=512)
+        >>> key = cache.make_key("Điều 1 ...", "models/gemini-embedding-001")
+        >>> cache.get_many([key])
+    """
+
+    def __init__(self, db_path: str, max_size_mb: float = 512):
+        """
+        Args:
+            db_path: Đường dẫn file SQLite
+            max_size_mb: Dung lượng vector tối đa (MB) trước khi dọn bớt
+        """
+        self.db_path = db_path
+        self.max_size_bytes = int(max_size_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key TEXT PRIMARY KEY,
+                vector BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings(last_access)")
+        self._conn.commit()
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+
+    @staticmethod
+    def make_key(text: str, model_name: str) -> str:
+        """Khóa cache: hash của tên model + nội dung chunk"""
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """Tra cứu nhiều khóa một lúc; trả về dict khóa -> vector (chỉ các khóa có trong cache)"""
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite giới hạn số tham số mỗi câu lệnh -> tra cứu theo từng phần
+            for i in range(0, len(unique_keys), 500):
+                part = unique_keys[i:i + 500]
+                placeholders = ",".join("?" * len(part))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", part
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                    [(now, key) for key in found]
+                )
+                self._conn.commit()
+
+        hit_count = sum(1 for key in keys if key in found)
+        self.hits += hit_count
+        self.misses += len(keys) - hit_count
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]) -> None:
+        """Lưu nhiều vector; tự dọn bớt nếu vượt dung lượng tối đa"""
+        if not items:
+            return
+        now = time.time()
+        rows = []
+        for key, vector in items.items():
+            blob = array("f", vector).tobytes()
+            rows.append((key, blob, len(blob), now))
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, size, last_access) VALUES (?, ?, ?, ?)",
+                rows
+            )
+            self._conn.commit()
+            self._total_size += sum(row[2] for row in rows)
+            if self._total_size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Xóa các vector lâu không dùng nhất cho đến khi còn dưới 90% dung lượng tối đa"""
+        # Tính lại tổng dung lượng (có thể tiến trình khác cũng đang ghi vào cache)
+        self._total_size = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        target = int(self.max_size_bytes * 0.9)
+        while self._total_size > target:
+            rows = self._conn.execute(
+                "SELECT key, size FROM embeddings ORDER BY last_access LIMIT 500"
+            ).fetchall()
+            if not rows:
+                break
+            to_delete = []
+            for key, size in rows:
+                if self._total_size <= target:
+                    break
+                to_delete.append((key,))
+                self._total_size -= size
+            self._conn.executemany("DELETE FROM embeddings WHERE key = ?", to_delete)
+            self.evictions += len(to_delete)
+        self._conn.commit()
+
+    def get_statistics(self) -> Dict:
+        """Thống kê cache: số hit/miss, tỷ lệ hit, dung lượng"""
+        lookups = self.hits + self.misses
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "size_mb": round(self._total_size / (1024 * 1024), 2),
+            "max_size_mb": round(self.max_size_bytes / (1024 * 1024), 2)
+        }
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Bọc một Embeddings bất kỳ (vd: GoogleGenerativeAIEmbeddings) với cache bền vững
+
+    - embed_documents: chỉ gọi API cho những chunk chưa có trong cache
+    - embed_query / aembed_query: vector câu hỏi (task_type khác với tài liệu) không lưu xuống đĩa,
+      chỉ giữ trong cache LRU của tiến trình; aembed_query gom các câu hỏi chưa có thành lô
+
+    Example:
+        >>> embeddings = CachedEmbeddings(GoogleGenerativeAIEmbeddings(...), cache, "models/gemini-embedding-001")
+        >>> Chroma(embedding_function=embeddings, ...)
+    """
+
+    def __init__(self,
+                 embeddings: Embeddings,
+                 cache: EmbeddingCache,
+                 model_name: str,
+                 query_cache_size: int = 2048,
+                 query_batch_window_ms: float = 5,
+                 query_max_batch_size: int = 32):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._query_lock = threading.Lock()
+        self.query_hits = 0
+        self.query_misses = 0
+        self.query_batcher = QueryEmbeddingBatcher(
+            embeddings, window_ms=query_batch_window_ms, max_batch_size=query_max_batch_size
+        )
+
+    def _lookup(self, texts: List[str]):
+        keys = [self.cache.make_key(text, self.model_name) for text in texts]
+        found = self.cache.get_many(keys)
+        # Các chunk trùng nhau trong cùng một lô chỉ cần embed một lần
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        return keys, found, missing
+
+    def _merge(self, keys: List[str], found: Dict, missing: Dict, vectors: Optional[List]) -> List[List[float]]:
+        if missing:
+            computed = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(computed)
+            found.update(computed)
+        return [found[key] for key in keys]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = self.embeddings.embed_documents(list(missing.values())) if missing else None
+        return self._merge(keys, found, missing, vectors)
+
+    def _get_query(self, key: str) -> Optional[List[float]]:
+        with self._query_lock:
+            vector = self._query_cache.get(key)
+            if vector is None:
+                self.query_misses += 1
+                return None
+            self._query_cache.move_to_end(key)
+            self.query_hits += 1
+            return vector
+
+    def _put_query(self, key: str, vector: List[float]) -> None:
+        with self._query_lock:
+            self._query_cache[key] = vector
+            self._query_cache.move_to_end(key)
+            while len(self._query_cache) > self.query_cache_size:
+                self._query_cache.popitem(last=False)
+
+    def embed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._get_query(key)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self._put_query(key, vector)
+        return vector
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys, found, missing = self._lookup(texts)
+        vectors = await self.embeddings.aembed_documents(list(missing.values())) if missing else None
+        return self._merge(keys, found, missing, vectors)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        key = normalize_query(text)
+        vector = self._get_query(key)
+        if vector is None:
+            vector = await self.query_batcher.embed(text)
+            self._put_query(key, vector)
+        return vector
+
+    def get_query_statistics(self) -> Dict:
+        """Thống kê vector câu hỏi: hit/miss của cache LRU, số lô và số câu đã gửi tới API"""
+        lookups = self.query_hits + self.query_misses
+        with self._query_lock:
+            entries = len(self._query_cache)
+        return {
+            "hits": self.query_hits,
+            "misses": self.query_misses,
+            "hit_rate": self.query_hits / lookups if lookups else 0.0,
+            "entries": entries,
+            "max_entries": self.query_cache_size,
+            "api_batches": self.query_batcher.batches,
+            "api_texts": self.query_batcher.texts
+        }
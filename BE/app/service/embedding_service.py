@@ -7,11 +7,189 @@ Tách bạch trách nhiệm:
 - embedding_service.py: Xử lý chunking & overlap ✅ (NEW)
 """
 
-from typing import List, Dict, Tuple
+import re
+import math
+import time
+from itertools import repeat
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from langchain_core.documents import Document
 
 
+class LegalStructureSplitter:
+    """
+    Splitter chuyên cho văn bản quy chế/pháp quy tiếng Việt (Chương → Điều → Khoản)
+
+    - Tìm toàn bộ ranh giới Chương/Điều/Khoản bằng MỘT lần quét regex
+    - Gom các đoạn liền nhau của cùng một Điều thành chunk tối đa chunk_size ký tự;
+      mỗi Điều bắt đầu một chunk mới (metadata "article" luôn đúng với toàn bộ chunk)
+    - Đoạn dài hơn chunk_size được cắt theo dòng, rồi theo khoảng trắng
+    - Overlap chỉ áp dụng khi chunk mới vẫn thuộc cùng Điều (không kéo nội dung Điều trước sang)
+    - Gắn số Điều/Chương vào metadata của từng chunk; Chương/Điều đang mở được mang sang
+      các trang tiếp theo của cùng nguồn (Điều dài nhiều trang)
+
+    Example:
+        >>> splitter = LegalStructureSplitter(chunk_size=1000, chunk_overlap=180)
+        >>> chunks = splitter.split_text_with_metadata("ĐIỀU 1: ... Khoản 1.1: ...")
+        >>> chunks[0]
+        ('ĐIỀU 1: ...', {'article': 'Điều 1'})
+    """
+
+    # Ranh giới cấu trúc ở đầu dòng: Phần/Chương, Điều, Khoản (Khoản 1.1 / 1. / 2.1. / a))
+    BOUNDARY_PATTERN = re.compile(
+        r"^[ \t]*(?:"
+        r"(?P<chapter>(?:phần|chương)[ \t]+[IVXLCDM\d]+)"
+        r"|(?P<article>điều[ \t]+(?P<article_no>\d+[a-z]?))"
+        r"|(?P<clause>khoản[ \t]+\d+(?:\.\d+)*|\d+(?:\.\d+)*\.[ \t]|[a-zđ]\)[ \t])"
+        r")",
+        re.IGNORECASE | re.MULTILINE
+    )
+
+    # Đoạn Chương/Điều ngắn hơn ngưỡng này được coi là tiêu đề
+    HEADING_MAX_CHARS = 150
+
+    def __init__(self, chunk_size: int = 1000, chunk_overlap: int = 180):
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+
+    def _segments(self, text: str, context: Dict) -> List[Tuple[str, Dict, bool]]:
+        """
+        Cắt text tại các ranh giới cấu trúc -> [(đoạn, metadata, bắt đầu Điều mới?)]
+        context: Chương/Điều đang mở từ trang trước, được cập nhật theo trang này
+        """
+        segments = []
+        chapter = context.get("chapter")
+        article = context.get("article")
+        last_start = 0
+        last_is_article = False
+        for match in self.BOUNDARY_PATTERN.finditer(text):
+            start = match.start()
+            if start > last_start:
+                segments.append((text[last_start:start], self._metadata(chapter, article), last_is_article))
+            if match.group("chapter"):
+                # Chỉ chuẩn hóa từ khóa, giữ nguyên số La Mã: "CHƯƠNG IV" -> "Chương IV"
+                keyword, numeral = match.group("chapter").split()
+                chapter = f"{keyword.capitalize()} {numeral.upper()}"
+                article = None
+            elif match.group("article"):
+                article = f"Điều {match.group('article_no')}"
+            last_start = start
+            last_is_article = bool(match.group("article") or match.group("chapter"))
+        if last_start < len(text):
+            segments.append((text[last_start:], self._metadata(chapter, article), last_is_article))
+        context["chapter"] = chapter
+        context["article"] = article
+
+        # Tiêu đề Chương/Điều ngắn được gộp với đoạn ngay sau để không bị tách rời nội dung,
+        # nhưng không gộp sang Điều khác (Điều ngắn liền nhau vẫn là các đoạn riêng)
+        merged = []
+        for segment in segments:
+            if (merged and merged[-1][2] and len(merged[-1][0].strip()) < self.HEADING_MAX_CHARS
+                    and merged[-1][1].get("article") in (None, segment[1].get("article"))):
+                heading = merged.pop()
+                segment = (heading[0] + segment[0], segment[1], True)
+            merged.append(segment)
+        return merged
+
+    @staticmethod
+    def _metadata(chapter: Optional[str], article: Optional[str]) -> Dict:
+        metadata = {}
+        if chapter:
+            metadata["chapter"] = chapter
+        if article:
+            metadata["article"] = article
+        return metadata
+
+    def _units(self, segment: str) -> List[str]:
+        """Chia đoạn dài thành các phần không vượt quá chunk_size (theo dòng, rồi theo khoảng trắng)"""
+        if len(segment) <= self.chunk_size:
+            return [segment]
+        units = []
+        for line in segment.splitlines(keepends=True):
+            while len(line) > self.chunk_size:
+                cut = line.rfind(" ", 0, self.chunk_size)
+                if cut <= 0:
+                    cut = self.chunk_size
+                units.append(line[:cut])
+                line = line[cut:]
+            if line:
+                units.append(line)
+        return units
+
+    def _overlap_tail(self, text: str) -> str:
+        """Lấy phần đuôi (tối đa chunk_overlap ký tự) bắt đầu tại ranh giới từ"""
+        if self.chunk_overlap <= 0 or len(text) <= self.chunk_overlap:
+            return "" if self.chunk_overlap <= 0 else text
+        tail = text[-self.chunk_overlap:]
+        space = tail.find(" ")
+        return tail[space + 1:] if space != -1 else tail
+
+    def split_text_with_metadata(self, text: str, context: Optional[Dict] = None) -> List[Tuple[str, Dict]]:
+        """
+        Cắt text thành [(chunk, metadata Điều/Chương)]
+
+        Args:
+            text: Nội dung cần cắt (vd: một trang PDF)
+            context: Dict dùng chung giữa các trang liên tiếp của một nguồn để mang Chương/Điều sang trang sau
+        """
+        context = {} if context is None else context
+        chunks: List[Tuple[str, Dict]] = []
+        parts: List[str] = []
+        length = 0
+        metadata: Dict = {}
+
+        def flush():
+            chunk = "".join(parts).strip()
+            if chunk:
+                chunks.append((chunk, metadata))
+
+        for segment, segment_metadata, starts_article in self._segments(text, context):
+            for index, unit in enumerate(self._units(segment)):
+                new_article = starts_article and index == 0
+                # Sang chunk mới khi vượt chunk_size, hoặc khi Điều/Chương mới bắt đầu. Phần ngắn không
+                # thuộc Điều nào (số trang, tiêu đề mục lục) được gộp vào chunk của Điều ngay sau
+                if parts and (length + len(unit) > self.chunk_size
+                              or (new_article and ("article" in metadata or length >= self.chunk_size // 2))):
+                    previous = "".join(parts)
+                    flush()
+                    # Chỉ giữ overlap khi vẫn ở trong cùng Điều
+                    tail = "" if new_article else self._overlap_tail(previous)
+                    if len(tail) + len(unit) > self.chunk_size:
+                        tail = ""
+                    parts = [tail] if tail else []
+                    length = len(tail)
+                    metadata = segment_metadata
+                if not parts or (new_article and "article" not in metadata):
+                    metadata = segment_metadata
+                parts.append(unit)
+                length += len(unit)
+        flush()
+        return chunks
+
+    def split_text(self, text: str) -> List[str]:
+        return [chunk for chunk, _ in self.split_text_with_metadata(text)]
+
+    def split_documents(self, documents: List[Document]) -> List[Document]:
+        splits = []
+        contexts: Dict[str, Dict] = {}
+        for doc in documents:
+            # Các trang của cùng một nguồn dùng chung Chương/Điều đang mở
+            context = contexts.setdefault(doc.metadata.get("source", ""), {})
+            for chunk, metadata in self.split_text_with_metadata(doc.page_content, context):
+                splits.append(Document(page_content=chunk, metadata={**doc.metadata, **metadata}))
+        return splits
+
+
+def split_document_batch(splitter, documents: List[Document]) -> Tuple[List[Document], int]:
+    """
+    Cắt một lô tài liệu và đếm tổng ký tự của các chunk trong cùng một lượt.
+    Hàm cấp module để có thể chạy trong tiến trình con (ProcessPoolExecutor).
+    """
+    splits = splitter.split_documents(documents)
+    return splits, sum(len(doc.page_content) for doc in splits)
+
+
 class ChunkingService:
     """
     Service chuyên trách cắt nhỏ văn bản (Chunking) với Overlap tối ưu
@@ -26,13 +204,19 @@ class ChunkingService:
     DEFAULT_CONFIG = {
         "CHUNK_SIZE": 1000,
         "CHUNK_OVERLAP_PERCENT": 0.18,  # 18% = 180 ký tự
-        "SEPARATORS": ["\n\n", "\n", ". ", " ", ""]
+        "SEPARATORS": ["\n\n", "\n", ". ", " ", ""],
+        "SPLITTER": "recursive"  # "recursive" | "legal"
     }
     
+    # Ít tài liệu hơn ngưỡng này thì cắt tuần tự (chi phí gửi dữ liệu sang tiến trình con không đáng)
+    PARALLEL_MIN_DOCUMENTS = 16
+    
     def __init__(self, 
                  chunk_size: int = None,
                  chunk_overlap_percent: float = None,
-                 separators: List[str] = None):
+                 separators: List[str] = None,
+                 splitter_type: str = None,
+                 max_workers: int = None):
         """
         Khởi tạo ChunkingService
         
@@ -40,10 +224,16 @@ class ChunkingService:
             chunk_size: Độ dài mỗi chunk (ký tự). Mặc định: 1000
             chunk_overlap_percent: Tỷ lệ overlap (0-1). Mặc định: 0.18 (18%)
             separators: Danh sách dấu ngắt ưu tiên. Mặc định: ["\n\n", "\n", ". ", " ", ""]
+            splitter_type: "recursive" (RecursiveCharacterTextSplitter) hoặc
+                           "legal" (LegalStructureSplitter - cắt theo Chương/Điều/Khoản). Mặc định: "recursive"
+            max_workers: Số tiến trình cắt song song trong split_documents. Mặc định: 1 (tuần tự)
         """
         self.chunk_size = chunk_size or self.DEFAULT_CONFIG["CHUNK_SIZE"]
         self.chunk_overlap_percent = chunk_overlap_percent or self.DEFAULT_CONFIG["CHUNK_OVERLAP_PERCENT"]
         self.separators = separators or self.DEFAULT_CONFIG["SEPARATORS"]
+        self.splitter_type = splitter_type or self.DEFAULT_CONFIG["SPLITTER"]
+        self.max_workers = max_workers or 1
+        self._executor = None
         
         # Tính chunk_overlap từ chunk_size và phần trăm
         self.chunk_overlap = int(self.chunk_size * self.chunk_overlap_percent)
@@ -54,9 +244,14 @@ class ChunkingService:
         # Thống kê
         self.last_chunk_count = 0
         self.last_total_chars = 0
+        self.last_timing = {}
     
-    def _create_splitter(self) -> RecursiveCharacterTextSplitter:
-        """Tạo RecursiveCharacterTextSplitter với cấu hình hiện tại"""
+    def _create_splitter(self):
+        """Tạo splitter (RecursiveCharacterTextSplitter hoặc LegalStructureSplitter) với cấu hình hiện tại"""
+        if self.splitter_type == "legal":
+            return LegalStructureSplitter(chunk_size=self.chunk_size, chunk_overlap=self.chunk_overlap)
+        if self.splitter_type != "recursive":
+            raise ValueError(f"splitter_type không hợp lệ: {self.splitter_type}")
         return RecursiveCharacterTextSplitter(
             chunk_size=self.chunk_size,
             chunk_overlap=self.chunk_overlap,
@@ -73,18 +268,69 @@ class ChunkingService:
         Returns:
             Danh sách Document sau khi cắt nhỏ, giữ nguyên metadata
             
+        Khi max_workers > 1 và đủ nhiều tài liệu: chia danh sách thành các lô liên tiếp,
+        cắt song song trên nhiều tiến trình rồi ghép lại theo đúng thứ tự ban đầu
+        (kết quả giống hệt chế độ tuần tự). Số ký tự được đếm ngay trong tiến trình con.
+            
         Example:
             >>> from langchain_community.document_loaders import PyPDFLoader
             >>> loader = PyPDFLoader("file.pdf")
             >>> docs = loader.load()
-            >>> chunker = ChunkingService()
+            >>> chunker = ChunkingService(max_workers=4)
             >>> chunks = chunker.split_documents(docs)
         """
-        splits = self.splitter.split_documents(documents)
+        start = time.perf_counter()
+        parallel = self.max_workers > 1 and len(documents) >= self.PARALLEL_MIN_DOCUMENTS
+        if parallel:
+            batch_size = math.ceil(len(documents) / (self.max_workers * 4))
+            # LegalStructureSplitter mang Chương/Điều qua các trang: không tách một nguồn ra nhiều lô
+            batches = self._batches(documents, batch_size,
+                                    keep_sources=isinstance(self.splitter, LegalStructureSplitter))
+            results = list(self._get_executor().map(split_document_batch, repeat(self.splitter), batches))
+        else:
+            results = [split_document_batch(self.splitter, documents)]
+        split_done = time.perf_counter()
+        
+        splits = [doc for batch_splits, _ in results for doc in batch_splits]
         self.last_chunk_count = len(splits)
-        self.last_total_chars = sum(len(doc.page_content) for doc in splits)
+        self.last_total_chars = sum(chars for _, chars in results)
+        end = time.perf_counter()
+        
+        self.last_timing = {
+            "mode": "parallel" if parallel else "sequential",
+            "workers": self.max_workers if parallel else 1,
+            "batches": len(results),
+            "split_seconds": round(split_done - start, 4),
+            "merge_seconds": round(end - split_done, 4),
+            "total_seconds": round(end - start, 4)
+        }
         return splits
     
+    @staticmethod
+    def _batches(documents: List[Document], batch_size: int, keep_sources: bool) -> List[List[Document]]:
+        """Chia tài liệu thành các lô liên tiếp; keep_sources=True -> chỉ cắt lô ở chỗ đổi nguồn"""
+        batches: List[List[Document]] = []
+        for doc in documents:
+            same_source = (keep_sources and batches
+                           and batches[-1][-1].metadata.get("source") == doc.metadata.get("source"))
+            if batches and (len(batches[-1]) < batch_size or same_source):
+                batches[-1].append(doc)
+            else:
+                batches.append([doc])
+        return batches
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Pool tiến trình được tạo một lần và dùng lại cho các lần cắt sau"""
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+    
+    def close(self) -> None:
+        """Giải phóng pool tiến trình (nếu có)"""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
     def split_text(self, text: str) -> List[str]:
         """
         Cắt nhỏ text thô (string)
@@ -99,15 +345,27 @@ class ChunkingService:
             >>> chunker = ChunkingService()
             >>> chunks = chunker.split_text("Nội dung văn bản...")
         """
+        start = time.perf_counter()
         splits = self.splitter.split_text(text)
         self.last_chunk_count = len(splits)
         self.last_total_chars = sum(len(s) for s in splits)
+        elapsed = round(time.perf_counter() - start, 4)
+        self.last_timing = {
+            "mode": "sequential",
+            "workers": 1,
+            "batches": 1,
+            "split_seconds": elapsed,
+            "merge_seconds": 0.0,
+            "total_seconds": elapsed
+        }
         return splits
     
     def configure(self,
                   chunk_size: int = None,
                   chunk_overlap_percent: float = None,
-                  separators: List[str] = None) -> None:
+                  separators: List[str] = None,
+                  splitter_type: str = None,
+                  max_workers: int = None) -> None:
         """
         Cấu hình lại ChunkingService
         
@@ -115,6 +373,8 @@ class ChunkingService:
             chunk_size: Độ dài mỗi chunk (ký tự)
             chunk_overlap_percent: Tỷ lệ overlap (0-1)
             separators: Danh sách dấu ngắt ưu tiên
+            splitter_type: "recursive" hoặc "legal"
+            max_workers: Số tiến trình cắt song song
             
         Example:
             >>> chunker = ChunkingService()
@@ -129,6 +389,13 @@ class ChunkingService:
         if separators is not None:
             self.separators = separators
         
+        if splitter_type is not None:
+            self.splitter_type = splitter_type
+        
+        if max_workers is not None and max_workers != self.max_workers:
+            self.close()
+            self.max_workers = max_workers
+        
         # Tính lại chunk_overlap
         self.chunk_overlap = int(self.chunk_size * self.chunk_overlap_percent)
         
@@ -148,6 +415,7 @@ class ChunkingService:
             - total_chars: Tổng ký tự
             - avg_chunk_size: Kích thước chunk trung bình
             - separators: Danh sách separators
+            - timing: Thời gian từng công đoạn (cắt, ghép kết quả) và chế độ chạy
             
         Example:
             >>> chunker = ChunkingService()
@@ -165,12 +433,18 @@ class ChunkingService:
             "total_chars": self.last_total_chars,
             "avg_chunk_size": avg_size,
             "separators": self.separators,
+            "splitter_type": self.splitter_type,
+            "max_workers": self.max_workers,
+            "timing": self.last_timing,
             "config_status": "✅ Tối ưu cho tiếng Việt"
         }
     
     def print_statistics(self) -> None:
         """In ra thống kê đẹp hơn"""
         stats = self.get_statistics()
+        timing = stats['timing']
+        timing_info = (f"{timing.get('total_seconds', 0):.3f}s ({timing.get('mode', '-')}, "
+                       f"{timing.get('workers', 1)} tiến trình)")
         
         print("=" * 80)
         print("📊 THỐNG KÊ CHUNKING")
@@ -183,6 +457,7 @@ class ChunkingService:
 │ Tổng ký tự              │ {stats['total_chars']:>6} ký tự                          │
 │ Trung bình/chunk        │ {stats['avg_chunk_size']:>4} ký tự                            │
 │ Separators              │ {str(stats['separators'])[:40]}       │
+│ Thời gian cắt           │ {timing_info:<40}│
 │ Trạng thái              │ {stats['config_status']}                      │
 └─────────────────────────┴─────────────────────────────────────────┘
         """)
@@ -194,6 +469,7 @@ Cấu hình ChunkingService:
 - chunk_size: {self.chunk_size} ký tự
 - chunk_overlap: {self.chunk_overlap} ký tự ({self.chunk_overlap_percent*100:.0f}%)
 - separators: {self.separators}
+- splitter_type: {self.splitter_type}
 
 Mục đích:
 - Cắt nhỏ văn bản thành các đoạn có độ dài hợp lý
@@ -241,6 +517,15 @@ class ChunkingPresets:
             chunk_overlap_percent=0.15,
             separators=["\n\n", "\n", ". ", " ", ""]
         )
+    
+    @staticmethod
+    def legal_structure() -> ChunkingService:
+        """Cấu hình cắt theo cấu trúc Chương/Điều/Khoản (quy chế, quy định, văn bản pháp quy)"""
+        return ChunkingService(
+            chunk_size=1000,
+            chunk_overlap_percent=0.18,
+            splitter_type="legal"
+        )
 
 
 if __name__ == "__main__":
@@ -289,6 +574,15 @@ Bảo mật dữ liệu là ưu tiên hàng đầu. Mã hóa là bắt buộc.""
     print(f"✅ Cắt thành {len(chunks_reconfigure)} chunks (sau cấu hình lại)")
     chunker.print_statistics()
     
+    # Test 4: Cắt theo cấu trúc Chương/Điều/Khoản
+    print("\n4️⃣  TEST: Sử dụng Preset - Legal Structure")
+    print("-" * 80)
+    chunker_legal = ChunkingPresets.legal_structure()
+    chunks_legal = chunker_legal.split_documents([Document(page_content=test_text, metadata={"source": "test"})])
+    print(f"✅ Cắt thành {len(chunks_legal)} chunks")
+    for chunk in chunks_legal:
+        print(f"   - {chunk.metadata}: {chunk.page_content[:50]!r}")
+    
     print("\n" + "=" * 80)
     print("✅ TEST HOÀN TẤT!")
     print("=" * 80)
@@ -0,0 +1,254 @@
+"""
+🚀 EMBEDDING_WRITER.PY
+Chuyên trách: Nạp chunks vào Vector Database theo lô (batch) với tốc độ thích ứng
+
+- Gom chunks thành lô lớn và gọi embed_documents một lần cho cả lô
+- Điều tốc bằng Token Bucket: lùi lại khi gặp 429/RESOURCE_EXHAUSTED,
+  tăng tốc dần khi các lần gọi liên tiếp thành công
+- Báo cáo tốc độ nạp (chunks/giây)
+- Lô đã ghi vào Vector Store được thêm luôn vào chỉ mục từ khóa (LexicalIndex) nếu có
+"""
+
+import time
+import uuid
+import threading
+from typing import Callable, Dict, Iterable, List, Optional
+from langchain_core.documents import Document
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """Kiểm tra lỗi có phải do vượt giới hạn API (429/RESOURCE_EXHAUSTED) hay không"""
+    error_msg = str(error)
+    return "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg
+
+
+def sanitize_metadata(metadata: Dict) -> Dict:
+    """Chroma chỉ nhận giá trị str/int/float/bool -> loại bỏ None và kiểu phức tạp"""
+    return {
+        key: value for key, value in metadata.items()
+        if isinstance(value, (str, int, float, bool))
+    }
+
+
+class TokenBucket:
+    """
+    Token Bucket điều tốc số lần gọi API (AIMD)
+
+    - acquire(): chờ đến khi có token (mỗi lần gọi API tiêu tốn 1 token)
+    - penalize(): gặp 429 -> giảm một nửa tốc độ và xả hết token
+    - reward(): gọi thành công -> tăng tốc độ thêm một bước nhỏ
+    """
+
+    def __init__(self,
+                 rate_per_minute: float,
+                 min_rate_per_minute: float = 1.0,
+                 max_rate_per_minute: float = None,
+                 capacity: float = None):
+        self.rate = rate_per_minute / 60.0
+        self.min_rate = min_rate_per_minute / 60.0
+        self.max_rate = (max_rate_per_minute or rate_per_minute * 4) / 60.0
+        self.capacity = capacity or max(1.0, self.rate * 5)
+        self.tokens = 1.0
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    def acquire(self) -> None:
+        """Chờ cho đến khi lấy được 1 token"""
+        while True:
+            with self._lock:
+                self._refill()
+                if self.tokens >= 1.0:
+                    self.tokens -= 1.0
+                    return
+                wait_seconds = (1.0 - self.tokens) / self.rate
+            time.sleep(wait_seconds)
+
+    def penalize(self) -> None:
+        """Giảm một nửa tốc độ (multiplicative decrease)"""
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            self.tokens = 0.0
+
+    def reward(self) -> None:
+        """Tăng tốc độ thêm ~10% sau mỗi lần gọi thành công (additive increase)"""
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + max(self.min_rate, self.rate * 0.1))
+
+    @property
+    def rate_per_minute(self) -> float:
+        return self.rate * 60.0
+
+
+class EmbeddingWriter:
+    """
+    Ghi chunks vào Vector Store theo lô, dùng chung cho nạp PDF và đồng bộ Website
+
+    Example:
+        >>> writer = EmbeddingWriter(rag_service.embeddings, rag_service.vector_store)
+        >>> stats = writer.write_documents(splits, total=len(splits))
+        >>> print(stats["chunks_per_sec"])
+    """
+
+    def __init__(self,
+                 embeddings,
+                 vector_store,
+                 batch_size: int = 100,
+                 min_batch_size: int = 5,
+                 requests_per_minute: float = 60,
+                 max_retries: int = 5,
+                 backoff_seconds: float = 5.0,
+                 max_backoff_seconds: float = 120.0,
+                 on_batch_written: Optional[Callable[[List[Document], List[str]], None]] = None,
+                 lexical_index=None):
+        """
+        Args:
+            embeddings: Đối tượng Embeddings (có embed_documents)
+            vector_store: Chroma vector store (ghi trực tiếp qua _collection.upsert)
+            batch_size: Số chunks tối đa mỗi lần gọi embed_documents
+            min_batch_size: Kích thước lô nhỏ nhất khi bị giới hạn API
+            requests_per_minute: Tốc độ gọi API khởi điểm
+            max_retries: Số lần thử lại tối đa cho mỗi lô
+            backoff_seconds: Thời gian chờ khởi điểm khi gặp 429 (tăng gấp đôi mỗi lần)
+            max_backoff_seconds: Thời gian chờ tối đa giữa hai lần thử
+            on_batch_written: Callback gọi sau khi một lô đã được ghi thành công
+            lexical_index: LexicalIndex (tùy chọn) cập nhật cùng Vector Store cho tìm kiếm BM25
+        """
+        self.embeddings = embeddings
+        self.vector_store = vector_store
+        self.max_batch_size = batch_size
+        self.min_batch_size = min(min_batch_size, batch_size)
+        self.batch_size = batch_size
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.on_batch_written = on_batch_written
+        self.lexical_index = lexical_index
+        self.bucket = TokenBucket(requests_per_minute)
+        self._success_streak = 0
+
+    def _on_success(self) -> None:
+        self.bucket.reward()
+        self._success_streak += 1
+        # Sau vài lô thành công liên tiếp thì nới rộng kích thước lô trở lại
+        if self._success_streak >= 3 and self.batch_size < self.max_batch_size:
+            self.batch_size = min(self.max_batch_size, self.batch_size * 2)
+            self._success_streak = 0
+
+    def _on_rate_limited(self) -> None:
+        self.bucket.penalize()
+        self._success_streak = 0
+        self.batch_size = max(self.min_batch_size, self.batch_size // 2)
+
+    def _upsert(self, batch: List[Document]) -> List[str]:
+        """Embed một lô và ghi thẳng vào collection (một lần gọi API cho cả lô)"""
+        texts = [doc.page_content for doc in batch]
+        ids = [doc.id or str(uuid.uuid4()) for doc in batch]
+        vectors = self.embeddings.embed_documents(texts)
+        self.vector_store._collection.upsert(
+            ids=ids,
+            embeddings=vectors,
+            documents=texts,
+            metadatas=[sanitize_metadata(doc.metadata) for doc in batch]
+        )
+        return ids
+
+    def _write_batch(self, batch: List[Document], on_batch_written=None) -> int:
+        """Ghi một lô với cơ chế thử lại; trả về số chunks đã ghi thành công"""
+        attempt = 0
+        backoff = self.backoff_seconds
+        while True:
+            self.bucket.acquire()
+            try:
+                ids = self._upsert(batch)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    print(f"🚫 Bỏ qua lô {len(batch)} đoạn sau {self.max_retries} lần thử thất bại: {e}")
+                    return 0
+
+                if is_rate_limit_error(e):
+                    self._on_rate_limited()
+                    # Lô quá lớn so với hạn mức -> tách đôi và nạp từng nửa
+                    if len(batch) > self.batch_size:
+                        print(f"⚠️ Giới hạn API (429). Tách lô còn {self.batch_size} đoạn, "
+                              f"tốc độ {self.bucket.rate_per_minute:.1f} lần gọi/phút")
+                        sub_size = self.batch_size
+                        return sum(
+                            self._write_batch(batch[i:i + sub_size], on_batch_written)
+                            for i in range(0, len(batch), sub_size)
+                        )
+                    print(f"⚠️ Giới hạn API (429/RESOURCE_EXHAUSTED). Chờ {backoff:.0f}s "
+                          f"(Lần thử {attempt}/{self.max_retries})...")
+                else:
+                    print(f"⚠️ Lỗi nạp dữ liệu: {e}. Chờ {backoff:.0f}s (Lần thử {attempt}/{self.max_retries})...")
+
+                time.sleep(backoff)
+                backoff = min(self.max_backoff_seconds, backoff * 2)
+                continue
+
+            self._on_success()
+            # Nhật ký trước: lô đã nằm trong Chroma thì phải được ghi nhận dù chỉ mục phụ có lỗi
+            for callback in (self.on_batch_written, on_batch_written):
+                if callback:
+                    callback(batch, ids)
+            if self.lexical_index is not None:
+                try:
+                    self.lexical_index.add(batch, ids)
+                except Exception as e:
+                    self.lexical_index.mark_stale(e)
+            return len(batch)
+
+    def write_documents(self,
+                        documents: Iterable[Document],
+                        total: int = None,
+                        on_batch_written: Optional[Callable[[List[Document], List[str]], None]] = None) -> Dict:
+        """
+        Nạp chunks vào Vector Store theo lô
+
+        Args:
+            documents: Danh sách (hoặc generator) các chunk Document
+            total: Tổng số chunks (nếu biết trước) để hiển thị tiến độ
+            on_batch_written: Callback riêng cho lần nạp này (bổ sung cho callback của writer)
+
+        Returns:
+            Dict thống kê: written, failed, batches, elapsed_seconds, chunks_per_sec
+        """
+        written = 0
+        failed = 0
+        batches = 0
+        start_time = time.time()
+        batch: List[Document] = []
+
+        def flush():
+            nonlocal written, failed, batches
+            count = self._write_batch(batch, on_batch_written)
+            written += count
+            failed += len(batch) - count
+            batches += 1
+            elapsed = max(time.time() - start_time, 1e-6)
+            progress = f"{written}/{total}" if total else f"{written}"
+            print(f"   ➤ Đã nạp thành công: {progress} đoạn "
+                  f"({written / elapsed:.1f} đoạn/giây, lô {self.batch_size}, "
+                  f"{self.bucket.rate_per_minute:.0f} lần gọi/phút)")
+
+        for doc in documents:
+            batch.append(doc)
+            if len(batch) >= self.batch_size:
+                flush()
+                batch = []
+        if batch:
+            flush()
+
+        elapsed = time.time() - start_time
+        return {
+            "written": written,
+            "failed": failed,
+            "batches": batches,
+            "elapsed_seconds": elapsed,
+            "chunks_per_sec": written / elapsed if elapsed > 0 else 0.0
+        }
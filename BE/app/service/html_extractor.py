@@ -0,0 +1,205 @@
+"""
+🧽 HTML_EXTRACTOR.PY
+Chuyên trách: Trích xuất nội dung chính từ trang HTML trước khi chunking/embedding
+
+- Engine "lxml": parser C (libxml2), nhanh hơn nhiều so với BeautifulSoup + html.parser
+- Engine "bs4": cách làm cũ (BeautifulSoup html.parser, chỉ bỏ thẻ header/footer/nav/...), giữ để so sánh
+- Loại thẻ rác (script, style, nav...), form nhỏ (tìm kiếm, đăng nhập) và khối giao diện dựng bằng
+  div thường (class/id chứa menu, sidebar, breadcrumb, share, comment...). Không xóa form lớn:
+  trang ASP.NET WebForms bọc toàn bộ nội dung trong <form id="form1">
+- Tìm vùng nội dung chính: ưu tiên vùng chứa bài viết quen thuộc của CMS (article, .news-detail,
+  .entry-content, [itemprop=articleBody]...), nếu không có thì chọn khối có mật độ văn bản cao nhất
+  (chấm điểm đoạn văn, trừ theo tỷ lệ chữ nằm trong link)
+- Nếu vùng tìm được quá ngắn thì quay về toàn bộ body đã lọc (không làm mất nội dung)
+- lxml không lấy được chữ nào (HTML lạ, lọc nhầm) -> dùng lại cách bs4, không bỏ trống trang
+"""
+
+import re
+from typing import Dict, List, Optional
+
+from bs4 import BeautifulSoup
+from lxml import etree, html as lxml_html
+
+ENGINES = ["lxml", "bs4"]
+
+# Thẻ không bao giờ chứa nội dung chính
+JUNK_TAGS = [
+    "script", "style", "noscript", "template", "svg", "canvas", "iframe",
+    "header", "footer", "nav", "aside", "button", "select",
+]
+
+# Form có ít chữ hơn ngưỡng này là form chức năng (tìm kiếm, đăng nhập, đăng ký nhận tin) -> xóa
+SMALL_FORM_CHARS = 200
+
+# Khối giao diện dựng bằng div/ul thường: nhận diện qua class/id
+BOILERPLATE_PATTERN = re.compile(
+    r"(^|[\s_-])(menu|navbar|nav|sidebar|side-bar|breadcrumbs?|footer|topbar|banner|"
+    r"social|share|sharing|comments?|widget|related|tags?|cookie|popup|modal|advert|ads|"
+    r"pagination|pager|hotline|copyright)($|[\s_-])",
+    re.IGNORECASE
+)
+
+# Vùng nội dung bài viết của các CMS thường gặp (thứ tự = độ ưu tiên)
+CONTENT_XPATHS = [
+    "//*[@itemprop='articleBody']",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' news-detail ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' detail-news ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' content-detail ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' article-content ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' entry-content ')]",
+    "//*[contains(concat(' ', normalize-space(@class), ' '), ' post-content ')]",
+    "//article",
+    "//main",
+    "//*[@id='main-content' or @id='content' or @role='main']",
+]
+
+# Thẻ được coi là "đoạn văn" khi chấm điểm mật độ văn bản
+PARAGRAPH_TAGS = ["p", "pre", "blockquote", "td", "li", "h1", "h2", "h3", "h4"]
+
+
+def _text_lines(node) -> List[str]:
+    """Tương đương soup.get_text(separator="\\n", strip=True): từng đoạn text đã strip, bỏ đoạn rỗng"""
+    return [text.strip() for text in node.itertext() if text.strip()]
+
+
+def _text_length(node) -> int:
+    return sum(len(text.strip()) for text in node.itertext())
+
+
+def _link_density(node) -> float:
+    total = _text_length(node)
+    if total == 0:
+        return 1.0
+    links = sum(_text_length(link) for link in node.iter("a"))
+    return links / total
+
+
+class HtmlExtractor:
+    """
+    Bộ trích xuất nội dung HTML, dùng làm extractor của AsyncWebCrawler
+
+    Example:
+        >>> extractor = HtmlExtractor(engine="lxml", main_content=True)
+        >>> text = extractor("<html>...</html>")
+        >>> crawler = AsyncWebCrawler(url, extractor=extractor)
+    """
+
+    def __init__(self,
+                 engine: str = "lxml",
+                 main_content: bool = True,
+                 min_content_chars: int = 200,
+                 content_xpaths: List[str] = None):
+        """
+        Args:
+            engine: "lxml" (nhanh, có lọc khối giao diện) hoặc "bs4" (cách cũ)
+            main_content: Chỉ giữ vùng nội dung chính (chỉ áp dụng cho engine lxml)
+            min_content_chars: Vùng nội dung chính ngắn hơn ngưỡng này thì dùng toàn bộ body
+            content_xpaths: XPath vùng bài viết ưu tiên. Mặc định: CONTENT_XPATHS
+        """
+        if engine not in ENGINES:
+            raise ValueError(f"Engine không hợp lệ: {engine}. Chọn một trong: {', '.join(ENGINES)}")
+        self.engine = engine
+        self.main_content = main_content
+        self.min_content_chars = min_content_chars
+        self.content_xpaths = content_xpaths or CONTENT_XPATHS
+        self.stats = {"pages": 0, "selector": 0, "density": 0, "fallback": 0, "bs4_fallback": 0}
+
+    def __call__(self, page_content: str) -> str:
+        return self.extract(page_content)
+
+    def extract(self, page_content: str) -> str:
+        self.stats["pages"] += 1
+        if self.engine == "bs4":
+            return self._extract_bs4(page_content)
+        text = self._extract_lxml(page_content)
+        if not text and page_content and page_content.strip():
+            self.stats["bs4_fallback"] += 1
+            text = self._extract_bs4(page_content)
+        return text
+
+    def _extract_bs4(self, page_content: str) -> str:
+        soup = BeautifulSoup(page_content, "html.parser")
+        for tag in soup(["header", "footer", "nav", "script", "style", "aside"]):
+            tag.decompose()
+        return soup.get_text(separator="\n", strip=True)
+
+    def _parse(self, page_content: str):
+        if not page_content or not page_content.strip():
+            return None
+        # Parse từ bytes: chuỗi unicode có khai báo <?xml encoding?> bị lxml từ chối
+        parser = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True)
+        try:
+            return lxml_html.fromstring(page_content.encode("utf-8", errors="ignore"), parser=parser)
+        except (etree.ParserError, ValueError):
+            return None
+
+    def _remove_boilerplate(self, root) -> None:
+        etree.strip_elements(root, *JUNK_TAGS, with_tail=False)
+        for form in list(root.iter("form")):
+            if _text_length(form) < SMALL_FORM_CHARS:
+                form.drop_tree()
+        page_length = _text_length(root)
+        for node in list(root.iter()):
+            if not isinstance(node.tag, str) or node.tag in ("html", "body") or node.getparent() is None:
+                continue
+            marker = f"{node.get('class', '')} {node.get('id', '')}"
+            if not marker.strip() or not BOILERPLATE_PATTERN.search(marker):
+                continue
+            # Class bố cục như "has-sidebar" có thể nằm trên khối bao cả bài viết: không xóa khối chứa phần lớn trang
+            if _text_length(node) > page_length / 2:
+                continue
+            node.drop_tree()
+
+    def _select_by_xpath(self, root) -> Optional[object]:
+        for xpath in self.content_xpaths:
+            candidates = [node for node in root.xpath(xpath)
+                          if _text_length(node) >= self.min_content_chars]
+            if candidates:
+                return max(candidates, key=_text_length)
+        return None
+
+    def _select_by_density(self, root) -> Optional[object]:
+        """Chấm điểm kiểu Readability: mỗi đoạn văn cộng điểm cho khối cha (và nửa điểm cho khối ông)"""
+        scores: Dict[object, float] = {}
+        for paragraph in root.iter(*PARAGRAPH_TAGS):
+            length = _text_length(paragraph)
+            if length < 25:
+                continue
+            text = paragraph.text_content()
+            score = 1 + text.count(",") + min(length / 100, 3)
+            parent = paragraph.getparent()
+            if parent is None:
+                continue
+            scores[parent] = scores.get(parent, 0.0) + score
+            grandparent = parent.getparent()
+            if grandparent is not None:
+                scores[grandparent] = scores.get(grandparent, 0.0) + score / 2
+
+        best, best_score = None, 0.0
+        for node, score in scores.items():
+            score *= 1 - _link_density(node)
+            if score > best_score:
+                best, best_score = node, score
+        if best is None or _text_length(best) < self.min_content_chars:
+            return None
+        return best
+
+    def _extract_lxml(self, page_content: str) -> str:
+        root = self._parse(page_content)
+        if root is None:
+            return ""
+        self._remove_boilerplate(root)
+
+        if self.main_content:
+            node = self._select_by_xpath(root)
+            if node is not None:
+                self.stats["selector"] += 1
+                return "\n".join(_text_lines(node))
+            node = self._select_by_density(root)
+            if node is not None:
+                self.stats["density"] += 1
+                return "\n".join(_text_lines(node))
+            self.stats["fallback"] += 1
+
+        body = root.find("body")
+        return "\n".join(_text_lines(body if body is not None else root))
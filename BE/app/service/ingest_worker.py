@@ -0,0 +1,105 @@
+"""
+👷 INGEST_WORKER.PY
+Chuyên trách: Tiến trình Worker nhận job từ JobQueue và chạy nạp dữ liệu
+
+Tách khỏi tiến trình API để việc nạp dữ liệu nặng không làm chậm /ask.
+Khởi chạy: python ingest_worker.py
+"""
+
+import time
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+
+
+class IngestWorker:
+    """
+    Vòng lặp Worker: nhận job, chạy handler tương ứng, cập nhật tiến độ và kết quả
+
+    Example:
+        >>> from app.service.rag_service import rag_service
+        >>> IngestWorker(job_queue, rag_service, max_concurrent_jobs=1).run_forever()
+    """
+
+    def __init__(self,
+                 job_queue,
+                 rag_service,
+                 max_concurrent_jobs: int = 1,
+                 poll_interval: float = 2.0,
+                 stale_timeout: float = 120.0,
+                 max_attempts: int = 3):
+        """
+        Args:
+            job_queue: JobQueue dùng chung với API
+            rag_service: RAGService thực hiện nạp dữ liệu
+            max_concurrent_jobs: Số job chạy đồng thời tối đa (toàn hệ thống)
+            poll_interval: Chu kỳ kiểm tra job mới (giây)
+            stale_timeout: Job 'running' không có heartbeat quá thời gian này sẽ được chạy lại
+            max_attempts: Số lần chạy tối đa của một job bị gián đoạn trước khi đánh dấu failed
+        """
+        self.job_queue = job_queue
+        self.rag_service = rag_service
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.poll_interval = poll_interval
+        self.stale_timeout = stale_timeout
+        self.max_attempts = max_attempts
+        self._active: Dict[str, object] = {}
+        self._stop = threading.Event()
+        self.handlers = {
+            "ingest_pdf": lambda payload, progress: self.rag_service.ingest_documents(
+                payload["directory_path"], progress=progress
+            ),
+            "sync_web": lambda payload, progress: self.rag_service.sync_website_data(
+                payload["start_url"], progress=progress, mode=payload.get("mode", "full")
+            ),
+        }
+
+    def _run_job(self, job: Dict) -> None:
+        job_id = job["id"]
+        print(f"👷 Bắt đầu job {job_id} ({job['kind']}): {job['payload']}")
+
+        def progress(stage: str, stats: Dict) -> None:
+            self.job_queue.update_progress(job_id, stage=stage, progress=stats)
+
+        try:
+            handler = self.handlers[job["kind"]]
+            result = handler(job["payload"], progress) or {}
+            error = result.get("error")
+            self.job_queue.finish(job_id, result=result, error=error)
+            print(f"{'❌' if error else '✅'} Kết thúc job {job_id}" + (f": {error}" if error else ""))
+        except Exception as e:
+            traceback.print_exc()
+            self.job_queue.finish(job_id, error=str(e))
+            print(f"❌ Job {job_id} thất bại: {e}")
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def run_forever(self) -> None:
+        print(f"👷 Worker nạp dữ liệu đã sẵn sàng (tối đa {self.max_concurrent_jobs} job đồng thời).")
+        last_heartbeat = 0.0
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_jobs) as executor:
+            while not self._stop.is_set():
+                # Dọn các job đã chạy xong
+                self._active = {job_id: f for job_id, f in self._active.items() if not f.done()}
+
+                # Báo các job đang chạy vẫn sống và trả lại hàng đợi những job bị bỏ dở
+                now = time.time()
+                if now - last_heartbeat >= self.stale_timeout / 4:
+                    self.job_queue.heartbeat(list(self._active.keys()))
+                    requeued, failed = self.job_queue.requeue_stale(self.stale_timeout, self.max_attempts)
+                    if requeued:
+                        print(f"↩️  Đưa {requeued} job bị gián đoạn trở lại hàng đợi.")
+                    if failed:
+                        print(f"❌ {failed} job làm worker dừng đột ngột {self.max_attempts} lần, "
+                              f"đánh dấu thất bại.")
+                    last_heartbeat = now
+
+                while len(self._active) < self.max_concurrent_jobs:
+                    job = self.job_queue.claim_next(self.max_concurrent_jobs)
+                    if job is None:
+                        break
+                    self._active[job["id"]] = executor.submit(self._run_job, job)
+
+                self._stop.wait(self.poll_interval)
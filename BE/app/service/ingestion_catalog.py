@@ -0,0 +1,517 @@
+"""
+📒 INGESTION_CATALOG.PY
+Chuyên trách: Danh mục tài liệu/URL đã nạp (SQLite, có index) thay cho các file log JSON
+
+- Mỗi lần cập nhật chỉ ghi đúng một dòng (không đọc/ghi lại toàn bộ file log)
+- Dấu vân tay rẻ (mtime + size): file không đổi thì không cần tính lại hash
+- Tự động nhập dữ liệu từ ingestion_log.json / web_ingestion_log.json cũ
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+def calculate_file_hash(file_path: str) -> str:
+    """Tính hash của file để kiểm tra trùng lặp"""
+    sha256_hash = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for byte_block in iter(lambda: f.read(1024 * 1024), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+class IngestionCatalog:
+    """
+    Danh mục nạp dữ liệu dùng chung cho PDF và Website
+
+    Example:
+        >>> catalog = IngestionCatalog("./database/ingestion_catalog.sqlite3")
+        >>> ingested, file_hash = catalog.lookup_document("./data/quy-che.pdf")
+        >>> if not ingested:
+        ...     catalog.mark_document("./data/quy-che.pdf", file_hash, {"chunk_size": 1000})
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+
+    def _create_tables(self) -> None:
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS documents (
+                    file_hash TEXT PRIMARY KEY,
+                    filename TEXT NOT NULL,
+                    file_path TEXT NOT NULL,
+                    size INTEGER,
+                    mtime REAL,
+                    timestamp TEXT NOT NULL,
+                    chunk_size INTEGER,
+                    chunk_overlap INTEGER,
+                    chunk_overlap_percent TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_documents_file_path ON documents(file_path);
+
+                CREATE TABLE IF NOT EXISTS web_pages (
+                    url TEXT PRIMARY KEY,
+                    hash TEXT NOT NULL,
+                    timestamp TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    links TEXT,
+                    last_seen REAL,
+                    check_count INTEGER DEFAULT 0,
+                    change_count INTEGER DEFAULT 0,
+                    last_changed REAL,
+                    recrawl_interval REAL,
+                    next_due REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_web_pages_hash ON web_pages(hash);
+
+                CREATE TABLE IF NOT EXISTS chunk_journal (
+                    source TEXT NOT NULL,
+                    chunk_id TEXT NOT NULL,
+                    committed_at REAL NOT NULL,
+                    duplicate_of TEXT,
+                    PRIMARY KEY (source, chunk_id)
+                );
+
+                CREATE TABLE IF NOT EXISTS chunk_signatures (
+                    chunk_id TEXT PRIMARY KEY,
+                    source TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    simhash INTEGER,
+                    band0 INTEGER,
+                    band1 INTEGER,
+                    band2 INTEGER,
+                    band3 INTEGER
+                );
+                CREATE INDEX IF NOT EXISTS idx_signatures_content_hash ON chunk_signatures(content_hash);
+                CREATE INDEX IF NOT EXISTS idx_signatures_source ON chunk_signatures(source);
+                CREATE INDEX IF NOT EXISTS idx_signatures_band0 ON chunk_signatures(band0);
+                CREATE INDEX IF NOT EXISTS idx_signatures_band1 ON chunk_signatures(band1);
+                CREATE INDEX IF NOT EXISTS idx_signatures_band2 ON chunk_signatures(band2);
+                CREATE INDEX IF NOT EXISTS idx_signatures_band3 ON chunk_signatures(band3);
+
+                CREATE TABLE IF NOT EXISTS crawl_frontier (
+                    run_key TEXT NOT NULL,
+                    url TEXT NOT NULL,
+                    depth INTEGER NOT NULL,
+                    done INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (run_key, url)
+                );
+
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+
+                -- Nguồn có chunk trùng mất bản gốc: phải nạp lại dù file/trang không đổi
+                CREATE TABLE IF NOT EXISTS stale_sources (
+                    source TEXT PRIMARY KEY,
+                    marked_at REAL NOT NULL
+                );
+            """)
+            # Chunk bị bỏ qua vì trùng: nhật ký ghi chunk gốc (của nguồn khác) đang giữ nội dung của nó
+            self._add_missing_columns("chunk_journal", {"duplicate_of": "TEXT"})
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_chunk_journal_duplicate_of ON chunk_journal(duplicate_of)"
+            )
+            # Danh mục tạo từ phiên bản cũ: bổ sung các cột mới
+            self._add_missing_columns("web_pages", {
+                "etag": "TEXT",
+                "last_modified": "TEXT",
+                "links": "TEXT",
+                "last_seen": "REAL",
+                "check_count": "INTEGER DEFAULT 0",
+                "change_count": "INTEGER DEFAULT 0",
+                "last_changed": "REAL",
+                "recrawl_interval": "REAL",
+                "next_due": "REAL"
+            })
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_web_pages_next_due ON web_pages(next_due)")
+
+    def _add_missing_columns(self, table: str, columns: Dict[str, str]) -> None:
+        existing = {row["name"] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+        for name, column_type in columns.items():
+            if name not in existing:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+    # ===== META =====
+    def get_meta(self, key: str, default: str = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def bump_collection_generation(self) -> None:
+        """Đánh dấu Vector Store vừa thay đổi (cache câu trả lời ở mọi tiến trình sẽ tự làm mới)"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES ('collection_generation', '1') "
+                "ON CONFLICT(key) DO UPDATE SET value = CAST(CAST(value AS INTEGER) + 1 AS TEXT)"
+            )
+
+    # ===== TÀI LIỆU PDF =====
+    def lookup_document(self, file_path: str) -> Tuple[bool, Optional[str]]:
+        """
+        Kiểm tra xem document đã được nạp chưa
+
+        Returns:
+            (đã nạp hay chưa, hash của file). Nếu mtime + size khớp với lần nạp trước
+            thì trả về hash đã lưu mà không cần đọc lại file.
+        """
+        stat = os.stat(file_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT file_hash FROM documents WHERE file_path = ? AND size = ? AND mtime = ?",
+                (file_path, stat.st_size, stat.st_mtime)
+            ).fetchone()
+        if row:
+            return True, row["file_hash"]
+
+        file_hash = calculate_file_hash(file_path)
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "SELECT file_hash FROM documents WHERE file_hash = ?", (file_hash,)
+            ).fetchone()
+            if row:
+                # Nội dung đã nạp (file bị chạm/di chuyển) -> cập nhật dấu vân tay mới
+                self._conn.execute(
+                    "UPDATE documents SET file_path = ?, size = ?, mtime = ? WHERE file_hash = ?",
+                    (file_path, stat.st_size, stat.st_mtime, file_hash)
+                )
+        return row is not None, file_hash
+
+    def mark_document(self, file_path: str, file_hash: str, chunk_config: Dict) -> None:
+        """Đánh dấu document đã được nạp (dùng lại hash đã tính ở lookup_document)"""
+        stat = os.stat(file_path)
+        with self._lock, self._conn:
+            # Bản cũ của cùng file (đã được thay thế bằng bản mới) không còn trong chỉ mục
+            self._conn.execute(
+                "DELETE FROM documents WHERE file_path = ? AND file_hash != ?", (file_path, file_hash)
+            )
+            self._conn.execute("""
+                INSERT OR REPLACE INTO documents
+                    (file_hash, filename, file_path, size, mtime, timestamp,
+                     chunk_size, chunk_overlap, chunk_overlap_percent)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                file_hash,
+                os.path.basename(file_path),
+                file_path,
+                stat.st_size,
+                stat.st_mtime,
+                time.strftime('%Y-%m-%d %H:%M:%S'),
+                chunk_config.get("chunk_size"),
+                chunk_config.get("chunk_overlap"),
+                chunk_config.get("chunk_overlap_percent")
+            ))
+
+    # ===== TRANG WEB =====
+    def get_web_page(self, url: str) -> Optional[Dict]:
+        """Lấy thông tin URL đã nạp (hash, timestamp, etag, last_modified, links, last_seen) hoặc None"""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM web_pages WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        page = dict(row)
+        page["links"] = json.loads(page["links"]) if page["links"] is not None else None
+        return page
+
+    def upsert_web_page(self,
+                        url: str,
+                        content_hash: str,
+                        etag: str = None,
+                        last_modified: str = None,
+                        links: List[str] = None) -> None:
+        """
+        Ghi nhận URL đã nạp với hash nội dung mới nhất (chỉ ghi một dòng), đồng thời đánh dấu last_seen.
+        Lịch sử thay đổi / lịch tải lại của URL được giữ nguyên.
+
+        Args:
+            etag, last_modified: Validator HTTP để lần sau tải có điều kiện (304 Not Modified)
+            links: Link con của trang (để vẫn đi tiếp được khi trang trả về 304)
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO web_pages (url, hash, timestamp, etag, last_modified, links, last_seen) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET hash = excluded.hash, timestamp = excluded.timestamp, "
+                "etag = excluded.etag, last_modified = excluded.last_modified, links = excluded.links, "
+                "last_seen = excluded.last_seen",
+                (url, content_hash, time.strftime('%Y-%m-%d %H:%M:%S'), etag, last_modified,
+                 json.dumps(links) if links is not None else None, time.time())
+            )
+
+    def stale_web_pages(self, seen_before: float) -> List[str]:
+        """Các URL không được nhìn thấy kể từ mốc seen_before (epoch giây), gồm cả URL chưa từng có last_seen"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url FROM web_pages WHERE last_seen IS NULL OR last_seen < ?", (seen_before,)
+            ).fetchall()
+        return [row["url"] for row in rows]
+
+    def record_web_check(self, url: str, changed: bool, interval: float, next_due: float, checked_at: float) -> None:
+        """Ghi một lần kiểm tra URL (lịch sử thay đổi) cùng khoảng tải lại và hạn tải tiếp theo"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE web_pages SET check_count = COALESCE(check_count, 0) + 1, "
+                "change_count = COALESCE(change_count, 0) + ?, "
+                "last_changed = CASE WHEN ? THEN ? ELSE last_changed END, "
+                "recrawl_interval = ?, next_due = ?, last_seen = ? WHERE url = ?",
+                (int(changed), int(changed), checked_at, interval, next_due, checked_at, url)
+            )
+
+    def postpone_web_check(self, url: str, interval: float, next_due: float) -> None:
+        """Dời hạn tải lại khi không lấy được trang: không tính là một lần kiểm tra, không cập nhật last_seen"""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE web_pages SET recrawl_interval = ?, next_due = ? WHERE url = ?",
+                (interval, next_due, url)
+            )
+
+    def due_web_pages(self, now: float, limit: int = None) -> List[str]:
+        """URL có next_due <= now (URL chưa có lịch coi như tới hạn), quá hạn lâu nhất trước"""
+        query = "SELECT url FROM web_pages WHERE next_due IS NULL OR next_due <= ? ORDER BY COALESCE(next_due, 0)"
+        params = [now]
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [row["url"] for row in rows]
+
+    def recrawl_statistics(self, now: float) -> Dict:
+        """Số URL tới hạn, khoảng tải lại trung bình/nhỏ nhất/lớn nhất (giờ)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) AS pages, "
+                "SUM(CASE WHEN next_due IS NULL OR next_due <= ? THEN 1 ELSE 0 END) AS due, "
+                "AVG(recrawl_interval) AS avg_interval, MIN(recrawl_interval) AS min_interval, "
+                "MAX(recrawl_interval) AS max_interval FROM web_pages", (now,)
+            ).fetchone()
+        def to_hours(seconds):
+            return round(seconds / 3600, 1) if seconds is not None else None
+
+        return {
+            "pages": row["pages"],
+            "due": row["due"] or 0,
+            "avg_interval_hours": to_hours(row["avg_interval"]),
+            "min_interval_hours": to_hours(row["min_interval"]),
+            "max_interval_hours": to_hours(row["max_interval"])
+        }
+
+    def count_web_pages(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM web_pages").fetchone()[0]
+
+    def remove_web_pages(self, urls: List[str]) -> None:
+        """Xóa URL khỏi danh mục cùng nhật ký chunk và chỉ mục chữ ký của nó"""
+        params = [(url,) for url in urls]
+        with self._lock, self._conn:
+            chunk_ids = [
+                row["chunk_id"] for url in urls
+                for row in self._conn.execute("SELECT chunk_id FROM chunk_journal WHERE source = ?", (url,))
+            ]
+            self._conn.executemany("DELETE FROM web_pages WHERE url = ?", params)
+            self._conn.executemany("DELETE FROM chunk_journal WHERE source = ?", params)
+            self._conn.executemany("DELETE FROM chunk_signatures WHERE source = ?", params)
+            self._conn.executemany("DELETE FROM stale_sources WHERE source = ?", params)
+            self._release_duplicates(chunk_ids)
+
+    # ===== HÀNG ĐỢI NHỆN WEB (quét tiếp sau gián đoạn) =====
+    def load_frontier(self, run_key: str) -> List[Tuple[str, int, bool]]:
+        """Các URL đã phát hiện trong lần quét run_key -> [(url, depth, đã xử lý xong)]"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT url, depth, done FROM crawl_frontier WHERE run_key = ? ORDER BY depth, rowid", (run_key,)
+            ).fetchall()
+        return [(row["url"], row["depth"], bool(row["done"])) for row in rows]
+
+    def add_frontier(self, run_key: str, entries) -> None:
+        """Thêm các cặp (url, depth) vừa được đưa vào hàng đợi (URL đã có thì giữ nguyên)"""
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier (run_key, url, depth) VALUES (?, ?, ?)",
+                [(run_key, url, depth) for url, depth in entries]
+            )
+
+    def mark_frontier_done(self, run_key: str, url: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "UPDATE crawl_frontier SET done = 1 WHERE run_key = ? AND url = ?", (run_key, url)
+            )
+
+    def clear_frontier(self, run_key: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM crawl_frontier WHERE run_key = ?", (run_key,))
+
+    # ===== NHẬT KÝ CHUNK (nạp tiếp sau gián đoạn, cập nhật theo chênh lệch) =====
+    def get_committed_chunk_ids(self, source: str) -> set:
+        """Danh sách chunk ID của một nguồn đã được ghi bền vững vào Vector Store"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM chunk_journal WHERE source = ?", (source,)
+            ).fetchall()
+        return {row["chunk_id"] for row in rows}
+
+    def record_chunks(self, entries) -> None:
+        """
+        Ghi nhận các cặp (source, chunk_id) vừa được ghi vào Vector Store, hoặc bộ ba
+        (source, chunk_id, duplicate_of) cho chunk bị bỏ qua vì trùng với chunk gốc đã ghi
+        """
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO chunk_journal (source, chunk_id, committed_at, duplicate_of) "
+                "VALUES (?, ?, ?, ?)",
+                [(entry[0], entry[1], now, entry[2] if len(entry) > 2 else None) for entry in entries]
+            )
+
+    def remove_chunks(self, source: str, chunk_ids) -> None:
+        """Xóa khỏi nhật ký (và chỉ mục chữ ký) các chunk đã bị xóa khỏi Vector Store"""
+        chunk_ids = list(chunk_ids)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "DELETE FROM chunk_journal WHERE source = ? AND chunk_id = ?",
+                [(source, chunk_id) for chunk_id in chunk_ids]
+            )
+            self._conn.executemany(
+                "DELETE FROM chunk_signatures WHERE chunk_id = ?",
+                [(chunk_id,) for chunk_id in chunk_ids]
+            )
+            self._release_duplicates(chunk_ids)
+
+    def _release_duplicates(self, chunk_ids: List[str]) -> None:
+        """
+        Chunk gốc đã bị xóa -> bỏ khỏi nhật ký các chunk trùng đang dựa vào nó và đánh dấu nguồn của
+        chúng cần nạp lại (lần nạp sau embed các chunk này). Gọi bên trong transaction đang giữ _lock
+        """
+        released = []
+        for i in range(0, len(chunk_ids), 500):
+            batch = chunk_ids[i:i + 500]
+            placeholders = ",".join("?" * len(batch))
+            released += self._conn.execute(
+                f"SELECT source, chunk_id FROM chunk_journal WHERE duplicate_of IN ({placeholders})", batch
+            ).fetchall()
+        if not released:
+            return
+        self._conn.executemany(
+            "DELETE FROM chunk_journal WHERE source = ? AND chunk_id = ?",
+            [(row["source"], row["chunk_id"]) for row in released]
+        )
+        sources = {row["source"] for row in released}
+        now = time.time()
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO stale_sources (source, marked_at) VALUES (?, ?)",
+            [(source, now) for source in sources]
+        )
+        # Trang web: bỏ hash/validator để lần đồng bộ sau tải lại (không nhận 304) và tới hạn ngay
+        self._conn.executemany(
+            "UPDATE web_pages SET hash = '', etag = NULL, last_modified = NULL, next_due = NULL WHERE url = ?",
+            [(source,) for source in sources]
+        )
+
+    def stale_sources(self) -> set:
+        """Các nguồn có chunk trùng đã mất bản gốc, cần nạp lại"""
+        with self._lock:
+            rows = self._conn.execute("SELECT source FROM stale_sources").fetchall()
+        return {row["source"] for row in rows}
+
+    def clear_stale_source(self, source: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM stale_sources WHERE source = ?", (source,))
+
+    # ===== CHỈ MỤC CHỮ KÝ CHUNK (lọc trùng trước khi embed) =====
+    @staticmethod
+    def _to_signed(value: int) -> int:
+        # SQLite INTEGER là số có dấu 64-bit
+        return value - (1 << 64) if value >= (1 << 63) else value
+
+    def find_signatures(self, content_hash: str, bands: Optional[List[int]] = None) -> List[Tuple[str, str, Optional[int]]]:
+        """Các chunk có cùng hash nội dung hoặc trùng ít nhất một dải SimHash -> [(chunk_id, content_hash, simhash)]"""
+        query = "SELECT chunk_id, content_hash, simhash FROM chunk_signatures WHERE content_hash = ?"
+        params = [content_hash]
+        if bands is not None:
+            for i, band in enumerate(bands):
+                query += f" OR band{i} = ?"
+                params.append(band)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [
+            (row["chunk_id"], row["content_hash"],
+             row["simhash"] & ((1 << 64) - 1) if row["simhash"] is not None else None)
+            for row in rows
+        ]
+
+    def add_signatures(self, entries) -> None:
+        """Lưu chữ ký (chunk_id, source, content_hash, simhash) của các chunk đã ghi vào Vector Store"""
+        rows = []
+        for chunk_id, source, digest, fingerprint in entries:
+            bands = [(fingerprint >> (16 * i)) & 0xFFFF for i in range(4)] if fingerprint is not None else [None] * 4
+            rows.append((chunk_id, source, digest,
+                         self._to_signed(fingerprint) if fingerprint is not None else None, *bands))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO chunk_signatures "
+                "(chunk_id, source, content_hash, simhash, band0, band1, band2, band3) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    # ===== NHẬP DỮ LIỆU TỪ LOG JSON CŨ =====
+    def import_json_logs(self, ingestion_log_file: str, web_ingestion_log_file: str) -> None:
+        """Nhập một lần các file log JSON cũ vào danh mục (bỏ qua nếu đã nhập)"""
+        if self.get_meta("json_logs_imported"):
+            return
+
+        documents = self._read_json(ingestion_log_file)
+        web_pages = self._read_json(web_ingestion_log_file)
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT OR IGNORE INTO documents
+                    (file_hash, filename, file_path, timestamp,
+                     chunk_size, chunk_overlap, chunk_overlap_percent)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [
+                (file_hash, entry.get("filename", ""), entry.get("file_path", ""),
+                 entry.get("timestamp", ""), entry.get("chunk_size"),
+                 entry.get("chunk_overlap"), entry.get("chunk_overlap_percent"))
+                for file_hash, entry in documents.items()
+            ])
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO web_pages (url, hash, timestamp) VALUES (?, ?, ?)",
+                [(url, entry["hash"], entry.get("timestamp", "")) for url, entry in web_pages.items()]
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_logs_imported', ?)",
+                (time.strftime('%Y-%m-%d %H:%M:%S'),)
+            )
+
+        if documents or web_pages:
+            print(f"📒 Đã nhập log cũ vào danh mục: {len(documents)} tài liệu, {len(web_pages)} URL")
+
+    @staticmethod
+    def _read_json(path: str) -> dict:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError):
+            return {}
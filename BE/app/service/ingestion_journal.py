@@ -0,0 +1,166 @@
+"""
+📝 INGESTION_JOURNAL.PY
+Chuyên trách: Nhật ký chunk theo nguồn (crash-safe, nạp tiếp được) và cập nhật theo chênh lệch
+
+- Chunk ID xác định từ nguồn + hash nội dung chunk (cùng nội dung -> cùng ID)
+- Sau mỗi lô ghi thành công vào Vector Store, các chunk ID được ghi vào nhật ký của nguồn
+- Khi nguồn thay đổi (PDF bản mới, trang web sửa nội dung): so sánh tập chunk cũ/mới,
+  chỉ embed chunk mới và chỉ xóa chunk đã biến mất
+- Khởi động lại sau sự cố: chunk đã ghi nằm trong tập cũ nên tự động được bỏ qua
+- Một nguồn chỉ được đánh dấu hoàn tất khi TẤT CẢ chunks của nó đã được ghi
+"""
+
+import hashlib
+import threading
+from typing import Callable, Dict, List, Tuple
+from langchain_core.documents import Document
+
+
+def make_chunk_id(source: str, content: str, occurrence: int = 0) -> str:
+    """
+    Chunk ID xác định từ nguồn và hash nội dung chunk.
+    occurrence phân biệt các chunk trùng nội dung trong cùng một nguồn.
+    """
+    raw = f"{source}\0{content}"
+    if occurrence:
+        raw += f"\0{occurrence}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+
+class IngestionJournal:
+    """
+    Theo dõi tiến độ và tính chênh lệch chunk của từng nguồn (file PDF / URL)
+
+    Example:
+        >>> journal = IngestionJournal(catalog, vector_store)
+        >>> journal.expect("quy-che.pdf", on_complete=lambda: mark_done(...))
+        >>> remaining = journal.begin_source("quy-che.pdf", splits)  # chỉ chunk mới
+        >>> writer.write_documents(remaining, on_batch_written=journal.record_batch)
+    """
+
+    def __init__(self, catalog, vector_store=None, lexical_index=None):
+        """
+        Args:
+            catalog: IngestionCatalog lưu nhật ký chunk của từng nguồn
+            vector_store: Chroma vector store (để xóa chunk đã biến mất và
+                          nhận diện chunk cũ chưa có trong nhật ký)
+            lexical_index: LexicalIndex (tùy chọn), xóa chunk đã biến mất cùng lúc với Vector Store
+        """
+        self.catalog = catalog
+        self.vector_store = vector_store
+        self.lexical_index = lexical_index
+        self._callbacks: Dict[str, Callable[[], None]] = {}
+        self._pending: Dict[str, set] = {}
+        self._vanished: Dict[str, List[str]] = {}
+        self._lock = threading.Lock()
+        self.completed_sources = 0
+        self.resumed_chunks = 0
+        self.deleted_chunks = 0
+
+    def expect(self, source: str, on_complete: Callable[[], None] = None) -> None:
+        """Khai báo một nguồn sắp được nạp (gọi trước khi đưa tài liệu vào pipeline)"""
+        if on_complete:
+            with self._lock:
+                self._callbacks[source] = on_complete
+
+    def _existing_chunk_ids(self, source: str) -> set:
+        """Chunk ID hiện có của nguồn: từ nhật ký, và từ Vector Store cho dữ liệu nạp trước khi có nhật ký"""
+        existing = self.catalog.get_committed_chunk_ids(source)
+        if not existing and self.vector_store is not None:
+            existing = set(self.vector_store._collection.get(where={"source": source}, include=[])["ids"])
+        return existing
+
+    def begin_source(self, source: str, chunks: List[Document]) -> List[Document]:
+        """
+        Gán chunk ID và tính chênh lệch với các chunk đang có của nguồn
+
+        Returns:
+            Danh sách chunks chưa có trong Vector Store (cần embed)
+        """
+        occurrences: Dict[str, int] = {}
+        for chunk in chunks:
+            occurrence = occurrences.get(chunk.page_content, 0)
+            occurrences[chunk.page_content] = occurrence + 1
+            chunk.id = make_chunk_id(source, chunk.page_content, occurrence)
+
+        existing = self._existing_chunk_ids(source)
+        new_ids = {chunk.id for chunk in chunks}
+        remaining = [chunk for chunk in chunks if chunk.id not in existing]
+        vanished = [chunk_id for chunk_id in existing if chunk_id not in new_ids]
+
+        kept = len(chunks) - len(remaining)
+        self.resumed_chunks += kept
+        if existing:
+            print(f"↪️  {source}: giữ {kept} đoạn, thêm {len(remaining)} đoạn, xóa {len(vanished)} đoạn")
+
+        with self._lock:
+            self._pending[source] = {chunk.id for chunk in remaining}
+            self._vanished[source] = vanished
+        if not remaining:
+            self._complete(source)
+        return remaining
+
+    def vanished_ids(self, source: str) -> List[str]:
+        """Chunk ID của bản cũ sẽ bị xóa khi nguồn hoàn tất"""
+        with self._lock:
+            return list(self._vanished.get(source, []))
+
+    def record_batch(self, batch: List[Document], ids: List[str]) -> None:
+        """Callback sau mỗi lô ghi thành công: ghi nhật ký và hoàn tất các nguồn đã đủ chunks"""
+        entries = [(doc.metadata.get("source", ""), chunk_id) for doc, chunk_id in zip(batch, ids)]
+        self.catalog.record_chunks(entries)
+        # Lô đã vào Vector Store: cache câu trả lời (mọi tiến trình) làm mới ngay, không đợi hết lần nạp
+        self.catalog.bump_collection_generation()
+        self._settle(entries)
+
+    def record_duplicates(self, dropped: List[Tuple[Document, str]]) -> None:
+        """Chunk bị bỏ vì trùng với chunk gốc đã ghi: ghi nhật ký kèm chunk gốc (duplicate_of)"""
+        entries = [(chunk.metadata.get("source", ""), chunk.id, original_id) for chunk, original_id in dropped]
+        self.catalog.record_chunks(entries)
+        self._settle(entries)
+
+    def _settle(self, entries) -> None:
+        finished = []
+        with self._lock:
+            for source, chunk_id, *_ in entries:
+                pending = self._pending.get(source)
+                if pending is None:
+                    continue
+                pending.discard(chunk_id)
+                if not pending:
+                    finished.append(source)
+        for source in dict.fromkeys(finished):
+            self._complete(source)
+
+    def _complete(self, source: str) -> None:
+        with self._lock:
+            if self._pending.pop(source, None) is None:
+                return
+            callback = self._callbacks.pop(source, None)
+            vanished = self._vanished.pop(source, [])
+
+        # Nguồn đã nạp lại đủ: không còn cần nạp lại (xóa chunk cũ bên dưới có thể đánh dấu lại)
+        self.catalog.clear_stale_source(source)
+
+        # Chỉ xóa chunk cũ khi nội dung mới đã vào đủ -> chỉ mục không bao giờ bị hụt nội dung
+        if vanished:
+            if self.vector_store is not None:
+                for i in range(0, len(vanished), 500):
+                    self.vector_store._collection.delete(ids=vanished[i:i + 500])
+            if self.lexical_index is not None:
+                try:
+                    self.lexical_index.delete_ids(vanished)
+                except Exception as e:
+                    self.lexical_index.mark_stale(e)
+            self.catalog.remove_chunks(source, vanished)
+            self.catalog.bump_collection_generation()
+            self.deleted_chunks += len(vanished)
+        if callback:
+            callback()
+        self.completed_sources += 1
+
+    @property
+    def incomplete_sources(self) -> List[str]:
+        """Các nguồn còn chunk chưa ghi được (sẽ được nạp tiếp ở lần chạy sau)"""
+        with self._lock:
+            return list(self._pending.keys())
@@ -0,0 +1,183 @@
+"""
+🏭 INGESTION_PIPELINE.PY
+Chuyên trách: Pipeline nạp dữ liệu dạng luồng (streaming) với bộ nhớ giới hạn
+
+    Đọc tài liệu ──▶ [hàng đợi] ──▶ Chunking ──▶ [hàng đợi] ──▶ Embed theo lô ──▶ Ghi DB
+
+- Mỗi công đoạn chạy trong một luồng riêng, nối với nhau bằng hàng đợi có giới hạn
+  (backpressure): công đoạn trước tự dừng khi công đoạn sau chưa kịp xử lý
+- Bộ nhớ đỉnh chỉ phụ thuộc kích thước hàng đợi, không phụ thuộc tổng dung lượng dữ liệu
+- Lô đầu tiên được ghi vào DB ngay khi đủ chunks, không cần đợi đọc hết tài liệu
+"""
+
+import time
+import queue
+import threading
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from langchain_core.documents import Document
+
+_END_OF_STAGE = object()
+
+
+class _StageError:
+    """Bọc exception của luồng công đoạn để ném lại ở luồng tiêu thụ"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def bounded_stage(source: Iterable, maxsize: int, name: str = "stage") -> Iterator:
+    """
+    Chạy iterable nguồn trong một luồng riêng và trả kết quả qua hàng đợi giới hạn
+
+    Args:
+        source: Iterable/generator của công đoạn trước
+        maxsize: Số phần tử tối đa được giữ trong hàng đợi
+        name: Tên luồng (phục vụ debug)
+
+    Example:
+        >>> for chunk in bounded_stage(chunk_generator(), maxsize=200):
+        ...     process(chunk)
+    """
+    buffer = queue.Queue(maxsize=maxsize)
+    stopped = threading.Event()
+
+    def put(item) -> bool:
+        # Chờ có chỗ trống, nhưng thoát ngay nếu bên tiêu thụ đã dừng
+        while not stopped.is_set():
+            try:
+                buffer.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def run():
+        try:
+            for item in source:
+                if not put(item):
+                    return
+        except BaseException as e:
+            put(_StageError(e))
+        finally:
+            put(_END_OF_STAGE)
+
+    worker = threading.Thread(target=run, name=name, daemon=True)
+    worker.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is _END_OF_STAGE:
+                break
+            if isinstance(item, _StageError):
+                raise item.error
+            yield item
+    finally:
+        stopped.set()
+
+
+class IngestionPipeline:
+    """
+    Pipeline: tài liệu (theo file/trang web) → chunks → embed theo lô → Vector Store
+
+    Example:
+        >>> pipeline = IngestionPipeline(chunking_service, embedding_writer)
+        >>> stats = pipeline.run(iter_documents())  # mỗi phần tử là list[Document] của 1 file
+    """
+
+    def __init__(self,
+                 chunking_service,
+                 embedding_writer,
+                 document_queue_size: int = 4,
+                 chunk_queue_size: int = None):
+        """
+        Args:
+            chunking_service: ChunkingService dùng để cắt nhỏ từng tài liệu
+            embedding_writer: EmbeddingWriter ghi chunks theo lô
+            document_queue_size: Số tài liệu (file/trang) tối đa chờ chunking
+            chunk_queue_size: Số chunks tối đa chờ embed. Mặc định: 2 lô
+        """
+        self.chunking_service = chunking_service
+        self.embedding_writer = embedding_writer
+        self.document_queue_size = document_queue_size
+        self.chunk_queue_size = chunk_queue_size or embedding_writer.max_batch_size * 2
+        self.journal = None
+        self.deduplicator = None
+        self.stats = {}
+
+    def _chunk_stage(self, document_groups: Iterable[List[Document]]) -> Iterator[Document]:
+        """Cắt nhỏ từng nhóm tài liệu ngay khi nhận được, trả chunks dần dần"""
+        for docs in document_groups:
+            if not docs:
+                continue
+            self.stats["documents"] += 1
+            self.stats["pages"] += len(docs)
+            splits = self.chunking_service.split_documents(docs)
+            self.stats["chunks"] += len(splits)
+            if self.journal is not None:
+                # Gán chunk ID theo nội dung, chỉ giữ lại những chunk chưa có trong DB
+                source = docs[0].metadata.get("source", "")
+                splits = self.journal.begin_source(source, splits)
+                if self.deduplicator is not None and splits:
+                    splits, dropped = self.deduplicator.filter(
+                        splits, ignore_ids=self.journal.vanished_ids(source)
+                    )
+                    if dropped:
+                        # Chunk trùng được ghi nhật ký kèm chunk gốc để nguồn vẫn hoàn tất được;
+                        # chunk gốc bị xóa về sau thì chunk này được nạp lại
+                        self.journal.record_duplicates(dropped)
+            yield from splits
+
+    def run(self,
+            document_groups: Iterable[List[Document]],
+            journal=None,
+            progress: Optional[Callable[[str, Dict], None]] = None,
+            deduplicator=None) -> Dict:
+        """
+        Chạy toàn bộ pipeline
+
+        Args:
+            document_groups: Iterable các nhóm Document cùng một nguồn (vd: các trang của một file PDF)
+            journal: IngestionJournal (tùy chọn) để nạp tiếp sau gián đoạn và
+                     chỉ đánh dấu hoàn tất khi mọi chunk của nguồn đã được ghi
+            progress: Callback progress(stage, stats) gọi sau mỗi lô ghi thành công
+            deduplicator: ChunkDeduplicator (tùy chọn, cần journal) để bỏ chunk trùng/gần trùng trước khi embed
+
+        Returns:
+            Dict thống kê: documents, pages, chunks, written, failed, elapsed_seconds, chunks_per_sec
+        """
+        self.stats = {"documents": 0, "pages": 0, "chunks": 0, "written": 0}
+        self.journal = journal
+        self.deduplicator = deduplicator if journal is not None else None
+        start_time = time.time()
+
+        def on_batch_written(batch: List[Document], ids: List[str]) -> None:
+            if journal is not None:
+                journal.record_batch(batch, ids)
+            if self.deduplicator is not None:
+                self.deduplicator.record_batch(batch, ids)
+            self.stats["written"] += len(batch)
+            if progress is not None:
+                elapsed = max(time.time() - start_time, 1e-6)
+                progress("embedding", {
+                    "documents": self.stats["documents"],
+                    "pages": self.stats["pages"],
+                    "chunks": self.stats["chunks"],
+                    "written": self.stats["written"],
+                    "chunks_per_sec": round(self.stats["written"] / elapsed, 2)
+                })
+
+        documents = bounded_stage(document_groups, self.document_queue_size, name="ingest-load")
+        chunks = bounded_stage(self._chunk_stage(documents), self.chunk_queue_size, name="ingest-chunk")
+        write_stats = self.embedding_writer.write_documents(chunks, on_batch_written=on_batch_written)
+
+        self.stats.update(write_stats)
+        self.stats["elapsed_seconds"] = time.time() - start_time
+        if journal is not None:
+            self.stats["resumed_chunks"] = journal.resumed_chunks
+            self.stats["deleted_chunks"] = journal.deleted_chunks
+            self.stats["completed_sources"] = journal.completed_sources
+            self.stats["incomplete_sources"] = journal.incomplete_sources
+        if self.deduplicator is not None:
+            self.stats["dedup"] = self.deduplicator.get_statistics()
+        return self.stats
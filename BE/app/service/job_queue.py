@@ -0,0 +1,201 @@
+"""
+📋 JOB_QUEUE.PY
+Chuyên trách: Hàng đợi công việc nạp dữ liệu bền vững (SQLite), dùng chung giữa API và Worker
+
+- API chỉ ghi job vào hàng đợi và trả về job_id ngay lập tức
+- Tiến trình Worker riêng (ingest_worker.py) nhận job và chạy nạp dữ liệu
+- Job giống hệt đang chờ/đang chạy -> trả về job cũ thay vì tạo job mới
+- Giới hạn số job chạy đồng thời trên toàn hệ thống
+- Job mất heartbeat (worker crash) được chạy lại tối đa max_attempts lần; job liên tục làm worker
+  crash (vd: PDF làm tràn bộ nhớ) bị đánh dấu failed thay vì chặn hàng đợi mãi mãi
+"""
+
+import os
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+class JobQueue:
+    """
+    Example:
+        >>> job, created = job_queue.enqueue("ingest_pdf", {"directory_path": "./data"})
+        >>> job_queue.get(job["id"])["status"]
+        'queued'
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                dedup_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                stage TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                heartbeat_at REAL,
+                attempts INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at);
+            CREATE INDEX IF NOT EXISTS idx_jobs_dedup_key ON jobs(dedup_key, status);
+        """)
+        # CSDL tạo trước khi có cột attempts
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "attempts" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        for key in ("payload", "progress", "result"):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def enqueue(self, kind: str, payload: Dict) -> Tuple[Dict, bool]:
+        """
+        Thêm job vào hàng đợi
+
+        Returns:
+            (job, created). created=False nếu đã có job giống hệt đang chờ/đang chạy
+        """
+        payload_json = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+        dedup_key = f"{kind}:{payload_json}"
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE dedup_key = ? AND status IN (?, ?) ORDER BY created_at LIMIT 1",
+                    (dedup_key, *ACTIVE_STATUSES)
+                ).fetchone()
+                if row is None:
+                    job_id = uuid.uuid4().hex
+                    self._conn.execute(
+                        "INSERT INTO jobs (id, kind, payload, dedup_key, status, stage, created_at) "
+                        "VALUES (?, ?, ?, ?, 'queued', 'queued', ?)",
+                        (job_id, kind, payload_json, dedup_key, time.time())
+                    )
+                    row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+                    created = True
+                else:
+                    created = False
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row), created
+
+    def claim_next(self, max_running: int) -> Optional[Dict]:
+        """Nhận job cũ nhất đang chờ nếu số job đang chạy (toàn hệ thống) chưa đạt giới hạn"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                running = self._conn.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'running'"
+                ).fetchone()[0]
+                row = None
+                if running < max_running:
+                    row = self._conn.execute(
+                        "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+                    ).fetchone()
+                    if row is not None:
+                        now = time.time()
+                        self._conn.execute(
+                            "UPDATE jobs SET status = 'running', stage = 'starting', "
+                            "started_at = ?, heartbeat_at = ?, attempts = attempts + 1 WHERE id = ?",
+                            (now, now, row["id"])
+                        )
+                        row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return self._to_dict(row) if row is not None else None
+
+    def update_progress(self, job_id: str, stage: str = None, progress: Dict = None) -> None:
+        """Cập nhật giai đoạn và số liệu tiến độ (đồng thời làm mới heartbeat)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET stage = COALESCE(?, stage), progress = COALESCE(?, progress), "
+                "heartbeat_at = ? WHERE id = ?",
+                (stage, json.dumps(progress, ensure_ascii=False) if progress is not None else None,
+                 time.time(), job_id)
+            )
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        """Báo job vẫn đang được xử lý (tránh bị coi là treo)"""
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND status = 'running'",
+                [(now, job_id) for job_id in job_ids]
+            )
+
+    def finish(self, job_id: str, result: Dict = None, error: str = None) -> None:
+        """Kết thúc job: done nếu không có lỗi, ngược lại failed"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, stage = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                ("failed" if error else "done", "failed" if error else "done",
+                 json.dumps(result, ensure_ascii=False, default=str) if result is not None else None,
+                 error, time.time(), job_id)
+            )
+
+    def requeue_stale(self, timeout_seconds: float, max_attempts: int = 3) -> Tuple[int, int]:
+        """
+        Đưa các job 'running' mất heartbeat (worker bị tắt/crash) trở lại hàng đợi.
+        Job đã chạy max_attempts lần vẫn mất heartbeat -> failed (ghi lại giai đoạn cuối cùng)
+
+        Returns:
+            (số job được chạy lại, số job bị đánh dấu failed)
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                failed = self._conn.execute(
+                    "UPDATE jobs SET status = 'failed', stage = 'failed', finished_at = ?, "
+                    "error = 'Worker dừng đột ngột ' || attempts || ' lần khi chạy job "
+                    "(lần cuối ở giai đoạn ' || COALESCE(stage, '?') || ')' "
+                    "WHERE status = 'running' AND heartbeat_at < ? AND attempts >= ?",
+                    (now, now - timeout_seconds, max_attempts)
+                ).rowcount
+                requeued = self._conn.execute(
+                    "UPDATE jobs SET status = 'queued', stage = 'requeued', "
+                    "error = 'Worker dừng đột ngột ở giai đoạn ' || COALESCE(stage, '?') "
+                    "WHERE status = 'running' AND heartbeat_at < ?",
+                    (now - timeout_seconds,)
+                ).rowcount
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return requeued, failed
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row is not None else None
+
+
+job_queue = JobQueue(settings.JOB_QUEUE_PATH)
@@ -0,0 +1,252 @@
+"""
+🔤 LEXICAL_INDEX.PY
+Chuyên trách: Chỉ mục từ khóa (BM25) cho các chunk đã nạp, đặt cạnh Chroma
+
+- SQLite FTS5, tách từ theo âm tiết tiếng Việt (unicode61, giữ nguyên dấu: "học" khác "hoc")
+- Cập nhật dần cùng Vector Store: EmbeddingWriter thêm chunk sau mỗi lô ghi thành công,
+  IngestionJournal / dọn trang web bị gỡ xóa chunk tương ứng -> hai chỉ mục luôn khớp nhau
+- Tìm chính xác các tra cứu mà vector hay bỏ sót: "Điều 12", mã học phần, số điện thoại, mức học phí
+- Không cần gọi API: câu hỏi dạng mã/số hiệu được trả lời chỉ bằng chỉ mục này (xem looks_like_identifier)
+- Ghi/xóa lỗi (SQLite bị khóa, đầy đĩa) không làm hỏng lần nạp: chỉ mục được đánh dấu "stale"
+  và dựng lại từ Chroma ở lần khởi động sau (rebuild)
+"""
+
+import os
+import re
+import json
+import sqlite3
+import threading
+import unicodedata
+from typing import Dict, List, Optional
+
+from langchain_core.documents import Document
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+# Mã viết hoa: HAU, KTS, IELTS...
+CODE_PATTERN = re.compile(r"[A-ZĐ]{2,}")
+ROMAN_NUMERAL_PATTERN = re.compile(r"[ivxlcdm]+")
+# Từ chỉ vị trí trong văn bản, đi kèm số hiệu: "Điều 12", "Khoản 2 Điều 5", "Chương IV", "mã KT101"
+REFERENCE_WORDS = {"điều", "khoản", "điểm", "chương", "mục", "phần", "mã", "số"}
+# Giới hạn số âm tiết đưa vào biểu thức MATCH (câu hỏi rất dài)
+MAX_QUERY_TOKENS = 32
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC: PDF hay trả về tiếng Việt dạng tổ hợp (NFD), câu hỏi gõ từ bàn phím là NFC"""
+    return unicodedata.normalize("NFC", text)
+
+
+def tokenize(text: str) -> List[str]:
+    """Tách âm tiết (chữ thường, giữ dấu) - cùng quy tắc với tokenizer unicode61 của FTS5"""
+    return TOKEN_PATTERN.findall(normalize_text(text).lower())
+
+
+def looks_like_identifier(query: str, max_tokens: int = 4) -> bool:
+    """
+    Câu truy vấn chỉ gồm số hiệu/mã ("Điều 12", "Khoản 2 Điều 5", "KT101", "0243 854 4346", "HAU")
+    -> tìm theo từ khóa là đủ, không cần embed.
+    Câu có chữ thường khác ("học phí năm 2024") vẫn là câu hỏi nội dung -> tìm kiếm lai.
+    """
+    tokens = TOKEN_PATTERN.findall(normalize_text(query))
+    if not tokens or len(tokens) > max_tokens:
+        return False
+    has_code = False
+    previous = None
+    for token in tokens:
+        lowered = token.lower()
+        if (any(ch.isdigit() for ch in token) or CODE_PATTERN.fullmatch(token)
+                or (previous in ("chương", "phần", "mục") and ROMAN_NUMERAL_PATTERN.fullmatch(lowered))):
+            has_code = True
+        elif lowered not in REFERENCE_WORDS:
+            return False
+        previous = lowered
+    return has_code
+
+
+class LexicalIndex:
+    """
+    Example:
+        >>> index = LexicalIndex("./database/lexical_index.sqlite3")
+        >>> index.add(chunks, ids)
+        >>> index.search("Điều 12 quy chế đào tạo", k=20)
+        >>> index.search("Điều 12", k=5, phrase=True)
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        db_dir = os.path.dirname(db_path)
+        if db_dir and not os.path.exists(db_dir):
+            os.makedirs(db_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._create_tables()
+        self.searches = 0
+        self._stale = False
+
+    def _create_tables(self) -> None:
+        with self._lock, self._conn:
+            self._conn.executescript("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value TEXT
+                );
+                CREATE TABLE IF NOT EXISTS chunks (
+                    id INTEGER PRIMARY KEY,
+                    chunk_id TEXT NOT NULL UNIQUE,
+                    source TEXT NOT NULL,
+                    content TEXT NOT NULL,
+                    metadata TEXT NOT NULL DEFAULT '{}'
+                );
+                CREATE INDEX IF NOT EXISTS idx_chunks_source ON chunks(source);
+
+                -- Chỉ mục FTS5 dùng nội dung của bảng chunks (không lưu văn bản hai lần)
+                CREATE VIRTUAL TABLE IF NOT EXISTS chunks_fts USING fts5(
+                    content,
+                    content='chunks',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 0'
+                );
+                CREATE TRIGGER IF NOT EXISTS chunks_ai AFTER INSERT ON chunks BEGIN
+                    INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chunks_ad AFTER DELETE ON chunks BEGIN
+                    INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                END;
+                CREATE TRIGGER IF NOT EXISTS chunks_au AFTER UPDATE OF content ON chunks BEGIN
+                    INSERT INTO chunks_fts(chunks_fts, rowid, content) VALUES ('delete', old.id, old.content);
+                    INSERT INTO chunks_fts(rowid, content) VALUES (new.id, new.content);
+                END;
+            """)
+
+    # ------------------------------------------------------------------ Ghi / xóa
+
+    def add(self, documents: List[Document], ids: List[str]) -> None:
+        """Thêm (hoặc cập nhật) chunks đã ghi vào Vector Store, cùng chunk ID với Chroma"""
+        rows = [
+            (chunk_id, doc.metadata.get("source", ""), normalize_text(doc.page_content),
+             json.dumps(doc.metadata, ensure_ascii=False, default=str))
+            for doc, chunk_id in zip(documents, ids)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("""
+                INSERT INTO chunks (chunk_id, source, content, metadata) VALUES (?, ?, ?, ?)
+                ON CONFLICT(chunk_id) DO UPDATE SET
+                    source = excluded.source,
+                    content = excluded.content,
+                    metadata = excluded.metadata
+            """, rows)
+
+    def delete_ids(self, ids: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE chunk_id = ?", [(chunk_id,) for chunk_id in ids])
+
+    def delete_sources(self, sources: List[str]) -> None:
+        with self._lock, self._conn:
+            self._conn.executemany("DELETE FROM chunks WHERE source = ?", [(source,) for source in sources])
+
+    def mark_stale(self, error: Exception) -> None:
+        """Một lần ghi/xóa thất bại -> chỉ mục lệch với Vector Store, cần dựng lại"""
+        print(f"⚠️ Lỗi cập nhật chỉ mục từ khóa: {error.__class__.__name__} {error}. "
+              f"Chỉ mục sẽ được dựng lại ở lần khởi động sau.")
+        self._stale = True
+        try:
+            with self._lock, self._conn:
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stale', '1')")
+        except sqlite3.Error as e:
+            print(f"⚠️ Không ghi được trạng thái chỉ mục từ khóa: {e}")
+
+    def is_stale(self) -> bool:
+        if self._stale:
+            return True
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = 'stale'").fetchone()
+        return row is not None and row["value"] == "1"
+
+    def rebuild(self, collection, batch_size: int = 500) -> int:
+        """Xóa toàn bộ rồi dựng lại từ collection Chroma; trả về số chunk đã thêm"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM chunks")
+        added = self.backfill(collection, batch_size)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM meta WHERE key = 'stale'")
+        self._stale = False
+        return added
+
+    def backfill(self, collection, batch_size: int = 500) -> int:
+        """Dựng chỉ mục từ collection Chroma đã có (lần đầu bật tìm kiếm lai), trả về số chunk đã thêm"""
+        added = 0
+        offset = 0
+        while True:
+            result = collection.get(include=["documents", "metadatas"], limit=batch_size, offset=offset)
+            if not result["ids"]:
+                break
+            documents = [
+                Document(page_content=text or "", metadata=metadata or {})
+                for text, metadata in zip(result["documents"], result["metadatas"])
+            ]
+            self.add(documents, result["ids"])
+            added += len(documents)
+            offset += batch_size
+            print(f"   ➤ Chỉ mục từ khóa: đã thêm {added} đoạn")
+        return added
+
+    # ------------------------------------------------------------------ Tìm kiếm
+
+    @staticmethod
+    def _match_expression(query: str, phrase: bool) -> Optional[str]:
+        tokens = tokenize(query)[:MAX_QUERY_TOKENS]
+        if not tokens:
+            return None
+        # Đặt từng âm tiết trong ngoặc kép: ký tự đặc biệt của câu hỏi không thành cú pháp FTS5
+        if phrase:
+            return '"' + " ".join(tokens) + '"'
+        return " OR ".join(f'"{token}"' for token in dict.fromkeys(tokens))
+
+    def search(self, query: str, k: int = 20, phrase: bool = False) -> List[Document]:
+        """
+        Chunks khớp câu truy vấn, xếp theo BM25 (phù hợp nhất trước)
+
+        Args:
+            query: Câu truy vấn
+            k: Số kết quả tối đa
+            phrase: True -> các âm tiết phải đứng liền nhau đúng thứ tự ("Điều 12" không khớp "12 Điều")
+        """
+        expression = self._match_expression(query, phrase)
+        if expression is None:
+            return []
+        with self._lock:
+            self.searches += 1
+            rows = self._conn.execute("""
+                SELECT chunks.chunk_id, chunks.content, chunks.metadata
+                FROM chunks_fts JOIN chunks ON chunks.id = chunks_fts.rowid
+                WHERE chunks_fts MATCH ?
+                ORDER BY rank
+                LIMIT ?
+            """, (expression, k)).fetchall()
+        return [
+            Document(id=row["chunk_id"], page_content=row["content"], metadata=json.loads(row["metadata"]))
+            for row in rows
+        ]
+
+    # ------------------------------------------------------------------ Thống kê
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+
+    def get_statistics(self) -> Dict:
+        with self._lock:
+            chunks, sources = self._conn.execute(
+                "SELECT COUNT(*), COUNT(DISTINCT source) FROM chunks"
+            ).fetchone()
+        size = os.path.getsize(self.db_path) if os.path.exists(self.db_path) else 0
+        return {
+            "chunks": chunks,
+            "sources": sources,
+            "searches": self.searches,
+            "size_mb": round(size / (1024 * 1024), 2)
+        }
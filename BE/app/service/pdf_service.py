@@ -1,13 +1,48 @@
 import os
+from collections import deque
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Deque, Iterator, List, Optional, Tuple
 from langchain_community.document_loaders import PyPDFLoader
 
+
+def find_pdf_files(root) -> List[Path]:
+    """
+    Quét đệ quy toàn bộ cây thư mục và lọc file .pdf (không phân biệt hoa thường: .pdf, .PDF)
+    """
+    pdf_files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            if filename.lower().endswith(".pdf"):
+                pdf_files.append(Path(dirpath) / filename)
+    return pdf_files
+
+
+def load_pdf_pages(file_path) -> list:
+    """
+    Logic trích xuất dữ liệu bằng thư viện PyPDFLoader.
+    Hàm cấp module để có thể chạy trong tiến trình con (ProcessPoolExecutor).
+    """
+    if os.path.getsize(file_path) == 0:
+        raise Exception("File trống (0 KB)")
+
+    loader = PyPDFLoader(str(file_path))
+    return loader.load()
+
+
 class PDFProcessor:
-    def __init__(self, data_folder="data/"):
+    def __init__(self, data_folder="data/", max_workers: Optional[int] = None):
         """
         [Checklist] Khởi tạo Class PDFProcessor: Tách biệt logic xử lý file.
+
+        Args:
+            data_folder: Thư mục gốc chứa PDF (quét đệ quy cả thư mục con)
+            max_workers: Số tiến trình đọc PDF song song. Mặc định: số nhân CPU
         """
         self.data_folder = Path(data_folder)
+        self.max_workers = max_workers or os.cpu_count() or 1
         # [Checklist] Khởi tạo hai danh sách để ghi log trạng thái
         self.success_files = []
         self.failed_files = []
@@ -21,47 +56,119 @@ class PDFProcessor:
             print(f"❌ Thư mục '{self.data_folder}' không tồn tại.")
             return []
 
-        # Chỉ lọc ra các file có đuôi .pdf
-        pdf_files = list(self.data_folder.glob("*.pdf"))
+        # Quét đệ quy và chỉ lọc ra các file có đuôi .pdf
+        pdf_files = find_pdf_files(self.data_folder)
 
         if not pdf_files:
             print(f"⚠️ Không tìm thấy file PDF nào trong '{self.data_folder}'.")
             return []
 
-        print(f"🔄 Bắt đầu quét {len(pdf_files)} file PDF...")
+        print(f"🔄 Bắt đầu quét {len(pdf_files)} file PDF ({self.max_workers} tiến trình)...")
 
-        for pdf_path in pdf_files:
-            # [Checklist] Cấu hình xử lý lỗi (Error Handling) cho mỗi file
-            try:
-                # Gọi hàm nội bộ để load file
-                pages = self._load_single_pdf(pdf_path)
-                
-                if pages:
-                    self.all_docs.extend(pages)
-                    self.success_files.append(pdf_path.name)
-                    print(f"✅ Đã đọc thành công: {pdf_path.name}")
-                
-            except Exception as e:
+        for pdf_path, pages, error in self.iter_parsed(pdf_files):
+            name = self.relative_name(pdf_path)
+            if error is not None:
                 # Nếu một file bị lỗi, bỏ qua và tiếp tục nạp file tiếp theo
                 self.failed_files.append({
-                    "file": pdf_path.name,
-                    "reason": str(e)
+                    "file": name,
+                    "reason": error
                 })
-                print(f"❌ Lỗi tại file {pdf_path.name}: {str(e)}")
+                print(f"❌ Lỗi tại file {name}: {error}")
+            elif pages:
+                self.all_docs.extend(pages)
+                self.success_files.append(name)
+                print(f"✅ Đã đọc thành công: {name}")
 
         # [Checklist] In bảng thống kê chi tiết sau khi quét xong
         self._print_final_report()
         return self.all_docs
 
+    def iter_parsed(self, pdf_files: List[Path]) -> Iterator[Tuple[Path, list, Optional[str]]]:
+        """
+        Đọc song song các file PDF bằng ProcessPoolExecutor.
+        Trả về (đường dẫn, danh sách trang, lỗi) ngay khi từng file đọc xong.
+
+        - Lỗi của một file được cô lập (error là chuỗi mô tả, pages rỗng)
+        - Số file đang xử lý đồng thời bị giới hạn để không giữ quá nhiều trang trong bộ nhớ
+        - Tiến trình con bị sập (segfault, hết bộ nhớ) làm hỏng cả pool: các file đang xử lý được đọc lại
+          lần lượt trong pool riêng để tìm đúng file gây sập, rồi tiếp tục với pool mới
+        """
+        if self.max_workers <= 1 or len(pdf_files) <= 1:
+            for pdf_path in pdf_files:
+                try:
+                    yield pdf_path, self._load_single_pdf(pdf_path), None
+                except Exception as e:
+                    yield pdf_path, [], str(e)
+            return
+
+        pending_files = deque(pdf_files)
+        while pending_files:
+            suspects = yield from self._iter_pool(pending_files)
+            for pdf_path in suspects:
+                yield self._parse_isolated(pdf_path)
+
+    def _iter_pool(self, pending_files: Deque[Path]) -> Iterator[Tuple[Path, list, Optional[str]]]:
+        """
+        Đọc song song cho tới khi hết file hoặc pool bị hỏng.
+        Trả về (return) các file đang xử lý lúc pool hỏng - chưa biết file nào gây sập.
+        """
+        max_in_flight = self.max_workers * 2
+        suspects = []
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            in_flight = {}
+
+            def submit_next() -> bool:
+                """Bổ sung file mới vào hàng đợi khi có chỗ trống; False nếu pool đã hỏng"""
+                while pending_files and len(in_flight) < max_in_flight:
+                    pdf_path = pending_files.popleft()
+                    try:
+                        in_flight[executor.submit(load_pdf_pages, pdf_path)] = pdf_path
+                    except BrokenProcessPool:
+                        pending_files.appendleft(pdf_path)
+                        return False
+                return True
+
+            broken = not submit_next()
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    pdf_path = in_flight.pop(future)
+                    try:
+                        yield pdf_path, future.result(), None
+                    except BrokenProcessPool:
+                        suspects.append(pdf_path)
+                        broken = True
+                    except Exception as e:
+                        yield pdf_path, [], str(e)
+                if not broken:
+                    broken = not submit_next()
+        if suspects:
+            print(f"⚠️ Tiến trình đọc PDF bị dừng đột ngột. Đọc lại lần lượt {len(suspects)} file đang xử lý...")
+        return suspects
+
+    @staticmethod
+    def _parse_isolated(pdf_path: Path) -> Tuple[Path, list, Optional[str]]:
+        """Đọc một file trong pool riêng: pool hỏng lần nữa -> chính file này gây sập tiến trình"""
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            try:
+                return pdf_path, executor.submit(load_pdf_pages, pdf_path).result(), None
+            except BrokenProcessPool:
+                return pdf_path, [], "Tiến trình đọc PDF bị dừng đột ngột (file có thể bị hỏng)"
+            except Exception as e:
+                return pdf_path, [], str(e)
+
     def _load_single_pdf(self, file_path):
         """
         Logic trích xuất dữ liệu bằng thư viện PyPDFLoader.
         """
-        if os.path.getsize(file_path) == 0:
-            raise Exception("File trống (0 KB)")
+        return load_pdf_pages(file_path)
 
-        loader = PyPDFLoader(str(file_path))
-        return loader.load()
+    def relative_name(self, pdf_path: Path) -> str:
+        """Tên hiển thị: đường dẫn tương đối so với thư mục gốc"""
+        try:
+            return pdf_path.relative_to(self.data_folder).as_posix()
+        except ValueError:
+            return pdf_path.name
 
     def _print_final_report(self):
         """
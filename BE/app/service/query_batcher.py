@@ -0,0 +1,88 @@
+"""
+📨 QUERY_BATCHER.PY
+Chuyên trách: Gom các câu hỏi cần embed đồng thời thành một lần gọi API (micro-batching)
+
+- Câu hỏi chưa có trong cache được giữ lại trong một cửa sổ vài mili giây; hết cửa sổ
+  (hoặc đủ max_batch_size) thì gửi cả nhóm trong một request embed_documents(task_type="RETRIEVAL_QUERY")
+- Câu hỏi trùng nhau trong cùng nhóm chỉ embed một lần
+- Thư viện embedding không hỗ trợ tham số task_type -> gọi aembed_query song song cho từng câu
+"""
+
+import asyncio
+from typing import List, Optional, Set, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+
+class QueryEmbeddingBatcher:
+    """
+    Example:
+        >>> batcher = QueryEmbeddingBatcher(GoogleGenerativeAIEmbeddings(...), window_ms=5)
+        >>> vectors = await asyncio.gather(batcher.embed("học phí"), batcher.embed("điểm chuẩn"))  # 1 request
+    """
+
+    def __init__(self, embeddings: Embeddings, window_ms: float = 5, max_batch_size: int = 32):
+        """
+        Args:
+            embeddings: Embeddings gốc (gọi API)
+            window_ms: Thời gian chờ gom câu hỏi (mili giây)
+            max_batch_size: Số câu hỏi tối đa mỗi lần gọi API
+        """
+        self.embeddings = embeddings
+        self.window = window_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: List[Tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Event loop chỉ giữ tham chiếu yếu tới task: task flush bị thu gom giữa chừng thì
+        # các request đang chờ không bao giờ nhận được kết quả
+        self._tasks: Set[asyncio.Task] = set()
+        self.batches = 0
+        self.texts = 0
+
+    async def embed(self, text: str) -> List[float]:
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Trạng thái gắn với một event loop (future, timer); đổi loop thì bắt đầu lại
+            self._loop, self._pending, self._timer, self._tasks = loop, [], None, set()
+
+        future = loop.create_future()
+        self._pending.append((text, future))
+        if len(self._pending) >= self.max_batch_size:
+            self._schedule_flush(loop)
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._schedule_flush, loop)
+        return await future
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            task = loop.create_task(self._flush(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        if len(texts) == 1:
+            return [await self.embeddings.aembed_query(texts[0])]
+        try:
+            return await self.embeddings.aembed_documents(texts, task_type="RETRIEVAL_QUERY")
+        except TypeError:
+            return list(await asyncio.gather(*(self.embeddings.aembed_query(text) for text in texts)))
+
+    async def _flush(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.texts += len(texts)
+        try:
+            vectors = dict(zip(texts, await self._embed_batch(texts)))
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for text, future in batch:
+            if not future.done():
+                future.set_result(vectors[text])
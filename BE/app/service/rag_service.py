@@ -1,11 +1,9 @@
 import os
 import time
 import hashlib
-import json
-from typing import List
-from bs4 import BeautifulSoup
-from langchain_community.document_loaders import PyPDFLoader
-from langchain_community.document_loaders.recursive_url_loader import RecursiveUrlLoader
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional
 from langchain_google_genai import GoogleGenerativeAIEmbeddings, ChatGoogleGenerativeAI
 from langchain_chroma import Chroma
 from langchain_classic.chains.retrieval import create_retrieval_chain
@@ -13,13 +11,38 @@ from langchain_classic.chains.combine_documents import create_stuff_documents_ch
 from langchain_core.prompts import ChatPromptTemplate
 from app.core.config import settings
 from app.service.embedding_service import ChunkingPresets
+from app.service.embedding_writer import EmbeddingWriter
+from app.service.embedding_cache import EmbeddingCache, CachedEmbeddings
+from app.service.ingestion_catalog import IngestionCatalog
+from app.service.ingestion_journal import IngestionJournal
+from app.service.chunk_dedup import ChunkDeduplicator
+from app.service.pdf_service import PDFProcessor, find_pdf_files
+from app.service.ingestion_pipeline import IngestionPipeline, bounded_stage
+from app.service.web_crawler import AsyncWebCrawler, CrawlFrontier, probe_urls
+from app.service.html_extractor import HtmlExtractor
+from app.service.sitemap_service import SitemapDiscovery, parse_datetime
+from app.service.recrawl_scheduler import RecrawlScheduler
+from app.service.async_retriever import AsyncVectorStoreRetriever
+from app.service.answer_cache import SemanticAnswerCache
+from app.service.lexical_index import LexicalIndex
 
 class RAGService:
     def __init__(self):
-        # Khởi tạo AI và Embeddings
-        self.embeddings = GoogleGenerativeAIEmbeddings(
-            model="models/gemini-embedding-001",
-            google_api_key=settings.GOOGLE_API_KEY
+        # Khởi tạo AI và Embeddings (đi qua cache bền vững theo nội dung chunk)
+        self.embedding_cache = EmbeddingCache(
+            settings.EMBEDDING_CACHE_PATH,
+            max_size_mb=settings.EMBEDDING_CACHE_MAX_MB
+        )
+        self.embeddings = CachedEmbeddings(
+            GoogleGenerativeAIEmbeddings(
+                model=settings.EMBEDDING_MODEL,
+                google_api_key=settings.GOOGLE_API_KEY
+            ),
+            self.embedding_cache,
+            model_name=settings.EMBEDDING_MODEL,
+            query_cache_size=settings.QUERY_EMBED_CACHE_SIZE,
+            query_batch_window_ms=settings.QUERY_BATCH_WINDOW_MS,
+            query_max_batch_size=settings.QUERY_BATCH_MAX_SIZE
         )
         self.llm = ChatGoogleGenerativeAI(
             model = "gemini-3-flash-preview", 
@@ -32,8 +55,36 @@ class RAGService:
             embedding_function=self.embeddings
         )
         
+        # Chỉ mục từ khóa BM25 cạnh Chroma, cập nhật cùng lúc khi ghi/xóa chunk.
+        # Lần đầu bật trên dữ liệu cũ, hoặc lần chạy trước ghi chỉ mục lỗi (stale): dựng lại từ các chunk
+        # đang có trong Chroma (không gọi API)
+        self.lexical_index = None
+        if settings.HYBRID_SEARCH_ENABLED:
+            self.lexical_index = LexicalIndex(settings.LEXICAL_INDEX_PATH)
+            if self.lexical_index.is_stale() or (
+                    self.lexical_index.count() == 0 and self.vector_store._collection.count() > 0):
+                print("🔤 Dựng chỉ mục từ khóa từ Vector Store hiện có...")
+                added = self.lexical_index.rebuild(self.vector_store._collection)
+                print(f"✅ Chỉ mục từ khóa: {added} đoạn")
+        
         # Khởi tạo các thành phần RAG (Retriever, Prompt, Chain)
-        self.retriever = self.vector_store.as_retriever(search_kwargs={"k": 5})
+        # Retriever dùng được cả invoke lẫn ainvoke: embed câu hỏi bất đồng bộ, tìm kiếm Chroma
+        # trong thread pool riêng để /ask không chặn event loop của uvicorn.
+        # Có chỉ mục từ khóa -> tìm kiếm lai (vector + BM25, trộn RRF)
+        self.query_executor = ThreadPoolExecutor(
+            max_workers=settings.CHROMA_QUERY_WORKERS,
+            thread_name_prefix="chroma-query"
+        )
+        self.retriever = AsyncVectorStoreRetriever(
+            vector_store=self.vector_store,
+            embeddings=self.embeddings,
+            executor=self.query_executor,
+            k=5,
+            lexical_index=self.lexical_index,
+            candidates=settings.HYBRID_CANDIDATES,
+            rrf_k=settings.HYBRID_RRF_K,
+            identifier_max_tokens=settings.LEXICAL_FAST_PATH_MAX_TOKENS
+        )
         
         self.system_prompt = (
            "Bạn là HAU Assistant - Trợ lý ảo thông minh được phát triển bởi nhóm NCKH của Trường Đại học Kiến trúc Hà Nội. "
@@ -61,198 +112,291 @@ class RAGService:
         self.rag_chain = create_retrieval_chain(self.retriever, self.question_answer_chain)
 
         # Khởi tạo ChunkingService (tách bạch trách nhiệm)
-        # Có thể sử dụng preset: ChunkingPresets.vietnamese_optimized() (mặc định)
+        # Có thể sử dụng preset: ChunkingPresets.vietnamese_optimized() (mặc định),
+        # hoặc ChunkingPresets.legal_structure() (cắt theo Chương/Điều/Khoản, gắn số Điều vào metadata)
         self.chunking_service = ChunkingPresets.vietnamese_optimized()
+        self.chunking_service.configure(max_workers=settings.CHUNK_WORKERS)
+
+        # Trích xuất nội dung trang web (lxml + tìm vùng nội dung chính, bỏ menu/sidebar)
+        self.html_extractor = HtmlExtractor(
+            engine=settings.HTML_EXTRACTOR,
+            main_content=settings.HTML_MAIN_CONTENT
+        )
         
-        # File ghi nhật ký những tài liệu đã nạp
-        self.ingestion_log_file = "./database/ingestion_log.json"
-        self._ensure_log_file_exists()
+        # Bộ ghi embedding theo lô dùng chung cho nạp PDF và đồng bộ Website
+        self.embedding_writer = EmbeddingWriter(
+            self.embeddings,
+            self.vector_store,
+            batch_size=settings.EMBED_BATCH_SIZE,
+            requests_per_minute=settings.EMBED_REQUESTS_PER_MINUTE,
+            max_retries=settings.EMBED_MAX_RETRIES,
+            lexical_index=self.lexical_index
+        )
         
-        # File ghi nhật ký những URL đã nạp từ Website
-        self.web_ingestion_log_file = "./database/web_ingestion_log.json"
-        self._ensure_web_log_file_exists()
-    
-    def _ensure_log_file_exists(self):
-        """Đảm bảo file log tồn tại"""
-        log_dir = os.path.dirname(self.ingestion_log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-        if not os.path.exists(self.ingestion_log_file):
-            with open(self.ingestion_log_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
-                
-    def _ensure_web_log_file_exists(self):
-        """Đảm bảo file log web tồn tại"""
-        log_dir = os.path.dirname(self.web_ingestion_log_file)
-        if log_dir and not os.path.exists(log_dir):
-            os.makedirs(log_dir, exist_ok=True)
-        if not os.path.exists(self.web_ingestion_log_file):
-            with open(self.web_ingestion_log_file, 'w', encoding='utf-8') as f:
-                json.dump({}, f)
-                
-    def _load_web_ingestion_log(self) -> dict:
-        """Tải danh sách những URL đã nạp"""
-        try:
-            with open(self.web_ingestion_log_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-            
-    def _save_web_ingestion_log(self, log_data: dict):
-        """Lưu danh sách những URL đã nạp"""
-        with open(self.web_ingestion_log_file, 'w', encoding='utf-8') as f:
-            json.dump(log_data, f, ensure_ascii=False, indent=2)
-    
-    def _calculate_file_hash(self, file_path: str) -> str:
-        """Tính hash của file để kiểm tra trùng lặp"""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
-    
-    def _load_ingestion_log(self) -> dict:
-        """Tải danh sách những file đã nạp"""
-        try:
-            with open(self.ingestion_log_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-    
-    def _save_ingestion_log(self, log_data: dict):
-        """Lưu danh sách những file đã nạp"""
-        with open(self.ingestion_log_file, 'w', encoding='utf-8') as f:
-            json.dump(log_data, f, ensure_ascii=False, indent=2)
-    
-    def _is_document_already_ingested(self, file_path: str) -> bool:
-        """Kiểm tra xem document đã được nạp chưa"""
-        file_hash = self._calculate_file_hash(file_path)
-        log_data = self._load_ingestion_log()
-        return file_hash in log_data
+        # Danh mục tài liệu/URL đã nạp (SQLite) - tự nhập log JSON cũ ở lần chạy đầu
+        self.catalog = IngestionCatalog(settings.CATALOG_PATH)
+        self.catalog.import_json_logs(
+            "./database/ingestion_log.json",
+            "./database/web_ingestion_log.json"
+        )
+        
+        # Cache câu trả lời theo ngữ nghĩa, tự làm mới khi Vector Store thay đổi
+        self.answer_cache = SemanticAnswerCache(
+            self.catalog,
+            threshold=settings.ANSWER_CACHE_THRESHOLD,
+            ttl_seconds=settings.ANSWER_CACHE_TTL_HOURS * 3600,
+            max_entries=settings.ANSWER_CACHE_MAX_ENTRIES
+        ) if settings.ANSWER_CACHE_ENABLED else None
+        
+        # Lịch tải lại riêng cho từng URL theo lịch sử thay đổi (job "due")
+        self.recrawl_scheduler = RecrawlScheduler(
+            self.catalog,
+            min_interval=settings.RECRAWL_MIN_HOURS * 3600,
+            max_interval=settings.RECRAWL_MAX_DAYS * 86400,
+            default_interval=settings.RECRAWL_DEFAULT_HOURS * 3600
+        )
     
-    def _mark_document_as_ingested(self, file_path: str):
+    def _mark_document_as_ingested(self, file_path: str, file_hash: str):
         """Đánh dấu document đã được nạp"""
-        file_hash = self._calculate_file_hash(file_path)
-        log_data = self._load_ingestion_log()
-        
-        filename = os.path.basename(file_path)
-        log_data[file_hash] = {
-            'filename': filename,
-            'file_path': file_path,
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S'),
+        self.catalog.mark_document(file_path, file_hash, {
             'chunk_size': self.chunking_service.chunk_size,
             'chunk_overlap': self.chunking_service.chunk_overlap,
             'chunk_overlap_percent': f"{self.chunking_service.chunk_overlap_percent*100:.0f}%"
-        }
-        
-        self._save_ingestion_log(log_data)
+        })
 
-    def ingest_documents(self, directory_path: str):
+    def ingest_documents(self, directory_path: str, progress=None) -> dict:
         """
         Nạp PDF vào Vector Database với xử lý trùng lặp
         
+        Pipeline dạng luồng: đọc PDF → chunking → embed theo lô → ghi DB.
+        Các công đoạn nối với nhau bằng hàng đợi giới hạn nên bộ nhớ không tăng
+        theo tổng dung lượng tài liệu, và chunks đầu tiên tìm kiếm được ngay.
+        
         Cấu hình tối ưu (từ test results):
         - chunk_size: 1000 ký tự (mức trung bình tối ưu)
         - chunk_overlap: 180 ký tự (18% - giữ ngữ cảnh Điều/Khoản)
         - separators: ["\n\n", "\n", ". ", " ", ""] (ưu tiên đoạn → dòng → câu → từ)
+        
+        Args:
+            directory_path: Thư mục chứa PDF (quét đệ quy)
+            progress: Callback progress(stage, stats) để báo tiến độ (vd: job queue)
+        
+        Returns:
+            Dict thống kê kết quả (có khóa "error" nếu không thể nạp)
         """
-        documents = []
+        report = progress or (lambda stage, stats: None)
         skipped_files = 0
         
         if not os.path.exists(directory_path):
             print(f"❌ Lỗi: Thư mục {directory_path} không tồn tại.")
-            return
+            return {"error": f"Thư mục {directory_path} không tồn tại."}
 
         print("📥 Kiểm tra tài liệu trùng lặp...")
+        report("scanning", {})
         
-        # 1. Nạp file PDF (với kiểm tra trùng lặp)
-        for filename in os.listdir(directory_path):
-            if filename.endswith(".pdf"):
-                file_path = os.path.join(directory_path, filename)
-                
-                # Kiểm tra xem document đã được nạp chưa
-                if self._is_document_already_ingested(file_path):
-                    print(f"⏭️  Bỏ qua: {filename} (đã nạp rồi)")
-                    skipped_files += 1
-                    continue
-                
-                try:
-                    loader = PyPDFLoader(file_path)
-                    docs = loader.load()
-                    
-                    # Cập nhật metadata
-                    for doc in docs:
-                        doc.metadata["source"] = filename
-                    
-                    documents.extend(docs)
-                    
-                    # Đánh dấu file đã nạp
-                    self._mark_document_as_ingested(file_path)
-                    print(f"✅ Đã đọc: {filename}")
-                    
-                except Exception as e:
-                    print(f"❌ Lỗi file {filename}: {e}")
+        # 1. Quét đệ quy file PDF (với kiểm tra trùng lặp)
+        processor = PDFProcessor(directory_path, max_workers=settings.PDF_PARSE_WORKERS)
+        pdf_files = []
+        file_hashes = {}
+        # Nguồn có chunk trùng mà chunk gốc (ở file khác) đã bị xóa -> cần nạp lại dù file không đổi
+        stale_sources = self.catalog.stale_sources()
+        for pdf_path in find_pdf_files(directory_path):
+            source = processor.relative_name(pdf_path)
+            
+            # Kiểm tra xem document đã được nạp chưa (mtime + size khớp thì không cần hash lại)
+            ingested, file_hash = self.catalog.lookup_document(str(pdf_path))
+            if ingested and source not in stale_sources:
+                print(f"⏭️  Bỏ qua: {source} (đã nạp rồi)")
+                skipped_files += 1
+                continue
+            pdf_files.append(pdf_path)
+            file_hashes[pdf_path] = file_hash
         
         if skipped_files > 0:
             print(f"\n📊 Tómlại: Bỏ qua {skipped_files} file đã nạp trước đó")
 
-        if not documents:
+        if not pdf_files:
             if skipped_files > 0:
                 print("💡 Tất cả file đã được nạp rồi. Không có gì mới để xử lý.")
             else:
                 print("❌ Không tìm thấy tài liệu nào.")
-            return
+            return {"new_files": 0, "skipped_files": skipped_files}
+        report("embedding", {"new_files": len(pdf_files), "skipped_files": skipped_files})
 
-        # 2. Chunking khoa học (sử dụng ChunkingService)
-        print(f"\n✂️  Đang cắt nhỏ văn bản...")
-        splits = self.chunking_service.split_documents(documents)
-        total_chunks = len(splits)
-        
-        print(f"\n📦 Tổng cộng: {total_chunks} đoạn văn bản.")
         print(f"⚙️  Cấu hình Chunking:")
         print(f"   - chunk_size: {self.chunking_service.chunk_size} ký tự")
         print(f"   - chunk_overlap: {self.chunking_service.chunk_overlap} ký tự ({self.chunking_service.chunk_overlap_percent*100:.0f}%) - TỐI ƯU")
         print(f"   - separators: {self.chunking_service.separators}")
         print(f"   - Mục đích: Giữ ngữ cảnh Điều/Khoản không bị cắt quãng")
 
-        # 3. Nạp vào Vector DB theo chế độ "An Toàn Tuyệt Đối"
-        batch_size = 1 
-        print(f"🚀 Đang nạp từng bước (Cực chậm) để tránh bị chặn...")
+        # Nhật ký chunk: khởi động lại sau sự cố sẽ nạp tiếp đúng chỗ đã dừng,
+        # file bản mới chỉ embed các chunk thay đổi
+        journal = IngestionJournal(self.catalog, self.vector_store, self.lexical_index)
+
+        # 2. Đọc song song các file PDF mới (lỗi của từng file được cô lập)
+        def parsed_documents():
+            for pdf_path, docs, error in processor.iter_parsed(pdf_files):
+                source = processor.relative_name(pdf_path)
+                if error is not None:
+                    processor.failed_files.append({"file": source, "reason": error})
+                    print(f"❌ Lỗi file {source}: {error}")
+                    continue
+                
+                # Cập nhật metadata
+                for doc in docs:
+                    doc.metadata["source"] = source
+                
+                # Chỉ đánh dấu file đã nạp khi mọi chunk của nó đã được ghi vào DB
+                file_hash = file_hashes[pdf_path]
+                journal.expect(
+                    source,
+                    on_complete=lambda path=str(pdf_path), h=file_hash: self._mark_document_as_ingested(path, h)
+                )
+                print(f"✅ Đã đọc: {source} ({len(docs)} trang)")
+                yield docs
+
+        # 3 + 4. Chunking và nạp vào Vector DB theo lô ngay khi từng file đọc xong
+        print(f"🚀 Đang nạp theo lô (tối đa {self.embedding_writer.max_batch_size} đoạn/lần gọi)...")
+        pipeline = IngestionPipeline(self.chunking_service, self.embedding_writer)
+        stats = pipeline.run(parsed_documents(), journal=journal, progress=report,
+                             deduplicator=self._new_deduplicator())
+        
+        print(f"\n📦 Tổng cộng: {stats['documents']} file, {stats['pages']} trang, {stats['chunks']} đoạn văn bản.")
+        if stats['resumed_chunks'] or stats['deleted_chunks']:
+            print(f"↪️  Bỏ qua {stats['resumed_chunks']} đoạn đã có trong DB, xóa {stats['deleted_chunks']} đoạn không còn trong bản mới.")
+        print(f"✅ Đã nạp {stats['written']} đoạn trong {stats['elapsed_seconds']:.1f}s "
+              f"({stats['chunks_per_sec']:.1f} đoạn/giây, {stats['batches']} lô), "
+              f"hoàn tất {stats['completed_sources']} file")
+        if stats['failed']:
+            print(f"⚠️ {stats['failed']} đoạn nạp thất bại. "
+                  f"{len(stats['incomplete_sources'])} file chưa hoàn tất sẽ được nạp tiếp ở lần chạy sau.")
+        self._print_dedup_statistics(stats)
+        self._print_cache_statistics()
         
-        for i in range(0, total_chunks, batch_size):
-            batch = splits[i:i + batch_size]
-            try:
-                self.vector_store.add_documents(documents=batch)
-                print(f"   ➤ Đã nạp thành công: {i + 1}/{total_chunks}")
-                time.sleep(10)  # Nghỉ 10 giây mỗi đoạn
-            except Exception as e:
-                print(f"⚠️ Đang đợi 60 giây do Google quá tải: {e}")
-                time.sleep(60)
-                self.vector_store.add_documents(documents=batch)
+        stats["new_files"] = len(pdf_files)
+        stats["skipped_files"] = skipped_files
+        stats["failed_files"] = processor.failed_files
+        return stats
+
+    def _new_deduplicator(self):
+        """Bộ lọc chunk trùng cho một lần nạp (None nếu đã tắt bằng DEDUP_ENABLED=false)"""
+        if not settings.DEDUP_ENABLED:
+            return None
+        return ChunkDeduplicator(self.catalog, max_distance=settings.DEDUP_MAX_DISTANCE)
+
+    def _print_dedup_statistics(self, stats: dict):
+        """In số chunk trùng đã bỏ qua (số lần embed và dung lượng chỉ mục tiết kiệm được)"""
+        dedup = stats.get("dedup")
+        if dedup and dedup["dropped"]:
+            print(f"🧹 Lọc trùng: bỏ {dedup['dropped']}/{dedup['checked']} đoạn "
+                  f"({dedup['exact_duplicates']} trùng hoàn toàn, {dedup['near_duplicates']} gần trùng), "
+                  f"tiết kiệm {dedup['saved_embed_calls']} lần embed, ~{dedup['saved_index_mb']} MB chỉ mục")
+
+    def _print_cache_statistics(self):
+        """In thống kê cache embedding (số lần gọi API tiết kiệm được)"""
+        cache_stats = self.embedding_cache.get_statistics()
+        print(f"🗄️  Cache embedding: {cache_stats['hits']} hit / {cache_stats['misses']} miss "
+              f"({cache_stats['hit_rate']*100:.0f}%), {cache_stats['entries']} vector, "
+              f"{cache_stats['size_mb']}/{cache_stats['max_size_mb']} MB")
+
+    def _delete_web_sources(self, urls: List[str], batch_size: int = 100) -> int:
+        """Xóa mọi chunk của các URL khỏi Vector Store và danh mục (theo lô, lọc where source $in)"""
+        removed_chunks = 0
+        for i in range(0, len(urls), batch_size):
+            batch = urls[i:i + batch_size]
+            where = {"source": {"$in": batch}}
+            removed_chunks += len(self.vector_store._collection.get(where=where, include=[])["ids"])
+            self.vector_store._collection.delete(where=where)
+            if self.lexical_index is not None:
+                try:
+                    self.lexical_index.delete_sources(batch)
+                except Exception as e:
+                    self.lexical_index.mark_stale(e)
+            self.catalog.remove_web_pages(batch)
+            self.catalog.bump_collection_generation()
+        return removed_chunks
+
+    def _sweep_stale_pages(self, crawler: AsyncWebCrawler, seen_before: float, headers: dict, full_pass: bool) -> dict:
+        """
+        Mark-and-sweep: xóa các trang đã bị gỡ khỏi website
+
+        - Mark: mỗi trang gặp lại trong lần quét được cập nhật last_seen (upsert hoặc 304)
+        - Sweep: sau một lần quét toàn bộ trọn vẹn (full_pass), các URL có last_seen cũ hơn mốc bắt đầu
+          quét được kiểm tra lại; chỉ xóa khi xác nhận 404/410 hoặc chuyển hướng ra ngoài website.
+          URL nhện đã nhận 404/410 trong lần quét được xóa ngay (kể cả chế độ incremental).
+        """
+        gone = {url for url in crawler.gone_urls if self.catalog.get_web_page(url)}
+        checked = 0
+        if full_pass:
+            stale = [url for url in self.catalog.stale_web_pages(seen_before)
+                     if url.startswith(crawler.base_url) and url not in gone]
+            checked = len(stale)
+            if stale:
+                print(f"🔎 Kiểm tra lại {len(stale)} URL không còn gặp trong lần quét...")
+                probed = probe_urls(stale, base_url=crawler.base_url, headers=headers,
+                                    max_concurrency=settings.CRAWL_PER_HOST_CONCURRENCY)
+                gone.update(url for url, is_gone in probed.items() if is_gone)
+
+        result = {"checked": checked, "removed_pages": 0, "removed_chunks": 0}
+        if not gone:
+            return result
+        total_pages = self.catalog.count_web_pages()
+        if len(gone) > total_pages * settings.WEB_GC_MAX_DELETE_RATIO:
+            print(f"⚠️ {len(gone)}/{total_pages} trang bị báo đã gỡ (vượt ngưỡng "
+                  f"{settings.WEB_GC_MAX_DELETE_RATIO:.0%}), bỏ qua bước dọn để tránh xóa nhầm.")
+            result["skipped_pages"] = len(gone)
+            return result
+
+        result["removed_pages"] = len(gone)
+        result["removed_chunks"] = self._delete_web_sources(sorted(gone))
+        print(f"🗑️  Đã dọn {result['removed_pages']} trang không còn tồn tại "
+              f"({result['removed_chunks']} đoạn khỏi Vector Store)")
+        return result
 
     def _clean_html_content(self, page_content: str) -> str:
-        """Lọc bỏ các thẻ rác khỏi nội dung web"""
-        # Sử dụng trình phân tích cú pháp html.parser hoặc lxml
-        soup = BeautifulSoup(page_content, "html.parser") 
-        
-        # Xóa các thẻ không chứa nội dung chính yếu
-        for tag in soup(["header", "footer", "nav", "script", "style", "aside"]):
-            tag.decompose()
-            
-        # Trích xuất văn bản và loại bỏ khoảng trắng thừa
-        text = soup.get_text(separator="\n", strip=True)
-        return text
+        """Lọc bỏ các thẻ rác khỏi nội dung web, chỉ giữ vùng nội dung chính (xem HtmlExtractor)"""
+        return self.html_extractor(page_content)
+
+    def _incremental_candidates(self, start_url: str, headers: dict) -> Optional[List[str]]:
+        """
+        URL cần tải ở chế độ incremental: URL mới, hoặc có lastmod sau lần đồng bộ trước
+        (lấy từ sitemap/RSS). Trả về None nếu website không có sitemap/feed.
+        """
+        last_sync = parse_datetime(self.catalog.get_meta(f"web_last_sync:{start_url}"))
+        entries = SitemapDiscovery(start_url, headers=headers).discover(since=last_sync)
+        if entries is None:
+            return None
+        candidates = [
+            url for url, lastmod in entries.items()
+            if self.catalog.get_web_page(url) is None
+            or (lastmod is not None and (last_sync is None or lastmod > last_sync))
+        ]
+        print(f"🗺️  Sitemap/feed: {len(entries)} URL, {len(candidates)} URL mới hoặc đã thay đổi")
+        return candidates
 
-    def sync_website_data(self, start_url: str = "https://hau.edu.vn/"):
+    def sync_website_data(self, start_url: str = "https://hau.edu.vn/", progress=None, mode: str = "full") -> dict:
         """
         Thu thập và cập nhật dữ liệu từ website bằng Nhện web.
         Cơ chế Upsert: 
         - Nếu URL chưa có -> Thêm mới (Insert). 
         - Nếu có nhưng đổi nội dung -> Cập nhật (Upsert). 
         - Không đổi -> Bỏ qua.
+        
+        Args:
+            start_url: URL bắt đầu quét
+            progress: Callback progress(stage, stats) để báo tiến độ (vd: job queue)
+            mode: "full" - quét đệ quy toàn bộ (độ sâu 2);
+                  "incremental" - chỉ tải URL mới/thay đổi theo sitemap.xml, RSS
+                  (tự chuyển sang "full" nếu website không có sitemap/feed);
+                  "due" - chỉ tải lại các URL đã tới hạn theo lịch thích nghi (RecrawlScheduler)
+        
+        Returns:
+            Dict thống kê kết quả (có khóa "error" nếu gặp lỗi nghiêm trọng)
         """
-        print(f"\n🌐 Đang bắt đầu quá trình đồng bộ web từ URL: {start_url}")
+        report = progress or (lambda stage, stats: None)
+        print(f"\n🌐 Đang bắt đầu quá trình đồng bộ web ({mode}) từ URL: {start_url}")
         start_time = time.time() # Bắt đầu bấm giờ
+        sync_started_at = datetime.now(timezone.utc)
         
         try:
             # Giả lập User-Agent của Chrome Windows để chống bị chặn (Block/Timeout)
@@ -260,95 +404,127 @@ class RAGService:
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
             }
             
-            loader = RecursiveUrlLoader(
-                url=start_url,
-                max_depth=2,
+            seed_urls = None
+            if mode == "incremental":
+                report("discovering", {})
+                seed_urls = self._incremental_candidates(start_url, headers)
+                if seed_urls is None:
+                    print("⚠️ Không tìm thấy sitemap/feed, chuyển sang quét đệ quy toàn bộ.")
+                    mode = "full"
+            elif mode == "due":
+                seed_urls = self.recrawl_scheduler.due_urls(limit=settings.RECRAWL_BATCH_SIZE)
+                recrawl_stats = self.recrawl_scheduler.get_statistics()
+                print(f"⏱️  {len(seed_urls)}/{recrawl_stats['due']} URL tới hạn tải lại "
+                      f"(trên tổng {recrawl_stats['pages']} URL, khoảng tải lại trung bình "
+                      f"{recrawl_stats['avg_interval_hours']} giờ)")
+            
+            # Hàng đợi bền vững: lần chạy trước bị gián đoạn / hết ngân sách thì quét tiếp từ chỗ dừng
+            frontier = CrawlFrontier(self.catalog, f"{mode}:{start_url}")
+            # Mốc "mark" cho bước dọn URL cũ: thời điểm bắt đầu lần quét đầu tiên của frontier này
+            crawl_started_key = f"web_crawl_started:{mode}:{start_url}"
+            if not frontier.load()[0]:
+                self.catalog.set_meta(crawl_started_key, str(start_time))
+            seen_before = float(self.catalog.get_meta(crawl_started_key, str(start_time)))
+            
+            # Nhện web bất đồng bộ: tải song song nhiều trang, giới hạn theo host và có khoảng nghỉ lịch sự
+            # (incremental / due: chỉ tải đúng các URL ứng viên, không đi theo link)
+            crawler = AsyncWebCrawler(
+                start_url,
+                max_depth=1 if seed_urls is not None else 2,
+                seed_urls=seed_urls,
                 extractor=self._clean_html_content,
                 prevent_outside=True,
                 timeout=30,
-                headers=headers
+                headers=headers,
+                max_concurrency=settings.CRAWL_MAX_CONCURRENCY,
+                per_host_concurrency=settings.CRAWL_PER_HOST_CONCURRENCY,
+                politeness_delay=settings.CRAWL_POLITENESS_DELAY,
+                # Trang có ETag/Last-Modified không đổi -> server trả 304, không tải lại nội dung
+                validator_lookup=self.catalog.get_web_page,
+                # Trang 304 vẫn còn trên website: cập nhật last_seen (mark) và giãn lịch tải lại
+                on_not_modified=lambda url: self.recrawl_scheduler.record(url, changed=False),
+                # Trang tải lỗi: dời lịch tải lại, không để URL hỏng nằm mãi đầu danh sách "due"
+                on_failed=self.recrawl_scheduler.record_failure,
+                frontier=frontier,
+                max_pages=settings.CRAWL_MAX_PAGES or None,
+                max_seconds=settings.CRAWL_MAX_SECONDS or None
             )
             
-            web_log = self._load_web_ingestion_log()
-            docs_to_insert = []
-            updated_count = 0
-            inserted_count = 0
-            skipped_count = 0
+            journal = IngestionJournal(self.catalog, self.vector_store, self.lexical_index)
+            counts = {"inserted": 0, "updated": 0, "skipped": 0}
+            
+            def changed_pages():
+                """Trang mới/thay đổi, trả về ngay khi tải xong để chunking + embed chạy song song với việc quét"""
+                for doc in bounded_stage(crawler.lazy_load(), maxsize=settings.CRAWL_MAX_CONCURRENCY * 2,
+                                         name="web-crawl"):
+                    url = doc.metadata.get("source", "")
+                    print(f"⏳ Đang xử lý: {url}")
+                    
+                    # Validator HTTP + link con: lưu vào danh mục, không đưa vào Vector Store
+                    validators = {
+                        "etag": doc.metadata.pop("etag", None),
+                        "last_modified": doc.metadata.pop("last_modified", None),
+                        "links": doc.metadata.pop("links", None)
+                    }
+                    content = doc.page_content
+                    
+                    # Tính mã băm nội dung để so sánh
+                    content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
+                    
+                    page = self.catalog.get_web_page(url)
+                    if page:
+                        if page['hash'] == content_hash:
+                            counts["skipped"] += 1
+                            # Nội dung đã có trong DB: chỉ cập nhật validator để lần sau nhận 304
+                            self.catalog.upsert_web_page(url, content_hash, **validators)
+                            self.recrawl_scheduler.record(url, changed=False)
+                            frontier.mark_done(url)
+                            continue # Bỏ qua vì không đổi
+                        # Chỉ embed chunk mới và xóa chunk đã biến mất (tính chênh lệch trong pipeline)
+                        print(f"  🔄 Nội dung thay đổi, cập nhật: {url}")
+                        counts["updated"] += 1
+                    else:
+                        print(f"  🆕 Phát hiện bài viết mới: {url}")
+                        counts["inserted"] += 1
+                    
+                    report("crawling", {**counts, "not_modified": crawler.stats.get("not_modified", 0)})
+                    
+                    # Hash (và validator) mới chỉ được ghi vào danh mục khi mọi chunk của trang đã vào DB;
+                    # khi đó trang mới được đánh dấu xong trong frontier (gián đoạn trước đó -> tải lại trang này)
+                    def on_page_complete(u=url, h=content_hash, v=validators):
+                        self.catalog.upsert_web_page(u, h, **v)
+                        self.recrawl_scheduler.record(u, changed=True)
+                        frontier.mark_done(u)
+                    journal.expect(url, on_complete=on_page_complete)
+                    yield [doc]
             
             print(f"🕵️  Bắt đầu quét các trang từ {start_url} ...")
+            report("crawling", {})
             
-            # Sử dụng lazy_load để xử lý và log từng trang ngay lập tức
-            for doc in loader.lazy_load():
-                url = doc.metadata.get("source", "")
-                print(f"⏳ Đang xử lý: {url}")
-                
-                content = doc.page_content
-                
-                # Tính mã băm nội dung để so sánh
-                content_hash = hashlib.sha256(content.encode('utf-8')).hexdigest()
-                
-                if url in web_log:
-                    if web_log[url]['hash'] == content_hash:
-                        skipped_count += 1
-                        continue # Bỏ qua vì không đổi
-                    else:
-                        print(f"  🔄 Nội dung thay đổi, cập nhật: {url}")
-                        # Xóa chunk cũ dựa trên source URL
-                        try:
-                            self.vector_store._collection.delete(where={"source": url})
-                        except Exception as e:
-                            print(f"  ⚠️ Lỗi xóa dữ liệu cũ (URL={url}): {e}")
-                        
-                        docs_to_insert.append(doc)
-                        updated_count += 1
-                        web_log[url] = {
-                            "hash": content_hash,
-                            "timestamp": time.strftime('%Y-%m-%d %H:%M:%S')
-                        }
-                        # Lưu log ngay sau khi xử lý xong trang để tránh mất data nếu crash giữa chừng
-                        self._save_web_ingestion_log(web_log)
-                else:
-                    print(f"  🆕 Phát hiện bài viết mới: {url}")
-                    docs_to_insert.append(doc)
-                    inserted_count += 1
-                    web_log[url] = {
-                        "hash": content_hash,
-                        "timestamp": time.strftime('%Y-%m-%d %H:%M:%S')
-                    }
-                    self._save_web_ingestion_log(web_log)
+            # Quét -> chunking -> embed theo lô chạy đồng thời, nối bằng các hàng đợi có giới hạn:
+            # embed chậm thì nhện tự dừng chờ (backpressure), không giữ toàn bộ trang trong bộ nhớ
+            pipeline = IngestionPipeline(self.chunking_service, self.embedding_writer)
+            stats = pipeline.run(changed_pages(), journal=journal, progress=report,
+                                 deduplicator=self._new_deduplicator())
+            inserted_count, updated_count, skipped_count = counts["inserted"], counts["updated"], counts["skipped"]
+            dedup_stats = stats.get("dedup", {})
+            if stats["documents"]:
+                print(f"📈 Đã nạp {stats['written']}/{stats['chunks']} đoạn từ {stats['documents']} bài viết "
+                      f"mới/cập nhật, tốc độ {stats['chunks_per_sec']:.1f} đoạn/giây ({stats['batches']} lô)")
+                if stats['failed']:
+                    print(f"🚫 Cảnh báo: {stats['failed']} đoạn văn bản bị bỏ qua sau nhiều lần thử thất bại, "
+                          f"{len(stats['incomplete_sources'])} trang sẽ được nạp lại ở lần đồng bộ sau.")
+                self._print_dedup_statistics(stats)
+                self._print_cache_statistics()
+            print(f"⏱️  Quét {crawler.stats['elapsed_seconds']:.1f}s, quét + nạp {stats['elapsed_seconds']:.1f}s "
+                  f"(chạy đồng thời)")
             
-            # Tiến hành chunking và insert nếu có tài liệu mới/cần cập nhật
-            if docs_to_insert:
-                print(f"\n✂️  Đang cắt {len(docs_to_insert)} bài viết mới/cập nhật...")
-                splits = self.chunking_service.split_documents(docs_to_insert)
-                total_chunks = len(splits)
-                
-                print(f"🚀 Bắt đầu nạp {total_chunks} đoạn văn bản web vào DB...")
-                batch_size = 1 # Nạp từng chunk một cho an toàn
-                max_retries = 3
-                for i in range(0, total_chunks, batch_size):
-                    batch = splits[i:i + batch_size]
-                    retries = 0
-                    success = False
-                    
-                    while retries < max_retries and not success:
-                        try:
-                            self.vector_store.add_documents(documents=batch)
-                            success = True
-                            time.sleep(2) # 1. Hãm phanh chủ động: ngủ 2 giây
-                        except Exception as e:
-                            error_msg = str(e)
-                            # 2. Cơ chế thử lại (Retry) khi có lỗi
-                            if "429" in error_msg or "RESOURCE_EXHAUSTED" in error_msg:
-                                retries += 1
-                                print(f"⚠️ Cảnh báo giới hạn API (429/RESOURCE_EXHAUSTED). Hệ thống ngủ 60s (Lần thử {retries}/{max_retries})...")
-                                time.sleep(60)
-                            else:
-                                print(f"❌ Lỗi nạp dữ liệu: {e}. Thoát và tiếp tục bài viết tiếp theo.")
-                                break # Lỗi khác 429, thoát vòng lặp while để sang chunk mới
-                                
-                    if not success and retries >= max_retries:
-                        print(f"🚫 Cảnh báo: Bỏ qua URL/đoạn văn bản này sau {max_retries} lần thử thất bại để không kẹt tiến trình.")
+            # Dọn trang đã bị gỡ khỏi website (chỉ quét dọn toàn bộ sau một lần quét full trọn vẹn)
+            gc_stats = {}
+            if settings.WEB_GC_ENABLED:
+                report("sweeping", {})
+                full_pass = mode == "full" and not crawler.stats["budget_exhausted"]
+                gc_stats = self._sweep_stale_pages(crawler, seen_before, headers, full_pass)
             
             # Tính toán thời gian tổng cộng
             end_time = time.time()
@@ -356,17 +532,41 @@ class RAGService:
             minutes, seconds = divmod(elapsed_seconds, 60)
             
             print(f"\n✅ Hoàn tất đồng bộ web trong {int(minutes)} phút {int(seconds)} giây!")
+            if crawler.stats["budget_exhausted"]:
+                # Giữ frontier để lần chạy sau quét tiếp; chưa ghi mốc incremental vì chưa quét hết
+                print(f"⏸️  Hết ngân sách quét ({crawler.stats['fetched']} trang), "
+                      f"các URL còn lại sẽ được quét tiếp ở lần đồng bộ sau.")
+            else:
+                frontier.clear()
+                # Mốc cho lần đồng bộ incremental tiếp theo (chỉ ghi khi mọi trang đã nạp xong).
+                # Job "due" chỉ tải một phần URL: dời mốc theo nó sẽ làm lần incremental sau
+                # bỏ sót các trang đã sửa trên sitemap nhưng chưa tới hạn
+                if mode in ("incremental", "full") and not journal.incomplete_sources:
+                    self.catalog.set_meta(f"web_last_sync:{start_url}", sync_started_at.isoformat())
+            
+            not_modified_count = crawler.stats.get("not_modified", 0)
+            skipped_count += not_modified_count
             print(f"📊 Thống kê: Thêm mới: {inserted_count}, Cập nhật: {updated_count}, Bỏ qua: {skipped_count}.")
+            print(f"🕸️  Đã tải {crawler.stats['fetched']} trang ({not_modified_count} trang 304 không đổi, "
+                  f"{crawler.stats['failed']} lỗi, {crawler.stats['bytes'] / (1024 * 1024):.1f} MB)")
+            return {
+                "inserted": inserted_count,
+                "updated": updated_count,
+                "skipped": skipped_count,
+                "elapsed_seconds": elapsed_seconds,
+                "mode": mode,
+                "crawl": crawler.stats,
+                "dedup": dedup_stats,
+                "gc": gc_stats,
+                "recrawl": self.recrawl_scheduler.get_statistics()
+            }
                 
         except Exception as e:
             print(f"❌ Lỗi nghiêm trọng trong quá trình đồng bộ website: {e}")
+            return {"error": str(e)}
 
-    def ask_question(self, question: str) -> str:
-        """Nhiệm vụ Tuần 4: Truy vấn thông minh"""
-        # Sử dụng rag_chain đã được khởi tạo trong __init__
-        response = self.rag_chain.invoke({"input": question})
-        
-        # Process sources
+    def _format_response(self, response: dict) -> dict:
+        """Ghép câu trả lời với danh sách nguồn (xem trước 200 ký tự mỗi đoạn)"""
         sources = []
         if "context" in response:
             for doc in response["context"]:
@@ -381,4 +581,77 @@ class RAGService:
             "sources": sources
         }
 
+    def _answer_cache_for(self, question: str) -> Optional[SemanticAnswerCache]:
+        """
+        Câu hỏi dạng mã/số hiệu không dùng cache ngữ nghĩa: vector của "Điều 12" và "Điều 13" gần như
+        trùng nhau (dễ trả nhầm câu trả lời), và các câu này được truy xuất bằng BM25 không cần embed
+        """
+        if self.retriever.is_identifier_query(question):
+            return None
+        return self.answer_cache
+
+    def ask_question(self, question: str) -> dict:
+        """Nhiệm vụ Tuần 4: Truy vấn thông minh"""
+        answer_cache = self._answer_cache_for(question)
+        if answer_cache is not None:
+            generation = answer_cache.generation()
+            vector = self.embeddings.embed_query(question)
+            cached = answer_cache.get(vector)
+            if cached is not None:
+                return cached
+        
+        # Sử dụng rag_chain đã được khởi tạo trong __init__
+        response = self.rag_chain.invoke({"input": question})
+        result = self._format_response(response)
+        if answer_cache is not None:
+            answer_cache.put(question, vector, result, generation)
+        return result
+
+    async def aask_question(self, question: str) -> dict:
+        """
+        Phiên bản bất đồng bộ của ask_question cho FastAPI: embed câu hỏi và gọi Gemini bằng
+        client async, tìm kiếm Chroma trong thread pool -> event loop luôn rảnh cho request khác
+        """
+        answer_cache = self._answer_cache_for(question)
+        if answer_cache is not None:
+            generation = answer_cache.generation()
+            vector = await self.embeddings.aembed_query(question)
+            cached = answer_cache.get(vector)
+            if cached is not None:
+                return cached
+        
+        response = await self.rag_chain.ainvoke({"input": question})
+        result = self._format_response(response)
+        if answer_cache is not None:
+            answer_cache.put(question, vector, result, generation)
+        return result
+
+    async def astream_question(self, question: str) -> AsyncIterator[tuple]:
+        """
+        Trả lời dạng luồng trên cùng rag_chain: ("sources", [...]) ngay sau bước truy xuất,
+        sau đó ("token", "...") cho từng đoạn văn bản Gemini sinh ra
+        """
+        answer_cache = self._answer_cache_for(question)
+        if answer_cache is not None:
+            generation = answer_cache.generation()
+            vector = await self.embeddings.aembed_query(question)
+            cached = answer_cache.get(vector)
+            if cached is not None:
+                yield "sources", cached["sources"]
+                yield "token", cached["answer"]
+                return
+        
+        sources, answer_parts = [], []
+        async for chunk in self.rag_chain.astream({"input": question}):
+            if "context" in chunk:
+                sources = self._format_response({"context": chunk["context"], "answer": ""})["sources"]
+                yield "sources", sources
+            if chunk.get("answer"):
+                answer_parts.append(chunk["answer"])
+                yield "token", chunk["answer"]
+        
+        # Chỉ lưu khi đã sinh trọn câu trả lời (client ngắt giữa chừng thì không tới đây)
+        if answer_cache is not None:
+            answer_cache.put(question, vector, {"answer": "".join(answer_parts), "sources": sources}, generation)
+
 rag_service = RAGService()
\ No newline at end of file
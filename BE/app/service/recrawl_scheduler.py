@@ -0,0 +1,81 @@
+"""
+⏱️ RECRAWL_SCHEDULER.PY
+Chuyên trách: Lịch tải lại riêng cho từng URL dựa trên lịch sử thay đổi
+
+- Mỗi lần kiểm tra một URL ghi lại: thay đổi hay không (hash nội dung / 304), số lần kiểm tra,
+  số lần thay đổi, thời điểm thay đổi gần nhất (cột trong bảng web_pages của IngestionCatalog)
+- Khoảng tải lại thích nghi: trang vừa thay đổi -> giảm một nửa, không đổi -> tăng 1.5 lần,
+  giới hạn trong [min_interval, max_interval]. Trang tin tuyển sinh đổi liên tục sẽ về gần
+  min_interval, trang quy chế lưu trữ dần lên max_interval
+- Job "due" chỉ tải các URL đã tới hạn (next_due <= hiện tại), quá hạn lâu nhất trước
+- Tải lỗi (mất kết nối, HTTP 5xx, trang rỗng): giãn lịch như trang không đổi, để vài URL hỏng
+  không chiếm mãi đầu hàng đợi của job "due"; không cập nhật last_seen (bước dọn URL vẫn thấy)
+"""
+
+import time
+from typing import Dict, List, Optional
+
+
+class RecrawlScheduler:
+    """
+    Example:
+        >>> scheduler = RecrawlScheduler(catalog, min_interval=3600, max_interval=30 * 86400)
+        >>> scheduler.record("https://hau.edu.vn/tin-tuc", changed=True)
+        >>> scheduler.due_urls(limit=500)
+    """
+
+    def __init__(self,
+                 catalog,
+                 min_interval: float = 3600,
+                 max_interval: float = 30 * 86400,
+                 default_interval: float = 86400,
+                 backoff: float = 1.5,
+                 speedup: float = 0.5):
+        """
+        Args:
+            catalog: IngestionCatalog (lưu lịch sử và lịch tải lại trong bảng web_pages)
+            min_interval: Khoảng tải lại ngắn nhất (giây)
+            max_interval: Khoảng tải lại dài nhất (giây)
+            default_interval: Khoảng tải lại của URL mới/chưa có lịch sử (giây)
+            backoff: Hệ số nhân khi trang không đổi
+            speedup: Hệ số nhân khi trang thay đổi
+        """
+        if not 0 < min_interval <= default_interval <= max_interval:
+            raise ValueError("Cần 0 < min_interval <= default_interval <= max_interval")
+        self.catalog = catalog
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.default_interval = default_interval
+        self.backoff = backoff
+        self.speedup = speedup
+
+    def next_interval(self, interval: Optional[float], changed: bool) -> float:
+        if interval is None:
+            return self.default_interval
+        interval *= self.speedup if changed else self.backoff
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def record(self, url: str, changed: bool, checked_at: float = None) -> None:
+        """Ghi nhận một lần kiểm tra URL và tính lịch tải lại tiếp theo"""
+        checked_at = checked_at or time.time()
+        page = self.catalog.get_web_page(url)
+        if page is None:
+            return
+        interval = self.next_interval(page.get("recrawl_interval"), changed)
+        self.catalog.record_web_check(url, changed, interval, checked_at + interval, checked_at)
+
+    def record_failure(self, url: str, checked_at: float = None) -> None:
+        """Không lấy được nội dung URL: dời hạn tải lại theo backoff"""
+        checked_at = checked_at or time.time()
+        page = self.catalog.get_web_page(url)
+        if page is None:
+            return
+        interval = self.next_interval(page.get("recrawl_interval"), changed=False)
+        self.catalog.postpone_web_check(url, interval, checked_at + interval)
+
+    def due_urls(self, now: float = None, limit: int = None) -> List[str]:
+        """URL đã tới hạn tải lại (kể cả URL chưa có lịch), quá hạn lâu nhất trước"""
+        return self.catalog.due_web_pages(now or time.time(), limit)
+
+    def get_statistics(self, now: float = None) -> Dict:
+        return self.catalog.recrawl_statistics(now or time.time())
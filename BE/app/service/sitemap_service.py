@@ -0,0 +1,183 @@
+"""
+🗺️ SITEMAP_SERVICE.PY
+Chuyên trách: Tìm danh sách URL kèm thời điểm cập nhật từ sitemap.xml / RSS / Atom
+
+- Nguồn: dòng "Sitemap:" trong robots.txt, /sitemap.xml, /sitemap_index.xml,
+  feed khai báo trong trang chủ (<link rel="alternate" type="application/rss+xml">), /feed, /rss
+- Hỗ trợ sitemap index (sitemap con), sitemap nén .gz, RSS 2.0 (<pubDate>) và Atom (<updated>)
+- Sitemap con có <lastmod> cũ hơn mốc "since" được bỏ qua, không cần tải
+"""
+
+import re
+import gzip
+import xml.etree.ElementTree as ET
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+import httpx
+
+SITEMAP_PATHS = ["sitemap.xml", "sitemap_index.xml"]
+FEED_PATHS = ["feed", "rss", "rss.xml", "feed.xml"]
+FEED_LINK_PATTERN = re.compile(
+    r"<link[^>]+type=[\"']application/(?:rss|atom)\+xml[\"'][^>]*>", re.IGNORECASE
+)
+HREF_PATTERN = re.compile(r"href=[\"']([^\"']+)[\"']", re.IGNORECASE)
+
+
+def parse_datetime(value: Optional[str]) -> Optional[datetime]:
+    """Đọc thời điểm dạng W3C/ISO 8601 (sitemap, Atom) hoặc RFC 822 (RSS), trả về giờ UTC"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        try:
+            parsed = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1].lower()
+
+
+def _child_text(element: ET.Element, name: str) -> Optional[str]:
+    for child in element:
+        if _local_name(child.tag) == name:
+            return (child.text or "").strip()
+    return None
+
+
+class SitemapDiscovery:
+    """
+    Example:
+        >>> discovery = SitemapDiscovery("https://hau.edu.vn/")
+        >>> entries = discovery.discover(since=last_sync_time)   # {url: lastmod | None} hoặc None
+    """
+
+    def __init__(self,
+                 start_url: str,
+                 headers: Dict = None,
+                 timeout: float = 30,
+                 max_sitemaps: int = 50):
+        """
+        Args:
+            start_url: URL gốc của website (chỉ giữ URL cùng website, như prevent_outside)
+            headers: HTTP headers (vd: User-Agent)
+            timeout: Thời gian chờ mỗi request (giây)
+            max_sitemaps: Số file sitemap/feed tối đa được tải trong một lần
+        """
+        parsed = urlparse(start_url)
+        self.start_url = start_url
+        self.base_url = f"{parsed.scheme}://{parsed.netloc}/"
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.max_sitemaps = max_sitemaps
+        self.fetched_documents = 0
+
+    def _get(self, client: httpx.Client, url: str) -> Optional[bytes]:
+        try:
+            response = client.get(url)
+        except httpx.HTTPError:
+            return None
+        if response.status_code != 200:
+            return None
+        content = response.content
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        return content
+
+    def _candidate_sources(self, client: httpx.Client) -> List[str]:
+        candidates = []
+        robots = self._get(client, urljoin(self.base_url, "robots.txt"))
+        if robots:
+            for line in robots.decode("utf-8", errors="ignore").splitlines():
+                if line.lower().startswith("sitemap:"):
+                    candidates.append(line.split(":", 1)[1].strip())
+        candidates += [urljoin(self.base_url, path) for path in SITEMAP_PATHS]
+
+        homepage = self._get(client, self.start_url)
+        if homepage:
+            for tag in FEED_LINK_PATTERN.findall(homepage.decode("utf-8", errors="ignore")):
+                href = HREF_PATTERN.search(tag)
+                if href:
+                    candidates.append(urljoin(self.start_url, href.group(1)))
+        candidates += [urljoin(self.base_url, path) for path in FEED_PATHS]
+        return list(dict.fromkeys(candidates))
+
+    def _parse(self, content: bytes, since: Optional[datetime],
+               entries: Dict[str, Optional[datetime]], pending: List[str]) -> bool:
+        """Đọc một sitemap/feed; trả về False nếu không phải XML hợp lệ"""
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError:
+            return False
+
+        kind = _local_name(root.tag)
+        if kind == "sitemapindex":
+            for sitemap in root:
+                location = _child_text(sitemap, "loc")
+                lastmod = parse_datetime(_child_text(sitemap, "lastmod"))
+                if location and (since is None or lastmod is None or lastmod > since):
+                    pending.append(location)
+        elif kind == "urlset":
+            for url in root:
+                location = _child_text(url, "loc")
+                if location:
+                    entries[location] = parse_datetime(_child_text(url, "lastmod"))
+        elif kind == "rss":
+            for item in root.iter():
+                if _local_name(item.tag) == "item":
+                    link = _child_text(item, "link")
+                    if link:
+                        entries[link] = parse_datetime(_child_text(item, "pubdate"))
+        elif kind == "feed":
+            for entry in root:
+                if _local_name(entry.tag) != "entry":
+                    continue
+                link = next((child.get("href") for child in entry
+                             if _local_name(child.tag) == "link" and child.get("rel", "alternate") == "alternate"), None)
+                if link:
+                    entries[link] = parse_datetime(_child_text(entry, "updated") or _child_text(entry, "published"))
+        else:
+            return False
+        return True
+
+    def discover(self, since: Optional[datetime] = None) -> Optional[Dict[str, Optional[datetime]]]:
+        """
+        Gom URL từ mọi sitemap/feed tìm được
+
+        Args:
+            since: Mốc thời gian lần đồng bộ trước (để bỏ qua sitemap con không đổi)
+
+        Returns:
+            Dict url -> lastmod (None nếu không rõ), chỉ gồm URL cùng website.
+            None nếu website không có sitemap/feed nào (bên gọi nên quét đệ quy thay thế).
+        """
+        entries: Dict[str, Optional[datetime]] = {}
+        found = False
+        self.fetched_documents = 0
+        with httpx.Client(headers=self.headers, timeout=self.timeout, follow_redirects=True) as client:
+            pending = self._candidate_sources(client)
+            visited = set()
+            while pending and self.fetched_documents < self.max_sitemaps:
+                location = pending.pop(0)
+                if location in visited:
+                    continue
+                visited.add(location)
+                content = self._get(client, location)
+                if content is None:
+                    continue
+                self.fetched_documents += 1
+                if self._parse(content, since, entries, pending):
+                    found = True
+
+        if not found:
+            return None
+        return {url: lastmod for url, lastmod in entries.items() if url.startswith(self.base_url)}
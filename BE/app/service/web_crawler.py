@@ -0,0 +1,391 @@
+"""
+🕸️ WEB_CRAWLER.PY
+Chuyên trách: Thu thập trang web song song (asyncio + httpx) thay cho RecursiveUrlLoader tuần tự
+
+- Một HTTP client dùng chung (connection pool, keep-alive) cho toàn bộ lần quét
+- Giới hạn số request đồng thời (toàn cục và theo từng host) + khoảng nghỉ lịch sự giữa các request
+- Cùng ngữ nghĩa với RecursiveUrlLoader: trang gốc có độ sâu 0, chỉ tải trang có độ sâu < max_depth,
+  prevent_outside chỉ đi theo link cùng website (base_url mặc định = scheme://host/ của URL gốc),
+  dùng chung extract_sub_links
+- Trang chậm chỉ chiếm một luồng tải, không làm đứng cả lần đồng bộ
+- Tải có điều kiện (If-None-Match / If-Modified-Since): trang trả về 304 không tải nội dung,
+  không phân tích HTML, và dùng lại danh sách link đã lưu để đi tiếp
+- Hàng đợi bền vững (CrawlFrontier): URL đã phát hiện được lưu dần vào danh mục, lần quét bị
+  gián đoạn (tắt server, hết ngân sách) sẽ tiếp tục từ các URL chưa xử lý thay vì quét lại từ đầu
+- Ngân sách mỗi lần chạy: số trang tối đa / thời gian tối đa
+- Ghi nhận URL đã bị gỡ (404/410) hoặc chuyển hướng ra ngoài website (gone_urls) để dọn khỏi chỉ mục
+"""
+
+import time
+import asyncio
+from collections import defaultdict
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+from langchain_core.documents import Document
+from langchain_core.utils.html import extract_sub_links
+
+_CRAWL_DONE = object()
+
+# Mã trạng thái xác nhận trang đã bị gỡ
+GONE_STATUSES = (404, 410)
+
+
+def page_metadata(raw_html: str, url: str, content_type: str) -> Dict:
+    """Metadata giống RecursiveUrlLoader: source, content_type, title, description, language"""
+    metadata = {"source": url, "content_type": content_type}
+    soup = BeautifulSoup(raw_html, "html.parser")
+    if title := soup.find("title"):
+        metadata["title"] = title.get_text()
+    if description := soup.find("meta", attrs={"name": "description"}):
+        metadata["description"] = description.get("content", None)
+    if html := soup.find("html"):
+        metadata["language"] = html.get("lang", None)
+    return metadata
+
+
+def probe_urls(urls: List[str],
+               base_url: str = None,
+               headers: Dict = None,
+               timeout: float = 30,
+               max_concurrency: int = 8) -> Dict[str, bool]:
+    """
+    Kiểm tra lại các URL (GET, theo chuyển hướng) để xác nhận trang đã bị gỡ
+
+    Returns:
+        Dict url -> True nếu trang trả về 404/410 hoặc chuyển hướng ra ngoài base_url.
+        Lỗi mạng / lỗi server được coi là chưa xác nhận (False), để không xóa nhầm khi website tạm lỗi.
+    """
+    async def probe_all() -> Dict[str, bool]:
+        semaphore = asyncio.Semaphore(max_concurrency)
+        limits = httpx.Limits(max_connections=max_concurrency, max_keepalive_connections=max_concurrency)
+        async with httpx.AsyncClient(headers=headers or {}, timeout=timeout, limits=limits,
+                                     follow_redirects=True) as client:
+            async def probe(url: str) -> bool:
+                async with semaphore:
+                    try:
+                        response = await client.get(url)
+                    except httpx.HTTPError:
+                        return False
+                if response.status_code in GONE_STATUSES:
+                    return True
+                return bool(base_url) and response.status_code < 400 and not str(response.url).startswith(base_url)
+
+            results = await asyncio.gather(*(probe(url) for url in urls))
+        return dict(zip(urls, results))
+
+    if not urls:
+        return {}
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(probe_all())
+    finally:
+        loop.close()
+
+
+class CrawlFrontier:
+    """
+    Hàng đợi URL của một lần quét, lưu trong IngestionCatalog (bảng crawl_frontier)
+
+    URL được ghi khi vào hàng đợi và đánh dấu xong khi đã xử lý. Trang trả về Document chỉ được
+    đánh dấu xong bởi bên gọi (sau khi đã nạp vào Vector Store), để trang đang xử lý dở được tải lại.
+
+    Example:
+        >>> frontier = CrawlFrontier(catalog, "full:https://hau.edu.vn/")
+        >>> crawler = AsyncWebCrawler(url, frontier=frontier, max_pages=500)
+        >>> for doc in crawler.lazy_load():
+        ...     process(doc); frontier.mark_done(doc.metadata["source"])
+        >>> if not crawler.stats["budget_exhausted"]:
+        ...     frontier.clear()
+    """
+
+    def __init__(self, catalog, run_key: str):
+        self.catalog = catalog
+        self.run_key = run_key
+
+    def load(self) -> Tuple[List[Tuple[str, int]], set]:
+        """(các URL chưa xử lý kèm độ sâu, tập mọi URL đã phát hiện)"""
+        entries = self.catalog.load_frontier(self.run_key)
+        pending = [(url, depth) for url, depth, done in entries if not done]
+        return pending, {url for url, _, _ in entries}
+
+    def add(self, entries: List[Tuple[str, int]]) -> None:
+        if entries:
+            self.catalog.add_frontier(self.run_key, entries)
+
+    def mark_done(self, url: str) -> None:
+        self.catalog.mark_frontier_done(self.run_key, url)
+
+    def clear(self) -> None:
+        self.catalog.clear_frontier(self.run_key)
+
+
+class AsyncWebCrawler:
+    """
+    Nhện web bất đồng bộ
+
+    Example:
+        >>> crawler = AsyncWebCrawler("https://hau.edu.vn/", max_depth=2, extractor=clean_html)
+        >>> for doc in crawler.lazy_load():   # dùng được trong code đồng bộ
+        ...     print(doc.metadata["source"])
+    """
+
+    def __init__(self,
+                 start_url: str,
+                 max_depth: int = 2,
+                 extractor: Callable[[str], str] = None,
+                 prevent_outside: bool = True,
+                 base_url: str = None,
+                 timeout: float = 30,
+                 headers: Dict = None,
+                 max_concurrency: int = 8,
+                 per_host_concurrency: int = 4,
+                 politeness_delay: float = 0.25,
+                 validator_lookup: Callable[[str], Optional[Dict]] = None,
+                 on_not_modified: Callable[[str], None] = None,
+                 on_failed: Callable[[str], None] = None,
+                 seed_urls: List[str] = None,
+                 frontier: CrawlFrontier = None,
+                 max_pages: int = None,
+                 max_seconds: float = None):
+        """
+        Args:
+            start_url: URL bắt đầu quét
+            max_depth: Độ sâu tối đa (trang gốc = 0, chỉ tải trang có độ sâu < max_depth)
+            extractor: Hàm lấy nội dung văn bản từ HTML. Mặc định: giữ nguyên HTML
+            prevent_outside: Chỉ đi theo link nằm dưới base_url
+            base_url: Tiền tố giới hạn link. Mặc định: scheme://host/ của start_url (như RecursiveUrlLoader)
+            timeout: Thời gian chờ mỗi request (giây)
+            headers: HTTP headers (vd: User-Agent)
+            max_concurrency: Số request đồng thời tối đa
+            per_host_concurrency: Số request đồng thời tối đa tới cùng một host
+            politeness_delay: Khoảng cách tối thiểu giữa hai lần bắt đầu request tới cùng một host (giây)
+            validator_lookup: Hàm url -> {"etag", "last_modified", "links"} của lần tải trước (hoặc None).
+                              Chỉ gửi request có điều kiện khi đã lưu links, để trang 304 vẫn đi tiếp được
+            on_not_modified: Callback khi trang trả về 304 (không có Document nào được tạo)
+            on_failed: Callback khi không lấy được nội dung trang (lỗi tải, HTTP >= 400, trích xuất rỗng)
+            seed_urls: Danh sách URL bắt đầu (độ sâu 0) thay cho start_url, vd: URL lấy từ sitemap.
+                       Với max_depth=1 chỉ tải đúng các URL này
+            frontier: Hàng đợi bền vững. Nếu còn URL chưa xử lý từ lần trước thì quét tiếp từ đó
+                      (seed mới chưa có trong hàng đợi vẫn được thêm vào)
+            max_pages: Số request tối đa trong lần chạy này (None = không giới hạn)
+            max_seconds: Thời gian quét tối đa (giây). Hết ngân sách thì dừng tải, URL còn lại
+                         vẫn nằm trong frontier cho lần chạy sau
+
+        Document trả về có metadata "etag", "last_modified", "links" để bên gọi lưu lại cho lần sau.
+        """
+        self.start_url = start_url
+        self.max_depth = max_depth
+        self.extractor = extractor or (lambda html: html)
+        self.prevent_outside = prevent_outside
+        parsed = urlparse(start_url)
+        self.base_url = base_url or f"{parsed.scheme}://{parsed.netloc}/"
+        self.timeout = timeout
+        self.headers = headers or {}
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.politeness_delay = politeness_delay
+        self.validator_lookup = validator_lookup
+        self.on_not_modified = on_not_modified
+        self.on_failed = on_failed
+        self.seed_urls = seed_urls
+        self.frontier = frontier
+        self.max_pages = max_pages
+        self.max_seconds = max_seconds
+        self.stats = {}
+        self.gone_urls = set()
+
+    async def _wait_turn(self, host: str) -> None:
+        """Giãn cách các request tới cùng một host ít nhất politeness_delay giây"""
+        loop = asyncio.get_running_loop()
+        async with self._host_locks[host]:
+            delay = self._next_request_at.get(host, 0.0) - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request_at[host] = loop.time() + self.politeness_delay
+
+    def _conditional_headers(self, url: str) -> Tuple[Dict, Optional[List[str]]]:
+        """Header tải có điều kiện và danh sách link đã lưu của URL"""
+        previous = self.validator_lookup(url) if self.validator_lookup else None
+        if not previous or previous.get("links") is None:
+            return {}, None
+        headers = {}
+        if previous.get("etag"):
+            headers["If-None-Match"] = previous["etag"]
+        if previous.get("last_modified"):
+            headers["If-Modified-Since"] = previous["last_modified"]
+        return headers, previous["links"]
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str, headers: Dict = None) -> httpx.Response:
+        host = urlparse(url).netloc
+        async with self._host_slots[host]:
+            await self._wait_turn(host)
+            response = await client.get(url, headers=headers)
+        self.stats["bytes"] += len(response.content)
+        if response.status_code in GONE_STATUSES:
+            self.gone_urls.add(url)
+        if response.status_code >= 400:
+            raise ValueError(f"HTTP {response.status_code}")
+        if self.prevent_outside and not str(response.url).startswith(self.base_url):
+            self.gone_urls.add(url)
+            raise ValueError(f"chuyển hướng ra ngoài website: {response.url}")
+        return response
+
+    def _enqueue_links(self, links: List[str], depth: int, frontier: asyncio.Queue, seen: set) -> None:
+        if depth + 1 >= self.max_depth:
+            return
+        new_entries = [(link, depth + 1) for link in dict.fromkeys(links) if link not in seen]
+        if self.frontier:
+            self.frontier.add(new_entries)
+        for entry in new_entries:
+            seen.add(entry[0])
+            frontier.put_nowait(entry)
+
+    def _budget_exhausted(self) -> bool:
+        if self.max_pages is not None and self._dispatched >= self.max_pages:
+            return True
+        if self.max_seconds is not None and time.time() - self._started_at >= self.max_seconds:
+            return True
+        return False
+
+    def _mark_done(self, url: str) -> None:
+        if self.frontier:
+            self.frontier.mark_done(url)
+
+    async def _worker(self, client: httpx.AsyncClient, frontier: asyncio.Queue,
+                      results: asyncio.Queue, seen: set) -> None:
+        while True:
+            url, depth = await frontier.get()
+            if self._budget_exhausted():
+                # Không tải nữa, URL vẫn ở trạng thái chưa xử lý trong frontier
+                self.stats["budget_exhausted"] = True
+                frontier.task_done()
+                continue
+            self._dispatched += 1
+            try:
+                headers, stored_links = self._conditional_headers(url)
+                response = await self._fetch(client, url, headers)
+                self.stats["fetched"] += 1
+
+                if response.status_code == 304:
+                    # Không đổi: không tải nội dung, không phân tích, đi tiếp bằng link đã lưu
+                    self.stats["not_modified"] += 1
+                    if self.on_not_modified:
+                        self.on_not_modified(url)
+                    self._enqueue_links(stored_links, depth, frontier, seen)
+                    self._mark_done(url)
+                    continue
+
+                content_type = response.headers.get("Content-Type", "")
+                if content_type and "html" not in content_type and "text" not in content_type:
+                    self._mark_done(url)
+                    continue  # Bỏ qua file nhị phân (ảnh, tài liệu...)
+
+                raw_html = response.text
+                links = extract_sub_links(
+                    raw_html,
+                    url,
+                    base_url=self.base_url,
+                    prevent_outside=self.prevent_outside,
+                    continue_on_failure=True
+                )
+                content = self.extractor(raw_html)
+                self._enqueue_links(links, depth, frontier, seen)
+                if content:
+                    metadata = page_metadata(raw_html, url, content_type)
+                    metadata["etag"] = response.headers.get("ETag")
+                    metadata["last_modified"] = response.headers.get("Last-Modified")
+                    metadata["links"] = sorted(links)
+                    await results.put(Document(page_content=content, metadata=metadata))
+                else:
+                    self.stats["empty"] += 1
+                    self._mark_done(url)
+                    if self.on_failed:
+                        self.on_failed(url)
+                    print(f"⚠️ Không trích xuất được nội dung từ {url} ({len(raw_html)} ký tự HTML), bỏ qua")
+            except Exception as e:
+                self.stats["failed"] += 1
+                self._mark_done(url)
+                print(f"⚠️ Không tải được {url}: {e.__class__.__name__} {e}")
+                if self.on_failed:
+                    self.on_failed(url)
+            finally:
+                frontier.task_done()
+
+    async def crawl(self) -> AsyncIterator[Document]:
+        """Quét theo chiều rộng, trả Document ngay khi từng trang tải xong"""
+        self.stats = {"fetched": 0, "not_modified": 0, "failed": 0, "empty": 0, "bytes": 0, "elapsed_seconds": 0.0,
+                      "resumed": 0, "budget_exhausted": False}
+        self.gone_urls = set()
+        self._host_slots = defaultdict(lambda: asyncio.Semaphore(self.per_host_concurrency))
+        self._host_locks = defaultdict(asyncio.Lock)
+        self._next_request_at: Dict[str, float] = {}
+        start_time = self._started_at = time.time()
+        self._dispatched = 0
+
+        if self.max_depth <= 0:
+            return
+
+        frontier: asyncio.Queue = asyncio.Queue()
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.max_concurrency * 2)
+        seeds = self.seed_urls if self.seed_urls is not None else [self.start_url]
+        if self.prevent_outside:
+            seeds = [url for url in seeds if url.startswith(self.base_url)]
+        pending, seen = self.frontier.load() if self.frontier else ([], set())
+        if pending:
+            # Lần quét trước bị gián đoạn: tiếp tục từ các URL chưa xử lý
+            self.stats["resumed"] = len(pending)
+            print(f"↩️  Quét tiếp {len(pending)} URL còn lại từ lần chạy trước")
+        else:
+            if self.frontier:
+                self.frontier.clear()
+            seen = set()
+        new_seeds = [(url, 0) for url in dict.fromkeys(seeds) if url not in seen]
+        if self.frontier:
+            self.frontier.add(new_seeds)
+        for url, depth in pending + new_seeds:
+            seen.add(url)
+            frontier.put_nowait((url, depth))
+
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        async with httpx.AsyncClient(headers=self.headers, timeout=self.timeout, limits=limits,
+                                     follow_redirects=True) as client:
+            async def finish_when_idle():
+                await frontier.join()
+                await results.put(_CRAWL_DONE)
+
+            tasks = [asyncio.create_task(self._worker(client, frontier, results, seen))
+                     for _ in range(self.max_concurrency)]
+            tasks.append(asyncio.create_task(finish_when_idle()))
+            try:
+                while True:
+                    item = await results.get()
+                    if item is _CRAWL_DONE:
+                        break
+                    yield item
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                self.stats["elapsed_seconds"] = time.time() - start_time
+
+    def lazy_load(self) -> Iterator[Document]:
+        """
+        Giao diện đồng bộ giống RecursiveUrlLoader.lazy_load.
+        Vòng lặp sự kiện chạy trong lúc chờ trang tiếp theo, nên nên đọc kết quả qua
+        bounded_stage để việc tải không phải dừng khi bên xử lý đang bận.
+        """
+        loop = asyncio.new_event_loop()
+        pages = self.crawl()
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(pages.__anext__())
+                except StopAsyncIteration:
+                    break
+        finally:
+            loop.run_until_complete(pages.aclose())
+            loop.close()
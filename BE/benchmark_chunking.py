@@ -0,0 +1,204 @@
+"""
+📏 BENCHMARK_CHUNKING.PY
+Đo hiệu năng và chất lượng của các ChunkingPresets trên các file PDF trong ./data
+
+Với mỗi preset:
+- Tốc độ cắt (ký tự/giây, chunks/giây)
+- Phân bố độ dài chunk (min / p50 / p90 / max / trung bình)
+- Số chunk cần embed, số lần gọi API embedding (theo EMBED_BATCH_SIZE)
+- Dung lượng chỉ mục ước tính (vector float32 + nội dung)
+- Recall@k trên bộ câu hỏi có gán nhãn (benchmark_questions.json)
+
+Recall@k dùng embedding băm (hashing) chạy offline, không cần mạng/API key:
+số tuyệt đối thấp hơn Gemini nhưng đủ để so sánh các preset với nhau.
+
+Chạy: python benchmark_chunking.py [--data ./data] [--k 5] [--repeat 3] [--workers 4]
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import zlib
+import argparse
+from typing import Dict, List
+
+import numpy as np
+
+# Ensure current directory is in sys.path
+sys.path.append(os.getcwd())
+
+from langchain_core.embeddings import Embeddings
+from app.core.config import settings
+from app.service.embedding_service import ChunkingPresets
+from app.service.pdf_service import PDFProcessor, find_pdf_files
+
+PRESETS = ["vietnamese_optimized", "fast_retrieval", "context_rich", "balanced", "legal_structure"]
+
+# Số chiều vector của models/gemini-embedding-001 (dùng để ước tính dung lượng chỉ mục)
+GEMINI_EMBEDDING_DIM = 3072
+
+
+class HashingEmbeddings(Embeddings):
+    """Embedding offline: băm từ đơn + cặp từ vào vector cố định, chuẩn hóa L2"""
+
+    def __init__(self, dim: int = 2048):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for term in words + [f"{a} {b}" for a, b in zip(words, words[1:])]:
+            vector[zlib.crc32(term.encode("utf-8")) % self.dim] += 1.0
+        vector = np.log1p(vector)
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_documents(data_dir: str) -> List:
+    """Đọc toàn bộ PDF (gán source là đường dẫn tương đối như khi nạp thật)"""
+    processor = PDFProcessor(data_dir)
+    documents = []
+    for pdf_path, pages, error in processor.iter_parsed(find_pdf_files(data_dir)):
+        if error:
+            print(f"⚠️ Bỏ qua {pdf_path}: {error}")
+            continue
+        source = processor.relative_name(pdf_path)
+        for page in pages:
+            page.metadata["source"] = source
+        documents.extend(pages)
+    return documents
+
+
+def percentile(sorted_values: List[int], p: float) -> int:
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, int(round(p * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def recall_at_k(chunks: List, questions: List[Dict], embeddings: Embeddings, k: int) -> float:
+    """Tỷ lệ câu hỏi có ít nhất một chunk chứa đoạn bằng chứng nằm trong top-k"""
+    if not questions or not chunks:
+        return 0.0
+    matrix = np.array(embeddings.embed_documents([c.page_content for c in chunks]), dtype=np.float32)
+    normalized_chunks = [normalize(c.page_content) for c in chunks]
+    hits = 0
+    for item in questions:
+        query = np.array(embeddings.embed_query(item["question"]), dtype=np.float32)
+        top_k = np.argsort(-(matrix @ query))[:k]
+        evidence = normalize(item["evidence"])
+        if any(evidence in normalized_chunks[i] for i in top_k):
+            hits += 1
+    return hits / len(questions)
+
+
+def benchmark_preset(name: str, documents: List, questions: List[Dict],
+                     embeddings: Embeddings, k: int, repeat: int, workers: int = 1) -> Dict:
+    chunker = getattr(ChunkingPresets, name)()
+    chunker.configure(max_workers=workers)
+    total_chars = sum(len(doc.page_content) for doc in documents)
+
+    # Lấy thời gian nhanh nhất trong các lần chạy để giảm nhiễu
+    best = float("inf")
+    chunks = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        chunks = chunker.split_documents(documents)
+        best = min(best, time.perf_counter() - start)
+    best = max(best, 1e-9)
+    chunker.close()
+
+    sizes = sorted(len(c.page_content) for c in chunks)
+    text_bytes = sum(len(c.page_content.encode("utf-8")) for c in chunks)
+    vector_bytes = len(chunks) * GEMINI_EMBEDDING_DIM * 4
+
+    return {
+        "preset": name,
+        "chunk_size": chunker.chunk_size,
+        "chunk_overlap": chunker.chunk_overlap,
+        "chunks": len(chunks),
+        "split_seconds": round(best, 4),
+        "chars_per_sec": round(total_chars / best),
+        "chunks_per_sec": round(len(chunks) / best),
+        "size_min": sizes[0] if sizes else 0,
+        "size_p50": percentile(sizes, 0.5),
+        "size_p90": percentile(sizes, 0.9),
+        "size_max": sizes[-1] if sizes else 0,
+        "size_avg": round(sum(sizes) / len(sizes)) if sizes else 0,
+        "embed_requests": math.ceil(len(chunks) / settings.EMBED_BATCH_SIZE),
+        "index_size_mb": round((vector_bytes + text_bytes) / (1024 * 1024), 2),
+        f"recall@{k}": round(recall_at_k(chunks, questions, embeddings, k), 3),
+    }
+
+
+def print_report(results: List[Dict], k: int) -> None:
+    print("\n" + "=" * 118)
+    print("📊 KẾT QUẢ BENCHMARK CHUNKING")
+    print("=" * 118)
+    print(f"{'Preset':<22}{'Size/Ovl':>10}{'Chunks':>8}{'Ký tự/s':>13}{'min/p50/p90/max':>22}"
+          f"{'TB':>6}{'API':>6}{'Index MB':>10}{f'R@{k}':>8}")
+    print("-" * 118)
+    for r in results:
+        distribution = f"{r['size_min']}/{r['size_p50']}/{r['size_p90']}/{r['size_max']}"
+        print(f"{r['preset']:<22}{str(r['chunk_size']) + '/' + str(r['chunk_overlap']):>10}{r['chunks']:>8}"
+              f"{r['chars_per_sec']:>13,}{distribution:>22}{r['size_avg']:>6}{r['embed_requests']:>6}"
+              f"{r['index_size_mb']:>10}{r[f'recall@{k}']:>8}")
+    print("=" * 118)
+    print(f"API = số lần gọi embedding (lô {settings.EMBED_BATCH_SIZE} chunks); "
+          f"Index MB = vector {GEMINI_EMBEDDING_DIM} chiều float32 + nội dung (ước tính)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark các ChunkingPresets trên PDF trong thư mục dữ liệu")
+    parser.add_argument("--data", default="./data", help="Thư mục chứa PDF")
+    parser.add_argument("--questions", default="./benchmark_questions.json", help="Bộ câu hỏi có gán nhãn")
+    parser.add_argument("--k", type=int, default=5, help="Số kết quả truy xuất (recall@k)")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần cắt để lấy thời gian tốt nhất")
+    parser.add_argument("--workers", type=int, default=1, help="Số tiến trình cắt song song")
+    parser.add_argument("--presets", nargs="+", default=PRESETS, choices=PRESETS)
+    parser.add_argument("--json", dest="json_output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    print("=== BENCHMARK CHUNKING ===\n")
+    documents = load_documents(args.data)
+    if not documents:
+        print(f"❌ Không có tài liệu PDF nào trong {args.data}")
+        return
+    total_chars = sum(len(doc.page_content) for doc in documents)
+    print(f"📄 {len(documents)} trang, {total_chars:,} ký tự")
+
+    questions = []
+    if os.path.exists(args.questions):
+        with open(args.questions, "r", encoding="utf-8") as f:
+            questions = json.load(f)
+    print(f"❓ {len(questions)} câu hỏi có gán nhãn (recall@{args.k})")
+
+    embeddings = HashingEmbeddings()
+    results = []
+    for name in args.presets:
+        print(f"⏳ Đang đo preset: {name}...")
+        results.append(benchmark_preset(name, documents, questions, embeddings,
+                                        args.k, args.repeat, args.workers))
+
+    print_report(results, args.k)
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã ghi kết quả ra {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+🧽 BENCHMARK_HTML_EXTRACTION.PY
+So sánh các cách trích xuất nội dung HTML (HtmlExtractor) trên các trang web đã lưu
+
+Với mỗi cách trích xuất:
+- Thời gian xử lý mỗi trang (ms, lấy lần chạy nhanh nhất)
+- Số ký tự / số từ đầu ra (số từ ~ số token phải embed)
+- Tỷ lệ "dòng rác": dòng lặp lại ở >= 50% số trang (menu, footer, sidebar... còn sót)
+- Số trang tìm được vùng nội dung chính bằng selector CMS / mật độ văn bản / phải dùng cả body
+
+Trang mẫu: các file .html trong --pages. Nếu thư mục trống có thể tải về bằng --url
+(dùng AsyncWebCrawler, lưu HTML gốc để các lần đo sau chạy offline).
+
+Trước khi đo, mỗi cách trích xuất được kiểm tra trên FIXTURES (bố cục dễ làm mất nội dung,
+vd: trang ASP.NET bọc cả trang trong <form id="form1">): đầu ra phải chứa đoạn văn mong đợi.
+
+Chạy: python benchmark_html_extraction.py [--pages ./data/html_pages] [--url https://hau.edu.vn/ --limit 50]
+"""
+
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from collections import Counter
+from typing import Dict, List
+
+# Ensure current directory is in sys.path
+sys.path.append(os.getcwd())
+
+from app.service.html_extractor import HtmlExtractor
+from app.service.web_crawler import AsyncWebCrawler
+
+# Tên hiển thị -> cấu hình HtmlExtractor
+EXTRACTORS = {
+    "bs4 (hiện tại)": {"engine": "bs4"},
+    "lxml": {"engine": "lxml", "main_content": False},
+    "lxml + nội dung chính": {"engine": "lxml", "main_content": True},
+}
+
+ARTICLE_TEXT = ("Thí sinh nộp hồ sơ xét tuyển trực tuyến trên cổng tuyển sinh của trường, "
+                "thời hạn nộp hồ sơ đến hết ngày 30 tháng 7, lệ phí xét tuyển 30.000 đồng mỗi nguyện vọng.")
+
+# Tên -> (HTML, đoạn văn bắt buộc phải có trong kết quả)
+FIXTURES = {
+    "aspnet-form-wrapper": ("""
+        <html><body><form method="post" action="./tin-tuc.aspx" id="form1">
+          <input type="hidden" name="__VIEWSTATE" value="dDwtMTA4MTY1NjQ0Mzs7Pg==" />
+          <div class="menu"><a href="/">Trang chủ</a> <a href="/tuyen-sinh">Tuyển sinh</a></div>
+          <form class="search-box"><input name="q" /><span>Tìm kiếm</span></form>
+          <div class="news-detail"><h1>Thông báo tuyển sinh</h1>
+            <p>""" + ARTICLE_TEXT + """</p><p>""" + ARTICLE_TEXT + """</p></div>
+          <div class="footer">Bản quyền thuộc về Trường Đại học Kiến trúc Hà Nội</div>
+        </form></body></html>""", "lệ phí xét tuyển 30.000 đồng"),
+    "search-form-only-small": ("""
+        <html><body><div class="content-detail"><p>""" + ARTICLE_TEXT + """</p><p>""" + ARTICLE_TEXT + """</p></div>
+          <form><input name="q" /><span>Nhập từ khóa tìm kiếm</span></form></body></html>""",
+        "cổng tuyển sinh của trường"),
+}
+
+
+def download_pages(url: str, pages_dir: str, limit: int) -> int:
+    """Tải HTML gốc (không trích xuất) và lưu vào pages_dir"""
+    os.makedirs(pages_dir, exist_ok=True)
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                             "(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"}
+    crawler = AsyncWebCrawler(url, max_depth=2, headers=headers)
+    saved = 0
+    for doc in crawler.lazy_load():
+        name = hashlib.md5(doc.metadata["source"].encode("utf-8")).hexdigest()[:12] + ".html"
+        with open(os.path.join(pages_dir, name), "w", encoding="utf-8") as f:
+            f.write(doc.page_content)
+        saved += 1
+        if saved >= limit:
+            break
+    return saved
+
+
+def load_pages(pages_dir: str) -> List[str]:
+    if not os.path.isdir(pages_dir):
+        return []
+    pages = []
+    for name in sorted(os.listdir(pages_dir)):
+        if name.endswith((".html", ".htm")):
+            with open(os.path.join(pages_dir, name), "r", encoding="utf-8", errors="ignore") as f:
+                pages.append(f.read())
+    return pages
+
+
+def check_fixtures() -> bool:
+    """Mọi cách trích xuất phải giữ được đoạn văn mong đợi của từng trang mẫu"""
+    passed = True
+    for name, config in EXTRACTORS.items():
+        extractor = HtmlExtractor(**config)
+        for fixture, (page, expected) in FIXTURES.items():
+            if expected not in extractor(page):
+                print(f"❌ {name}: trang mẫu '{fixture}' bị mất nội dung")
+                passed = False
+    if passed:
+        print(f"✅ {len(FIXTURES)} trang mẫu: không cách trích xuất nào làm mất nội dung")
+    return passed
+
+
+def benchmark_extractor(name: str, config: Dict, pages: List[str], repeat: int) -> Dict:
+    best = float("inf")
+    outputs = []
+    extractor = None
+    for _ in range(repeat):
+        extractor = HtmlExtractor(**config)
+        start = time.perf_counter()
+        outputs = [extractor(page) for page in pages]
+        best = min(best, time.perf_counter() - start)
+
+    # Dòng xuất hiện ở >= 50% số trang coi là phần giao diện lặp lại
+    line_pages = Counter()
+    for text in outputs:
+        line_pages.update(set(text.splitlines()))
+    threshold = max(2, len(pages) / 2)
+    repeated = {line for line, count in line_pages.items() if count >= threshold}
+    total_chars = sum(len(text) for text in outputs)
+    repeated_chars = sum(len(line) for text in outputs for line in text.splitlines() if line in repeated)
+
+    return {
+        "extractor": name,
+        "ms_per_page": round(best * 1000 / len(pages), 2),
+        "chars": total_chars,
+        "words": sum(len(text.split()) for text in outputs),
+        "repeated_ratio": round(repeated_chars / total_chars, 3) if total_chars else 0.0,
+        "empty_pages": sum(1 for text in outputs if not text),
+        "modes": {key: extractor.stats[key] for key in ("selector", "density", "fallback")},
+    }
+
+
+def print_report(results: List[Dict], page_count: int) -> None:
+    baseline = results[0]
+    print("\n" + "=" * 104)
+    print(f"📊 KẾT QUẢ TRÍCH XUẤT HTML ({page_count} trang)")
+    print("=" * 104)
+    print(f"{'Cách trích xuất':<24}{'ms/trang':>10}{'Tăng tốc':>10}{'Số từ':>11}{'Giảm':>8}"
+          f"{'Dòng rác':>10}{'Trống':>7}   selector/mật độ/body")
+    print("-" * 104)
+    for r in results:
+        speedup = baseline["ms_per_page"] / r["ms_per_page"] if r["ms_per_page"] else 0
+        reduction = 1 - r["words"] / baseline["words"] if baseline["words"] else 0
+        modes = "/".join(str(r["modes"][key]) for key in ("selector", "density", "fallback"))
+        print(f"{r['extractor']:<24}{r['ms_per_page']:>10}{speedup:>9.1f}x{r['words']:>11,}{reduction:>8.0%}"
+              f"{r['repeated_ratio']:>10.1%}{r['empty_pages']:>7}   {modes}")
+    print("=" * 104)
+    print("Dòng rác = tỷ lệ ký tự nằm trên các dòng lặp lại ở >= 50% số trang (menu, footer... còn sót)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark trích xuất nội dung HTML trên các trang đã lưu")
+    parser.add_argument("--pages", default="./data/html_pages", help="Thư mục chứa file .html")
+    parser.add_argument("--url", help="Tải trang từ website này nếu thư mục --pages trống")
+    parser.add_argument("--limit", type=int, default=50, help="Số trang tối đa khi tải về")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy để lấy thời gian tốt nhất")
+    parser.add_argument("--json", dest="json_output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    print("=== BENCHMARK TRÍCH XUẤT HTML ===\n")
+    check_fixtures()
+    pages = load_pages(args.pages)
+    if not pages and args.url:
+        print(f"⏳ Đang tải tối đa {args.limit} trang từ {args.url} vào {args.pages}...")
+        download_pages(args.url, args.pages, args.limit)
+        pages = load_pages(args.pages)
+    if not pages:
+        print(f"❌ Không có trang HTML nào trong {args.pages} (dùng --url để tải về)")
+        return
+    print(f"📄 {len(pages)} trang, {sum(len(p) for p in pages):,} ký tự HTML")
+
+    results = [benchmark_extractor(name, config, pages, args.repeat) for name, config in EXTRACTORS.items()]
+    print_report(results, len(pages))
+
+    if args.json_output:
+        with open(args.json_output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f"💾 Đã ghi kết quả ra {args.json_output}")
+
+
+if __name__ == "__main__":
+    main()
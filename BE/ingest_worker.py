@@ -0,0 +1,21 @@
+from app.core.config import settings
+from app.service.job_queue import job_queue
+from app.service.ingest_worker import IngestWorker
+from app.service.rag_service import rag_service
+
+if __name__ == "__main__":
+    print("--- KHỞI ĐỘNG WORKER NẠP DỮ LIỆU ---")
+    
+    # Worker chạy ở tiến trình riêng: nhận job từ hàng đợi mà API (/ingest, /ingest/web) đã ghi vào
+    worker = IngestWorker(
+        job_queue,
+        rag_service,
+        max_concurrent_jobs=settings.INGEST_MAX_CONCURRENT_JOBS,
+        poll_interval=settings.JOB_POLL_INTERVAL,
+        max_attempts=settings.JOB_MAX_ATTEMPTS
+    )
+    try:
+        worker.run_forever()
+    except KeyboardInterrupt:
+        worker.stop()
+        print("\n--- ĐÃ DỪNG WORKER ---")
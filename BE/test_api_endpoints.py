@@ -1,6 +1,7 @@
 import requests
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://127.0.0.1:8000"
 
@@ -34,17 +35,141 @@ def test_chat():
     except Exception as e:
         print(f"❌ Chat Request Error: {e}")
 
+def test_answer_cache():
+    print("\nTesting Semantic Answer Cache...")
+    try:
+        timings = []
+        for question in ["Học phí năm nay là bao nhiêu?", "học phí năm nay bao nhiêu"]:
+            start = time.time()
+            requests.post(f"{BASE_URL}/api/v1/ask", json={"question": question})
+            timings.append(time.time() - start)
+        stats = requests.get(f"{BASE_URL}/api/v1/ask/cache/stats").json()
+        print(f"   Lần 1: {timings[0]:.2f}s, lần 2 (diễn đạt khác): {timings[1]:.2f}s")
+        if not stats.get("enabled"):
+            print("⚠️ Cache câu trả lời đang tắt (ANSWER_CACHE_ENABLED=false)")
+        elif stats["hits"] > 0:
+            print(f"✅ Answer Cache Hit: hit rate {stats['hit_rate']:.0%}, {stats['entries']} câu trả lời")
+        else:
+            print(f"❌ Không có cache hit: {stats}")
+    except Exception as e:
+        print(f"❌ Answer Cache Error: {e}")
+
+def test_hybrid_search():
+    print("\nTesting Hybrid Retrieval (vector + BM25)...")
+    try:
+        before = requests.get(f"{BASE_URL}/api/v1/ask/retrieval/stats").json()
+        if before.get("mode") != "hybrid":
+            print("⚠️ Tìm kiếm lai đang tắt (HYBRID_SEARCH_ENABLED=false)")
+            return
+        start = time.time()
+        response = requests.post(f"{BASE_URL}/api/v1/ask", json={"question": "Điều 1"})
+        elapsed = time.time() - start
+        after = requests.get(f"{BASE_URL}/api/v1/ask/retrieval/stats").json()
+        index = after["lexical_index"]
+        print(f"   Chỉ mục từ khóa: {index['chunks']} đoạn, {index['sources']} nguồn, {index['size_mb']} MB")
+        if response.status_code != 200:
+            print(f"❌ Chat Request Failed: {response.status_code}")
+        elif after["lexical_only"] > before["lexical_only"]:
+            print(f"✅ Lexical Fast Path Passed: \"Điều 1\" trả lời trong {elapsed:.2f}s, không cần embed câu hỏi")
+        elif after["hybrid"] > before["hybrid"]:
+            print("⚠️ Không khớp cụm \"Điều 1\" trong dữ liệu, đã dùng tìm kiếm lai")
+        else:
+            print(f"❌ Không ghi nhận lần truy xuất nào: {after}")
+    except Exception as e:
+        print(f"❌ Hybrid Retrieval Error: {e}")
+
 def test_ingest():
     print("\nTesting Ingest Endpoint...")
     try:
         response = requests.post(f"{BASE_URL}/api/v1/ingest", json={"directory_path": "./data"})
         if response.status_code == 200:
-            print("✅ Ingest Request Successful:", response.json())
+            data = response.json()
+            print("✅ Ingest Request Successful:", data)
+            
+            job = requests.get(f"{BASE_URL}/api/v1/ingest/jobs/{data['job_id']}").json()
+            print(f"   ✅ Job {job['job_id']}: status={job['status']}, stage={job['stage']}, progress={job['progress']}")
         else:
             print(f"❌ Ingest Request Failed: {response.status_code} - {response.text}")
     except Exception as e:
         print(f"❌ Ingest Request Error: {e}")
 
+def test_chat_stream():
+    print("\nTesting Streaming Chat Endpoint...")
+    payload = {"question": "hệ thống quản lý"}
+    try:
+        start = time.time()
+        response = requests.post(f"{BASE_URL}/api/v1/ask/stream", json=payload, stream=True, timeout=120)
+        response.encoding = "utf-8"
+        events = []
+        first_token_seconds = None
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+                events.append(event)
+                if event == "token" and first_token_seconds is None:
+                    first_token_seconds = time.time() - start
+        total_seconds = time.time() - start
+        if events and events[0] == "sources" and "token" in events and events[-1] == "done":
+            print(f"✅ Streaming Passed: token đầu tiên sau {first_token_seconds:.2f}s, "
+                  f"hoàn tất sau {total_seconds:.2f}s ({events.count('token')} token)")
+        else:
+            print(f"❌ Streaming Failed: {response.status_code}, events={events[:5]}...")
+    except Exception as e:
+        print(f"❌ Streaming Chat Error: {e}")
+
+# Mỗi request một câu hỏi khác chủ đề: câu trùng/na ná sẽ trúng cache câu trả lời và không đo được xử lý song song.
+# Chạy lại test trên cùng server thì các câu này đã nằm trong cache -> khởi động server với ANSWER_CACHE_ENABLED=false
+CONCURRENT_QUESTIONS = [
+    "Học phí của trường là bao nhiêu?",
+    "Điều kiện để được xét tốt nghiệp là gì?",
+    "Sinh viên được đăng ký tối đa bao nhiêu tín chỉ mỗi học kỳ?",
+    "Quy định về học bổng khuyến khích học tập như thế nào?",
+    "Trường có những ngành đào tạo nào?",
+    "Sinh viên bị cảnh báo học tập khi nào?",
+    "Thủ tục xin bảo lưu kết quả học tập ra sao?",
+    "Thời gian tối đa để hoàn thành chương trình đào tạo là bao lâu?",
+]
+
+def test_concurrent_chat(n=5):
+    print(f"\nTesting {n} Concurrent Chat Requests...")
+    if n + 1 > len(CONCURRENT_QUESTIONS):
+        print(f"❌ Chỉ có {len(CONCURRENT_QUESTIONS)} câu hỏi khác nhau, không đủ cho {n} requests + 1 request đơn")
+        return
+
+    def ask(question):
+        start = time.time()
+        response = requests.post(f"{BASE_URL}/api/v1/ask", json={"question": question})
+        return response.status_code, time.time() - start
+
+    try:
+        status, single_seconds = ask(CONCURRENT_QUESTIONS[0])
+        if status != 200:
+            print(f"❌ Chat Request Failed: {status}")
+            return
+        print(f"   1 request: {single_seconds:.2f}s")
+
+        with ThreadPoolExecutor(max_workers=n) as pool:
+            start = time.time()
+            futures = [pool.submit(ask, question) for question in CONCURRENT_QUESTIONS[1:n + 1]]
+            # Health check gửi trong lúc các câu hỏi đang chạy: không được phải chờ Gemini
+            time.sleep(0.2)
+            health_start = time.time()
+            requests.get(f"{BASE_URL}/")
+            health_seconds = time.time() - health_start
+            results = [f.result() for f in futures]
+            parallel_seconds = time.time() - start
+
+        failed = [status for status, _ in results if status != 200]
+        print(f"   {n} requests song song: {parallel_seconds:.2f}s, health check trong lúc chờ: {health_seconds:.3f}s")
+        if failed:
+            print(f"❌ {len(failed)}/{n} requests thất bại: {failed}")
+        elif parallel_seconds <= single_seconds * 2 and health_seconds < 1:
+            print(f"✅ Concurrent Requests Passed ({parallel_seconds / single_seconds:.1f}x thời gian 1 request)")
+        else:
+            print(f"❌ Requests bị xử lý tuần tự ({parallel_seconds / single_seconds:.1f}x thời gian 1 request)")
+    except Exception as e:
+        print(f"❌ Concurrent Chat Error: {e}")
+
 if __name__ == "__main__":
     # Wait for server to start
     print("Waiting for server to start...")
@@ -52,4 +177,8 @@ if __name__ == "__main__":
     
     test_health()
     test_chat()
+    test_chat_stream()
+    test_concurrent_chat()
+    test_answer_cache()
+    test_hybrid_search()
     test_ingest()
@@ -0,0 +1,148 @@
+"""
+Kiểm tra lọc chunk trùng giữa các nguồn (ChunkDeduplicator + IngestionJournal) với Vector Store giả lập,
+không cần gọi API embedding.
+
+- Nguồn B trùng hoàn toàn với nguồn A: không embed lại chunk nào, nhật ký ghi chunk gốc (duplicate_of)
+- Nguồn A được sửa, bỏ đoạn mà B đang dựa vào: nguồn B được đánh dấu cần nạp lại
+- Nạp lại B: đoạn bị mất được embed từ B, nội dung không biến mất khỏi Vector Store
+- Hai nguồn mới trùng nhau trong cùng một lần chạy: cả hai đều được ghi (chưa có bản gốc đã ghi)
+
+Chạy: python verify_chunk_dedup.py
+"""
+
+import os
+import sys
+import tempfile
+
+# Ensure current directory is in sys.path
+sys.path.append(os.getcwd())
+
+from langchain_core.documents import Document
+
+from app.service.chunk_dedup import ChunkDeduplicator
+from app.service.embedding_writer import EmbeddingWriter
+from app.service.ingestion_catalog import IngestionCatalog
+from app.service.ingestion_journal import IngestionJournal
+from app.service.ingestion_pipeline import IngestionPipeline
+
+PARA_0 = ("Sinh viên phải đăng ký học phần trong thời hạn quy định của nhà trường, "
+          "quá thời hạn này phòng đào tạo không giải quyết các trường hợp đăng ký bổ sung.")
+PARA_1 = ("Học phí được thu theo số tín chỉ đăng ký trong học kỳ, sinh viên nộp học phí "
+          "chậm quá ba mươi ngày sẽ bị tạm dừng quyền đăng ký học phần của học kỳ kế tiếp.")
+PARA_2 = ("Sinh viên có kết quả học tập xuất sắc được xét cấp học bổng khuyến khích học tập "
+          "theo từng học kỳ, mức học bổng do hiệu trưởng quyết định cho từng năm học.")
+
+
+class FakeCollection:
+    """Collection Chroma tối giản: upsert / get(where source) / delete"""
+
+    def __init__(self):
+        self.items = {}
+
+    def upsert(self, ids, embeddings, documents, metadatas):
+        for chunk_id, text, metadata in zip(ids, documents, metadatas):
+            self.items[chunk_id] = (text, metadata)
+
+    def get(self, where=None, include=None, **kwargs):
+        ids = [chunk_id for chunk_id, (_, metadata) in self.items.items()
+               if where is None or metadata.get("source") == where.get("source")]
+        return {"ids": ids}
+
+    def delete(self, ids):
+        for chunk_id in ids:
+            self.items.pop(chunk_id, None)
+
+    def texts(self):
+        return [text for text, _ in self.items.values()]
+
+
+class FakeVectorStore:
+    def __init__(self):
+        self._collection = FakeCollection()
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.embedded = 0
+
+    def embed_documents(self, texts):
+        self.embedded += len(texts)
+        return [[0.0] for _ in texts]
+
+
+class ParagraphChunker:
+    """Mỗi đoạn (ngăn bởi dòng trống) là một chunk"""
+
+    def split_documents(self, docs):
+        return [
+            Document(page_content=paragraph, metadata=dict(doc.metadata))
+            for doc in docs for paragraph in doc.page_content.split("\n\n") if paragraph.strip()
+        ]
+
+
+class Harness:
+    def __init__(self, db_path):
+        self.catalog = IngestionCatalog(db_path)
+        self.vector_store = FakeVectorStore()
+        self.embeddings = FakeEmbeddings()
+
+    def ingest(self, sources):
+        """Một lần nạp như RAGService.ingest_documents: sources = {tên nguồn: nội dung}"""
+        journal = IngestionJournal(self.catalog, self.vector_store)
+        writer = EmbeddingWriter(self.embeddings, self.vector_store, batch_size=10, requests_per_minute=6000)
+        groups = []
+        for source, text in sources.items():
+            journal.expect(source)
+            groups.append([Document(page_content=text, metadata={"source": source})])
+        pipeline = IngestionPipeline(ParagraphChunker(), writer)
+        return pipeline.run(iter(groups), journal=journal, deduplicator=ChunkDeduplicator(self.catalog))
+
+
+def check(condition, message):
+    print(("✅ " if condition else "❌ ") + message)
+    return condition
+
+
+def test_restore_after_original_removed(harness):
+    harness.ingest({"a.pdf": f"{PARA_0}\n\n{PARA_1}"})
+    before = harness.embeddings.embedded
+
+    stats = harness.ingest({"b.pdf": f"{PARA_0}\n\n{PARA_1}"})
+    ok = check(harness.embeddings.embedded == before and stats["dedup"]["dropped"] == 2,
+               f"B trùng hoàn toàn với A: không embed thêm (bỏ {stats['dedup']['dropped']} đoạn trùng)")
+    ok &= check(not harness.catalog.stale_sources(), "Chưa có nguồn nào cần nạp lại")
+
+    # A bỏ đoạn 0 -> chunk gốc của đoạn 0 bị xóa, chunk trùng của B mất bản gốc
+    harness.ingest({"a.pdf": f"{PARA_1}\n\n{PARA_2}"})
+    ok &= check(PARA_0 not in harness.vector_store._collection.texts(),
+                "Sửa A: đoạn 0 không còn trong Vector Store")
+    ok &= check(harness.catalog.stale_sources() == {"b.pdf"}, "B được đánh dấu cần nạp lại")
+
+    # Nạp lại B (file không đổi nhưng nằm trong stale_sources)
+    before = harness.embeddings.embedded
+    harness.ingest({"b.pdf": f"{PARA_0}\n\n{PARA_1}"})
+    ok &= check(PARA_0 in harness.vector_store._collection.texts(), "Nạp lại B: đoạn 0 được khôi phục")
+    ok &= check(harness.embeddings.embedded - before == 1, "Chỉ embed đúng đoạn bị mất (đoạn 1 vẫn trùng với A)")
+    ok &= check(not harness.catalog.stale_sources(), "B không còn bị đánh dấu sau khi nạp xong")
+    return ok
+
+
+def test_same_run_duplicates(harness):
+    before = harness.embeddings.embedded
+    stats = harness.ingest({"c.pdf": "Đoạn văn mới chỉ có trong hai file cùng lần nạp, chưa từng được ghi.",
+                            "d.pdf": "Đoạn văn mới chỉ có trong hai file cùng lần nạp, chưa từng được ghi."})
+    return check(harness.embeddings.embedded - before == 2 and stats["dedup"]["dropped"] == 0,
+                 "Trùng trong cùng lần nạp: cả hai nguồn đều được ghi (không dựa vào chunk chưa ghi xong)")
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        harness = Harness(os.path.join(tmp, "catalog.sqlite3"))
+        ok = test_restore_after_original_removed(harness)
+        ok &= test_same_run_duplicates(harness)
+    print("\n🎉 Tất cả kiểm tra đều đạt" if ok else "\n⚠️ Có kiểm tra không đạt")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
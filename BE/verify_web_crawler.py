@@ -0,0 +1,218 @@
+"""
+Kiểm tra AsyncWebCrawler trên một website giả lập chạy tại máy (http.server), không cần Internet.
+
+- So sánh tập URL thu được với RecursiveUrlLoader (cùng max_depth, prevent_outside)
+- So sánh thời gian khi mỗi trang phản hồi chậm
+- Kiểm tra giới hạn số request đồng thời theo host
+- Kiểm tra tải có điều kiện (ETag -> 304): lần quét thứ hai không tải nội dung trang nào
+- Kiểm tra đọc sitemap (robots.txt -> sitemap index -> sitemap con) và chỉ tải URL ứng viên
+- Kiểm tra ngân sách quét + hàng đợi bền vững: lần chạy bị cắt ngang được quét tiếp, không tải lại trang đã xong
+
+Chạy: python verify_web_crawler.py
+"""
+
+import os
+import sys
+import hashlib
+import time
+import tempfile
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Ensure current directory is in sys.path
+sys.path.append(os.getcwd())
+
+from app.service.web_crawler import AsyncWebCrawler, CrawlFrontier
+from app.service.ingestion_catalog import IngestionCatalog
+from app.service.sitemap_service import SitemapDiscovery
+
+PAGE_DELAY = 0.3
+PER_HOST_LIMIT = 3
+
+# Cây trang: /site/ -> 8 chuyên mục -> mỗi chuyên mục 3 bài viết (độ sâu 2, không được tải với max_depth=2)
+# Link tới host khác (example.invalid) phải bị bỏ qua
+PAGES = {"/site/": [f"/site/muc-{i}.html" for i in range(8)] + ["/other/ngoai-pham-vi.html", "http://example.invalid/"]}
+for i in range(8):
+    PAGES[f"/site/muc-{i}.html"] = [f"/site/muc-{i}/bai-{j}.html" for j in range(3)] + ["/site/"]
+    for j in range(3):
+        PAGES[f"/site/muc-{i}/bai-{j}.html"] = []
+PAGES["/other/ngoai-pham-vi.html"] = []
+
+# Sitemap: sitemap con "tin-tuc" mới cập nhật, sitemap con "luu-tru" cũ (không cần tải lại)
+SITEMAPS = {
+    "/robots.txt": "User-agent: *\nSitemap: {base}/sitemap_index.xml\n",
+    "/sitemap_index.xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        '<sitemap><loc>{base}/sitemap-tin-tuc.xml</loc><lastmod>2026-10-17T08:00:00+07:00</lastmod></sitemap>'
+        '<sitemap><loc>{base}/sitemap-luu-tru.xml</loc><lastmod>2020-01-01</lastmod></sitemap>'
+        '</sitemapindex>'
+    ),
+    "/sitemap-tin-tuc.xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        '<url><loc>{base}/site/muc-0.html</loc><lastmod>2026-10-17</lastmod></url>'
+        '<url><loc>{base}/site/muc-1.html</loc><lastmod>2026-01-01</lastmod></url>'
+        '<url><loc>{base}/site/muc-2.html</loc></url>'
+        '</urlset>'
+    ),
+    "/sitemap-luu-tru.xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        '<url><loc>{base}/site/muc-7.html</loc><lastmod>2019-05-05</lastmod></url>'
+        '</urlset>'
+    ),
+}
+
+active = 0
+max_active = 0
+active_lock = threading.Lock()
+
+
+class SiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        global active, max_active
+        with active_lock:
+            active += 1
+            max_active = max(max_active, active)
+        try:
+            if self.path in SITEMAPS:
+                body = SITEMAPS[self.path].format(base=f"http://{self.headers['Host']}").encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/xml")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            time.sleep(PAGE_DELAY)
+            links = PAGES.get(self.path)
+            if links is None:
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = "".join(f'<a href="{link}">{link}</a>\n' for link in links)
+            html = (f"<html lang='vi'><head><title>{self.path}</title></head>"
+                    f"<body><h1>Trang {self.path}</h1>{body}</body></html>").encode("utf-8")
+            etag = f'"{hashlib.md5(html).hexdigest()}"'
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(html)))
+            self.end_headers()
+            self.wfile.write(html)
+        finally:
+            with active_lock:
+                active -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    global max_active
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    start_url = f"http://127.0.0.1:{server.server_port}/site/"
+    print(f"=== KIỂM TRA NHỆN WEB BẤT ĐỒNG BỘ ({start_url}) ===\n")
+
+    try:
+        # 1. Nhện mới
+        crawler = AsyncWebCrawler(start_url, max_depth=2, max_concurrency=8,
+                                  per_host_concurrency=PER_HOST_LIMIT, politeness_delay=0.0)
+        start = time.time()
+        validators = {}
+        for doc in crawler.lazy_load():
+            validators[doc.metadata["source"]] = {key: doc.metadata[key] for key in ("etag", "last_modified", "links")}
+        async_urls = set(validators)
+        async_seconds = time.time() - start
+        print(f"AsyncWebCrawler: {len(async_urls)} trang trong {async_seconds:.2f}s "
+              f"(tối đa {max_active} request đồng thời)")
+        if max_active <= PER_HOST_LIMIT:
+            print(f"✅ Giới hạn theo host được tôn trọng (<= {PER_HOST_LIMIT})")
+        else:
+            print(f"❌ Vượt giới hạn theo host: {max_active} > {PER_HOST_LIMIT}")
+
+        # 2. Cùng ngữ nghĩa độ sâu / prevent_outside với RecursiveUrlLoader
+        expected = ({start_url} | {start_url + f"muc-{i}.html" for i in range(8)}
+                    | {start_url.replace("/site/", "/other/ngoai-pham-vi.html")})
+        if async_urls == expected:
+            print("✅ Đúng tập trang mong đợi (gốc + 1 tầng, không ra ngoài website)")
+        else:
+            print(f"❌ Sai tập trang: thừa {async_urls - expected}, thiếu {expected - async_urls}")
+
+        # 3. Lần quét thứ hai với ETag đã lưu: mọi trang trả về 304, vẫn đi đủ các trang nhờ link đã lưu
+        not_modified = []
+        crawler = AsyncWebCrawler(start_url, max_depth=2, max_concurrency=8,
+                                  per_host_concurrency=PER_HOST_LIMIT, politeness_delay=0.0,
+                                  validator_lookup=validators.get, on_not_modified=not_modified.append)
+        changed = list(crawler.lazy_load())
+        if not changed and set(not_modified) == async_urls and crawler.stats["bytes"] == 0:
+            print(f"✅ Lần quét lại: {len(not_modified)} trang 304, 0 byte nội dung, 0 trang phải phân tích")
+        else:
+            print(f"❌ Lần quét lại: {len(changed)} trang tải lại, {len(not_modified)} trang 304, "
+                  f"{crawler.stats['bytes']} byte")
+
+        # 4. Sitemap: chỉ đọc sitemap con mới, chỉ tải URL có lastmod sau mốc đồng bộ trước
+        since = datetime(2026, 6, 1, tzinfo=timezone.utc)
+        discovery = SitemapDiscovery(start_url)
+        entries = discovery.discover(since=since)
+        base = start_url.rsplit("/site/", 1)[0]
+        if entries is not None and set(entries) == {f"{base}/site/muc-{i}.html" for i in range(3)}:
+            print(f"✅ Sitemap: {len(entries)} URL từ {discovery.fetched_documents} file (bỏ qua sitemap con cũ)")
+        else:
+            print(f"❌ Sitemap: {entries}")
+        candidates = [url for url, lastmod in (entries or {}).items() if lastmod and lastmod > since]
+        crawler = AsyncWebCrawler(start_url, max_depth=1, seed_urls=candidates, politeness_delay=0.0)
+        fetched = [doc.metadata["source"] for doc in crawler.lazy_load()]
+        if fetched == [f"{base}/site/muc-0.html"]:
+            print("✅ Incremental: chỉ tải 1 trang có lastmod mới, không đi theo link")
+        else:
+            print(f"❌ Incremental: đã tải {fetched}")
+
+        # 5. Ngân sách 4 trang/lần chạy + frontier lưu trong danh mục: các lần chạy sau quét tiếp
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            frontier = CrawlFrontier(IngestionCatalog(os.path.join(tmp_dir, "catalog.sqlite3")), f"full:{start_url}")
+            runs = []
+            while True:
+                crawler = AsyncWebCrawler(start_url, max_depth=2, politeness_delay=0.0,
+                                          frontier=frontier, max_pages=4)
+                urls = []
+                for doc in crawler.lazy_load():
+                    urls.append(doc.metadata["source"])
+                    frontier.mark_done(doc.metadata["source"])
+                runs.append(urls)
+                if not crawler.stats["budget_exhausted"] or len(runs) > 10:
+                    frontier.clear()
+                    break
+            resumed_urls = [url for urls in runs for url in urls]
+            if set(resumed_urls) == async_urls and len(resumed_urls) == len(async_urls):
+                print(f"✅ Ngân sách 4 trang: quét tiếp qua {len(runs)} lần chạy, mỗi trang tải đúng một lần")
+            else:
+                print(f"❌ Quét tiếp sai: {runs}")
+
+        try:
+            from langchain_community.document_loaders.recursive_url_loader import RecursiveUrlLoader
+        except ImportError:
+            print("⚠️ Không có langchain_community, bỏ qua so sánh với RecursiveUrlLoader")
+            return
+        loader = RecursiveUrlLoader(url=start_url, max_depth=2, prevent_outside=True, timeout=30)
+        start = time.time()
+        loader_urls = {doc.metadata["source"] for doc in loader.lazy_load()}
+        loader_seconds = time.time() - start
+        print(f"RecursiveUrlLoader: {len(loader_urls)} trang trong {loader_seconds:.2f}s")
+        if loader_urls == async_urls:
+            print(f"✅ Cùng tập URL với RecursiveUrlLoader, nhanh hơn {loader_seconds / async_seconds:.1f} lần")
+        else:
+            print(f"❌ Khác RecursiveUrlLoader: {loader_urls ^ async_urls}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
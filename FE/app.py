@@ -1,3 +1,4 @@
+import json
 import streamlit as st
 import requests
 
@@ -11,6 +12,41 @@ st.set_page_config(
     layout="wide"
 )
 
+def get_http_session() -> requests.Session:
+    """
+    requests.Session riêng cho từng người dùng (giữ kết nối keep-alive tới Backend giữa các lần rerun).
+    Không dùng st.cache_resource: tài nguyên đó dùng chung cho mọi phiên trong tiến trình
+    (chung cookie, chung pool kết nối), trong khi requests.Session không đảm bảo an toàn đa luồng
+    """
+    if "http_session" not in st.session_state:
+        st.session_state.http_session = requests.Session()
+    return st.session_state.http_session
+
+def iter_sse_events(response):
+    """Đọc luồng Server-Sent Events: trả về từng cặp (event, data đã giải mã JSON)"""
+    event, data_lines = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line:
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data_lines.append(line[len("data:"):].strip())
+            continue
+        # Dòng trống: kết thúc một sự kiện
+        if data_lines:
+            yield event, json.loads("\n".join(data_lines))
+        event, data_lines = "message", []
+
+def render_sources(sources):
+    """Hiển thị các nguồn tài liệu dưới câu trả lời"""
+    with st.expander("📚 Xem nguồn tài liệu"):
+        for idx, source in enumerate(sources):
+            filename = source.get("filename", "N/A")
+            page = source.get("page", "N/A")
+            content = source.get("content", "")
+            st.markdown(f"**Nguồn {idx + 1}:** `{filename}` (Trang {page})")
+            st.info(content)
+
 def init_session_state():
     """Khởi tạo các biến session state cần thiết"""
     if "messages" not in st.session_state:
@@ -37,13 +73,7 @@ def render_user_interface():
             
             # Hiển thị nguồn tài liệu nếu có (dưới câu trả lời của trợ lý)
             if message["role"] == "assistant" and message.get("sources"):
-                with st.expander("📚 Xem nguồn tài liệu"):
-                    for idx, source in enumerate(message["sources"]):
-                        filename = source.get("filename", "N/A")
-                        page = source.get("page", "N/A")
-                        content = source.get("content", "")
-                        st.markdown(f"**Nguồn {idx + 1}:** `{filename}` (Trang {page})")
-                        st.info(content)
+                render_sources(message["sources"])
 
     # Ô nhập liệu cho câu hỏi mới
     if prompt := st.chat_input("Nhập câu hỏi của bạn về tài liệu..."):
@@ -58,42 +88,55 @@ def render_user_interface():
             message_placeholder.markdown("Đang suy nghĩ... 🤔")
             
             try:
-                # Gọi API Chat của backend
-                response = requests.post(
-                    f"{BACKEND_URL}/ask",
+                # Gọi API Chat dạng luồng: hiển thị từng token ngay khi LLM sinh ra
+                # with: luôn đóng kết nối luồng (trả về pool của session) kể cả khi dừng sớm hoặc lỗi giữa chừng
+                with get_http_session().post(
+                    f"{BACKEND_URL}/ask/stream",
                     json={"question": prompt},
-                    timeout=120  # Thời gian chờ lâu hơn vì quá trình sinh văn bản/RAG có thể chậm
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    answer = data.get("answer", "Xin lỗi, tôi không thể tạo câu trả lời.")
-                    sources = data.get("sources", [])
-                    
-                    # Cập nhật placeholder với câu trả lời chính thức
-                    message_placeholder.markdown(answer)
+                    stream=True,
+                    timeout=(5, 120)  # (kết nối, chờ giữa hai lần nhận dữ liệu)
+                ) as response:
+                    if response.status_code == 200:
+                        response.encoding = "utf-8"
+                        answer = ""
+                        sources = []
+                        error_detail = None
+                        for event, data in iter_sse_events(response):
+                            if event == "sources":
+                                sources = data
+                            elif event == "token":
+                                answer += data
+                                message_placeholder.markdown(answer + "▌")
+                            elif event == "error":
+                                error_detail = data.get("detail", "")
+                                break
+                            elif event == "done":
+                                break
                     
-                    # Hiển thị các nguồn tài liệu
-                    if sources:
-                        with st.expander("📚 Xem nguồn tài liệu"):
-                            for idx, source in enumerate(sources):
-                                filename = source.get("filename", "N/A")
-                                page = source.get("page", "N/A")
-                                content = source.get("content", "")
-                                st.markdown(f"**Nguồn {idx + 1}:** `{filename}` (Trang {page})")
-                                st.info(content)
+                        if error_detail is not None and not answer:
+                            error_msg = f"❌ Lỗi từ server: {error_detail}"
+                            message_placeholder.error(error_msg)
+                            st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                        else:
+                            answer = answer or "Xin lỗi, tôi không thể tạo câu trả lời."
+                            # Cập nhật placeholder với câu trả lời hoàn chỉnh
+                            message_placeholder.markdown(answer)
+                        
+                            # Hiển thị các nguồn tài liệu
+                            if sources:
+                                render_sources(sources)
+                        
+                            # Lưu vào session state
+                            st.session_state.messages.append({
+                                "role": "assistant", 
+                                "content": answer,
+                                "sources": sources
+                            })
                     
-                    # Lưu vào session state
-                    st.session_state.messages.append({
-                        "role": "assistant", 
-                        "content": answer,
-                        "sources": sources
-                    })
-                    
-                else:
-                    error_msg = f"❌ Lỗi từ server: HTTP {response.status_code}"
-                    message_placeholder.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+                    else:
+                        error_msg = f"❌ Lỗi từ server: HTTP {response.status_code}"
+                        message_placeholder.error(error_msg)
+                        st.session_state.messages.append({"role": "assistant", "content": error_msg})
                     
             except requests.exceptions.RequestException as e:
                 error_msg = "❌ Không thể kết nối đến Backend. Vui lòng đảm bảo server đang chạy tại http://localhost:8000"
@@ -142,13 +185,18 @@ def render_admin_interface():
     if st.button("🚀 Bắt đầu Nạp dữ liệu", type="primary"):
         with st.spinner("Đang gửi yêu cầu nạp dữ liệu tới Backend..."):
             try:
-                response = requests.post(
+                response = get_http_session().post(
                     f"{BACKEND_URL}/ingest",
                     json={"directory_path": directory_path},
                     timeout=10
                 )
                 if response.status_code == 200:
-                    st.success("✅ Nạp dữ liệu thành công! (Tiến trình đang chạy ngầm trên server)")
+                    data = response.json()
+                    st.session_state.last_job_id = data.get("job_id")
+                    if data.get("deduplicated"):
+                        st.info(f"ℹ️ Đã có tiến trình nạp thư mục này đang chờ/đang chạy (Job `{data.get('job_id')}`).")
+                    else:
+                        st.success(f"✅ Đã đưa yêu cầu nạp dữ liệu vào hàng đợi (Job `{data.get('job_id')}`).")
                 else:
                     st.error(f"❌ Lỗi từ server: HTTP {response.status_code}")
             except requests.exceptions.RequestException as e:
@@ -163,24 +211,64 @@ def render_admin_interface():
         value="https://hau.edu.vn/",
         help="Ví dụ: https://hau.edu.vn/"
     )
+    sync_mode = st.radio(
+        "Chế độ đồng bộ:",
+        options=["full", "incremental", "due"],
+        format_func=lambda m: {
+            "full": "Quét toàn bộ",
+            "incremental": "Chỉ trang mới/thay đổi (sitemap, RSS)",
+            "due": "Chỉ trang tới hạn tải lại"
+        }[m],
+        horizontal=True
+    )
     
     if st.button("🔄 Bắt đầu Đồng bộ Website", type="primary"):
         with st.spinner("Đang gửi yêu cầu đến server..."):
             try:
-                response = requests.post(
+                response = get_http_session().post(
                     f"{BACKEND_URL}/ingest/web",
-                    json={"start_url": start_url},
+                    json={"start_url": start_url, "mode": sync_mode},
                     timeout=10
                 )
                 if response.status_code == 200:
                     data = response.json()
+                    st.session_state.last_job_id = data.get("job_id")
                     msg = data.get("message", "Tiến trình đồng bộ Website đã được kích hoạt chạy ngầm...")
-                    st.success(f"✅ {msg}")
+                    st.success(f"✅ {msg} (Job `{data.get('job_id')}`)")
                 else:
                     st.error(f"❌ Lỗi từ server: HTTP {response.status_code}")
             except requests.exceptions.RequestException as e:
                 st.error("❌ Không thể kết nối đến Backend. Vui lòng kiểm tra lại server FastAPI!")
 
+    render_job_status()
+
+
+def render_job_status():
+    """Theo dõi tiến độ job nạp dữ liệu gần nhất"""
+    st.divider()
+    st.subheader("📈 Tiến độ nạp dữ liệu")
+    job_id = st.text_input("Mã Job:", value=st.session_state.get("last_job_id") or "")
+    
+    if job_id and st.button("🔍 Kiểm tra tiến độ"):
+        try:
+            response = get_http_session().get(f"{BACKEND_URL}/ingest/jobs/{job_id}", timeout=10)
+            if response.status_code == 200:
+                job = response.json()
+                progress = job.get("progress", {})
+                st.markdown(f"**Trạng thái:** `{job['status']}` — **Giai đoạn:** `{job['stage']}`")
+                cols = st.columns(3)
+                cols[0].metric("Đoạn đã nạp", progress.get("written", 0))
+                cols[1].metric("Tổng đoạn đã cắt", progress.get("chunks", 0))
+                cols[2].metric("Tốc độ (đoạn/giây)", progress.get("chunks_per_sec", 0))
+                if job.get("error"):
+                    st.error(f"❌ {job['error']}")
+            elif response.status_code == 404:
+                st.warning("Không tìm thấy Job.")
+            else:
+                st.error(f"❌ Lỗi từ server: HTTP {response.status_code}")
+        except requests.exceptions.RequestException as e:
+            st.error("❌ Không thể kết nối đến Backend. Vui lòng kiểm tra lại server FastAPI!")
+
 
 def main():
     # Khởi tạo state